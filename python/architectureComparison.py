@@ -0,0 +1,492 @@
+"""
+Comparison of network architectures on the same objects and sensation streams.
+
+Every architecture is wrapped by the same interface (see Architecture) - it is built from
+parameters.cfg, learns the objects from their streams and infers them step by step, returning
+the recognized object after every step. Architectures compared by default:
+  - "l246a" - four column L2-L4-L6a network (createMultipleL246aNetwork), as experiment1
+  - "l246a-1" - single column L2-L4-L6a network (createL246Nework)
+  - "l4l6a" - single column L4-L6a network without L2 (createL4L6Nework)
+  - "sp-tm" - the model of old_experiment/main.py, SpatialPooler of the feature, GridCellEncoder
+              of the location as basal input of ApicalTiebreakPairMemory (modelParams.cfg)
+Networks without L2 have no object representation, their objects are read out by CellEvidence.
+
+Each architecture runs in its own spawned process, one after another, so they don't compete for
+cores and the memory increase of the process (after its libraries are imported) is the memory of
+the architecture alone.
+
+    python cli.py compare [--architectures l246a l4l6a] [--objects cup boat]
+"""
+import copy
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import numpy as np
+
+from experimentFramework.anytimeEvaluation import NONE, predictedObject
+
+_EXEC_DIR = os.path.dirname(os.path.abspath(__file__))
+OLD_MODEL_PARAMS = os.path.join(_EXEC_DIR, "old_experiment", "modelParams.cfg")
+
+_regionsRegistered = False
+
+
+def _registerRegions():
+    global _regionsRegistered
+    if not _regionsRegistered:
+        from htm.advanced.support.register_regions import registerAllAdvancedRegions
+        registerAllAdvancedRegions()
+        _regionsRegistered = True
+
+
+def residentMemory():
+    """
+    Returns current resident memory of this process in bytes, peak memory where the current one is not known.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return peakMemory()
+
+
+def peakMemory():
+    """
+    Returns peak resident memory of this process in bytes, None if it is not known (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, kilobytes elsewhere
+
+
+def displacements(stream):
+    """
+    Yields (displacement from the previous location, feature) of the stream, as L2_L4_L6_Network.infer.
+    """
+    previous = None
+    for location, feature in stream:
+        location = np.array(location)
+        yield (location - previous if previous is not None else np.zeros_like(location)), feature
+        previous = location
+
+
+class CellEvidence:
+    """
+    Recognizes objects from cells of a layer with columns (e.g. L4 without L2). Cells active
+    during learning of an object are its cells. In inference object remains a candidate while
+    its cells explain at least minOverlap of active columns of every step since reset, the only
+    remaining candidate is recognized. Bursting columns contain cells of all objects with the
+    feature, so they don't narrow the candidates.
+
+    :param cellsPerColumn: cells per column of the layer
+    :param minOverlap: fraction of active columns which must contain cells of the object
+    """
+
+    def __init__(self, cellsPerColumn, minOverlap=0.5):
+        self.cellsPerColumn = cellsPerColumn
+        self.minOverlap = minOverlap
+        self.objects = {}
+        self.candidates = None
+
+    def learn(self, objectName, cells):
+        self.objects.setdefault(objectName, set()).update(int(c) for c in cells)
+
+    def reset(self):
+        self.candidates = None
+
+    def infer(self, cells):
+        """
+        Narrows the candidates by active cells of the step.
+
+        :return: name of the recognized object, NONE if there are no or more candidates
+        """
+        cells = set(int(c) for c in cells)
+        columns = len(set(c // self.cellsPerColumn for c in cells))
+        candidates = self.objects if self.candidates is None else self.candidates
+        if columns:
+            self.candidates = [name for name in candidates
+                               if len(set(c // self.cellsPerColumn for c in cells & self.objects[name]))
+                               >= self.minOverlap * columns]
+        return self.candidates[0] if self.candidates is not None and len(self.candidates) == 1 else NONE
+
+
+class Architecture:
+    """
+    Common interface of the compared architectures.
+
+    :param name: key of the architecture in results
+    :param numColumns: number of sensor streams used, the first ones of each object
+    """
+
+    def __init__(self, name, numColumns=1):
+        self.name = name
+        self.numColumns = numColumns
+
+    def prepare(self):
+        """
+        Imports modules and registers regions used by the architecture, not counted into its memory.
+        """
+        pass
+
+    def build(self, params):
+        """
+        Creates the model, params are parameters.cfg completed by Experiment.configure.
+        """
+        raise NotImplementedError
+
+    def learn(self, objects):
+        """
+        :param objects: dict object name -> list of numColumns streams of (location, feature SDR)
+        """
+        raise NotImplementedError
+
+    def infer(self, sensations):
+        """
+        Infers the object from list of numColumns streams, learning is disabled.
+
+        :return: recognized object after every step (NONE if none)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class L246aArchitecture(Architecture):
+    """
+    L2_L4_L6_Network, with one column it is the network of createL246Nework.
+
+    :param backend: backend of L2_L4_L6_Network
+    """
+
+    def __init__(self, name, numColumns=4, backend="htm"):
+        super().__init__(name, numColumns)
+        self.backend = backend
+
+    def prepare(self):
+        if self.backend != "numpy":
+            _registerRegions()
+            import l2l4l6Framework.multi_l2_l4_l6_networkFactory  # noqa: F401
+
+    def build(self, params):
+        from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
+
+        self.network = L2_L4_L6_Network(numColumns=self.numColumns,
+                                        L2Params=params["l2_params"],
+                                        L4Params=params["l4_params"],
+                                        L6aParams=params["l6a_params"],
+                                        repeat=params["num_learning_points"],
+                                        backend=self.backend)
+
+    def learn(self, objects):
+        self.network.learn(objects)
+
+    def infer(self, sensations):
+        self.network.startInference()
+        labels = []
+        for step in zip(*[displacements(stream) for stream in sensations]):
+            self.network.inferStep(step)
+            labels.append(predictedObject(self.network.getCurrentClassification()))
+        return labels
+
+
+class L4L6aArchitecture(Architecture):
+    """
+    Single column of createL4L6Nework, objects are read out from L4 active cells by CellEvidence.
+    """
+
+    def __init__(self, name, minOverlap=0.5):
+        super().__init__(name, 1)
+        self.minOverlap = minOverlap
+
+    def prepare(self):
+        _registerRegions()
+        import l2l4l6Framework.l4_l6_networkFactory  # noqa: F401
+
+    def build(self, params):
+        from l2l4l6Framework.l2_l4_l6_Network import createNetworkInstance
+        from l2l4l6Framework.l4_l6_networkFactory import createL4L6Nework
+        from l2l4l6Framework.regionRegistry import selectRegions
+
+        self.regions = selectRegions()
+        self.network = createNetworkInstance("htm")
+        createL4L6Nework(self.network, params["l4_params"], params["l6a_params"], suffix="_0", regions=self.regions)
+        self.network.initialize()
+
+        self.repeat = params["num_learning_points"]
+        self.dimensions = params["l6a_params"].get("dimensions", 2)
+        self.sensorInput = self.network.getRegion("sensorInput_0")
+        self.motorInput = self.network.getRegion("motorInput_0")
+        self.L4 = self.network.getRegion("L4_0")
+        self.L6a = self.network.getRegion("L6a_0")
+        self.evidence = CellEvidence(params["l4_params"]["cellsPerColumn"], self.minOverlap)
+
+    def _setLearning(self, learn):
+        self.L4.setParameterBool(self.regions["L4"].parameter("learn"), learn)
+        self.L6a.setParameterBool(self.regions["L6a"].parameter("learningMode"), learn)
+
+    def _reset(self):
+        self.sensorInput.executeCommand('addDataToQueue', [], True, 0)
+        self.motorInput.executeCommand('addDataToQueue', [0] * self.dimensions, True)
+        self.network.run(1)
+
+    def _activeCells(self):
+        return np.array(self.L4.getOutputArray(self.regions["L4"].output("activeCells"))).nonzero()[0]
+
+    def learn(self, objects):
+        self._setLearning(True)
+        for objectName, sensations in objects.items():
+            self._reset()
+            for displacement, feature in displacements(sensations[0]):
+                for _ in range(self.repeat):  # move only on the first repetition
+                    self.motorInput.executeCommand('addDataToQueue', displacement)
+                    self.sensorInput.executeCommand('addDataToQueue', feature, False, 0)
+                    displacement = [0] * self.dimensions
+                self.network.run(self.repeat)
+                self.evidence.learn(objectName, self._activeCells())
+
+    def infer(self, sensations):
+        self._setLearning(False)
+        self._reset()
+        self.evidence.reset()
+        labels = []
+        for displacement, feature in displacements(sensations[0]):
+            self.motorInput.executeCommand('addDataToQueue', displacement)
+            self.sensorInput.executeCommand('addDataToQueue', feature, False, 0)
+            self.network.run(1)
+            labels.append(self.evidence.infer(self._activeCells()))
+        return labels
+
+
+class SPGridTMArchitecture(Architecture):
+    """
+    Model of old_experiment/main.py - feature SDR of the stream goes through SpatialPooler, absolute
+    location is encoded by GridCellEncoder as basal input of ApicalTiebreakPairMemory. Parameters
+    are read from modelParams.cfg, objects are read out from active cells by CellEvidence.
+    """
+
+    def __init__(self, name, modelParams=OLD_MODEL_PARAMS, minOverlap=0.5):
+        super().__init__(name, 1)
+        self.modelParams = modelParams
+        self.minOverlap = minOverlap
+
+    def prepare(self):
+        import htm.advanced.algorithms.apical_tiebreak_temporal_memory  # noqa: F401
+        import htm.encoders.grid_cell_encoder  # noqa: F401
+
+    def build(self, params):
+        from htm.advanced.algorithms.apical_tiebreak_temporal_memory import ApicalTiebreakPairMemory
+        from htm.bindings.algorithms import SpatialPooler
+        from htm.bindings.sdr import SDR
+        from htm.encoders.grid_cell_encoder import GridCellEncoder
+
+        with open(self.modelParams, "r") as f:
+            parameters = eval(f.read())
+        spParams = parameters["sensoryLayer_sp"]
+        locParams = parameters["locationLayer"]
+        tmParams = parameters["sensoryLayer_tm"]
+        inputSize = params["l4_params"]["columnCount"]  # size of the feature SDR of the streams
+
+        self.repeat = params["num_learning_points"]
+        self.sp = SpatialPooler(
+            inputDimensions=(inputSize,),
+            columnDimensions=(spParams["columnCount"],),
+            potentialPct=spParams["potentialPct"],
+            potentialRadius=inputSize,
+            globalInhibition=True,
+            localAreaDensity=spParams["localAreaDensity"],
+            synPermInactiveDec=spParams["synPermInactiveDec"],
+            synPermActiveInc=spParams["synPermActiveInc"],
+            synPermConnected=spParams["synPermConnected"],
+            boostStrength=spParams["boostStrength"],
+            wrapAround=True,
+        )
+        self.gridCellEncoder = GridCellEncoder(
+            size=locParams["cellCount"],
+            sparsity=locParams["sparsity"],
+            periods=locParams["periods"],
+            seed=locParams["seed"],
+        )
+        self.tm = ApicalTiebreakPairMemory(
+            columnCount=spParams["columnCount"],
+            cellsPerColumn=tmParams["cellsPerColumn"],
+            basalInputSize=locParams["cellCount"],
+            activationThreshold=tmParams["activationThreshold"],
+            reducedBasalThreshold=13,
+            initialPermanence=tmParams["initialPerm"],
+            connectedPermanence=spParams["synPermConnected"],
+            minThreshold=tmParams["minThreshold"],
+            sampleSize=20,
+            permanenceIncrement=tmParams["permanenceInc"],
+            permanenceDecrement=tmParams["permanenceDec"],
+            basalPredictedSegmentDecrement=0.0,
+            apicalPredictedSegmentDecrement=0.0,
+            maxSynapsesPerSegment=tmParams["maxSynapsesPerSegment"],
+        )
+        self.featureSDR = SDR(inputSize)
+        self.columnsSDR = SDR(spParams["columnCount"])
+        self.locationSDR = SDR(self.gridCellEncoder.dimensions)
+        self.evidence = CellEvidence(tmParams["cellsPerColumn"], self.minOverlap)
+
+    def _compute(self, location, feature, learn):
+        self.featureSDR.sparse = sorted(set(feature))
+        self.sp.compute(self.featureSDR, learn, self.columnsSDR)
+        self.gridCellEncoder.encode(list(location), self.locationSDR)
+        self.tm.compute(activeColumns=self.columnsSDR.sparse, basalInput=self.locationSDR.sparse,
+                        basalGrowthCandidates=None, learn=learn)
+
+    def learn(self, objects):
+        for objectName, sensations in objects.items():
+            self.tm.reset()
+            for location, feature in sensations[0]:
+                for _ in range(self.repeat):
+                    self._compute(location, feature, True)
+                self.evidence.learn(objectName, self.tm.getActiveCells())
+
+    def infer(self, sensations):
+        self.tm.reset()
+        self.evidence.reset()
+        labels = []
+        for location, feature in sensations[0]:
+            self._compute(location, feature, False)
+            labels.append(self.evidence.infer(self.tm.getActiveCells()))
+        return labels
+
+
+# key -> (architecture class, constructor arguments)
+ARCHITECTURES = {
+    "l246a": (L246aArchitecture, {"numColumns": 4}),
+    "l246a-1": (L246aArchitecture, {"numColumns": 1}),
+    "l4l6a": (L4L6aArchitecture, {}),
+    "sp-tm": (SPGridTMArchitecture, {}),
+}
+
+
+def createArchitecture(key, **kwargs):
+    if key not in ARCHITECTURES:
+        raise RuntimeError("Unknown architecture '" + str(key) + "', use one of " + str(list(ARCHITECTURES)))
+    cls, arguments = ARCHITECTURES[key]
+    return cls(key, **dict(arguments, **kwargs))
+
+
+def createStreams(params, repetition=0, objects=None, objectSpaceSize=20):
+    """
+    Creates sensation streams of the objects as Experiment.learn does.
+
+    :return: (params completed for the repetition, dict object name -> list of four column streams)
+    """
+    import experiment1
+
+    params = copy.deepcopy(params)
+    experiment = experiment1.Experiment(objectSpaceSize=objectSpaceSize)
+    seed = experiment.configure(params, repetition)
+    experiment.createSensations(seed + repetition, objects)
+    streams = {obj: [experiment.sensations[obj][col] for col in range(4)] for obj in experiment.learnedObjectNames}
+    return params, streams
+
+
+def measure(architecture, params, streams):
+    """
+    Builds, learns and infers all objects of the streams by the architecture.
+
+    :return: dict with throughput in sensations (steps of all columns) per second, memory in MB -
+             increase of resident memory by building and learning and peak of the process,
+             "accuracy" - fraction of objects recognized in any step, "final accuracy" - recognized
+             after the last step and "mean steps" - mean first step of recognition (length if never)
+    """
+    objects = {obj: columns[:architecture.numColumns] for obj, columns in streams.items()}
+    architecture.prepare()
+    baseline = residentMemory()
+
+    started = time.perf_counter()
+    architecture.build(params)
+    buildTime = time.perf_counter() - started
+
+    started = time.perf_counter()
+    architecture.learn(objects)
+    learnTime = time.perf_counter() - started
+    memory = residentMemory() - baseline
+
+    labels = {}
+    started = time.perf_counter()
+    for obj, sensations in objects.items():
+        labels[obj] = architecture.infer(sensations)
+    inferTime = time.perf_counter() - started
+    peak = peakMemory()
+    architecture.close()
+
+    learnSteps = sum(len(columns[0]) for columns in objects.values())
+    inferSteps = sum(len(steps) for steps in labels.values())
+    recognized = [obj in steps for obj, steps in labels.items()]
+    firstSteps = [steps.index(obj) + 1 if obj in steps else len(steps) for obj, steps in labels.items()]
+    return {
+        "architecture": architecture.name,
+        "columns": architecture.numColumns,
+        "build s": buildTime,
+        "learn sensations/s": learnSteps / learnTime,
+        "infer sensations/s": inferSteps / inferTime,
+        "memory MB": memory / 2 ** 20,
+        "peak MB": peak / 2 ** 20 if peak is not None else None,
+        "accuracy": sum(recognized) / len(recognized),
+        "final accuracy": sum(obj == steps[-1] for obj, steps in labels.items()) / len(labels),
+        "mean steps": sum(firstSteps) / len(firstSteps),
+        "labels": labels,
+    }
+
+
+def _measureTask(task):
+    architecture, params, streams = task
+    try:
+        return measure(architecture, params, streams)
+    except Exception:
+        return {"architecture": architecture.name, "columns": architecture.numColumns, "error": traceback.format_exc()}
+
+
+def compare(architectures, params, streams, isolate=True):
+    """
+    Measures the architectures one after another on the same streams, see measure.
+
+    :param isolate: measure each architecture in a new spawned process, otherwise in this process
+                    (memory is then not of the architecture alone)
+    :return: list of results, failed architectures have "error" instead of measurements
+    """
+    results = []
+    for architecture in architectures:
+        task = (architecture, params, streams)
+        if isolate:
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                results.append(pool.apply(_measureTask, (task,)))
+        else:
+            results.append(_measureTask(task))
+    return results
+
+
+COLUMNS = ["learn sensations/s", "infer sensations/s", "memory MB", "peak MB", "accuracy", "final accuracy",
+           "mean steps"]
+
+
+def formatTable(results):
+    """
+    Returns the results side by side as text table, one architecture per row.
+    """
+    rows = [["architecture"] + COLUMNS]
+    for result in results:
+        if "error" in result:
+            rows.append([result["architecture"], "failed: " + result["error"].strip().splitlines()[-1]])
+            continue
+        rows.append([result["architecture"]] + ["-" if result[c] is None else "%.2f" % result[c] for c in COLUMNS])
+
+    widths = [max(len(row[i]) for row in rows if i < len(row) and len(row) > 2) for i in range(len(rows[0]))]
+    lines = []
+    for row in rows:
+        if len(row) == 2:
+            lines.append(row[0].ljust(widths[0]) + "  " + row[1])
+        else:
+            lines.append("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+    return "\n".join(lines)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Asynchronous baking of data for HTMpandaVis (https://github.com/htm-community/HTMpandaVis).
+
+    PandaBaker.StoreIteration writes into the database synchronously, which slows the
+    experiment down a lot. AsyncBaker takes copy of the iteration values in the compute
+    thread and stores them from background thread, committing many iterations in one
+    transaction.
+
+    Values of the iteration are written into AsyncBaker.inputs, .layers and .dataStreams
+    (instead of PandaBaker's ones), the writer thread copies them into the PandaBaker
+    objects right before StoreIteration.
+
+    Synapses are read by PandaBaker from the SP/TM instances of the layers (cLayer.sp, .tm),
+    which keep learning in the compute thread. So the writer never gets the live instances -
+    with synapses=True it gets copies of them taken together with the other values of the
+    iteration, otherwise they are None and synapses are not baked.
+"""
+import atexit
+import copy
+import queue
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+
+class _Values:
+    """
+    Holder for values of one input, layer or data stream, e.g. .bits, .activeCells, .value
+    """
+
+    def snapshot(self):
+        return {
+            name: (np.array(value, copy=True) if isinstance(value, (list, tuple, np.ndarray)) else value)
+            for name, value in vars(self).items()
+        }
+
+
+_STOP = object()
+_FLUSH = object()
+
+# attributes of PandaBaker layers (cLayer) with algorithm instances, synapses are read from them
+SYNAPSE_SOURCES = ("sp", "tm")
+
+
+class AsyncBaker:
+    """
+    :param pandaBaker: PandaBaker instance with inputs, layers and dataStreams already created,
+                       AsyncBaker must be created before PandaBaker.PrepareDatabase()
+    :param everyNth: bake only every Nth iteration
+    :param layers: names of layers to bake, None for all
+    :param inputs: names of inputs to bake, None for all
+    :param streams: names of data streams to bake, None for all
+    :param batchSize: number of iterations committed in one transaction
+    :param queueSize: max number of iterations waiting for the writer, the compute
+                      thread waits when the queue is full
+    :param synapses: bake synapses of SP/TM of the layers, they are copied in every baked
+                     iteration, which is slow for large layers (use with everyNth)
+    """
+
+    def __init__(self, pandaBaker, everyNth=1, layers=None, inputs=None, streams=None, batchSize=100, queueSize=1000,
+                 synapses=False):
+        self.baker = pandaBaker
+        self.everyNth = everyNth
+        self.batchSize = batchSize
+        self.synapses = synapses
+
+        # leave out what was not selected, so it is not even prepared in the database
+        if layers is not None:
+            self.baker.layers = {k: v for k, v in self.baker.layers.items() if k in layers}
+        if inputs is not None:
+            self.baker.inputs = {k: v for k, v in self.baker.inputs.items() if k in inputs}
+        if streams is not None:
+            self.baker.dataStreams = {k: v for k, v in self.baker.dataStreams.items() if k in streams}
+
+        # live SP/TM instances, the writer replaces them in PandaBaker layers by copies or None
+        self._synapseSources = {}
+        for name, layer in self.baker.layers.items():
+            sources = {field: getattr(layer, field) for field in SYNAPSE_SOURCES
+                       if getattr(layer, field, None) is not None}
+            if sources:
+                self._synapseSources[name] = sources
+
+        self.inputs = defaultdict(_Values)
+        self.layers = defaultdict(_Values)
+        self.dataStreams = defaultdict(_Values)
+
+        self._queue = queue.Queue(maxsize=queueSize)
+        self._error = None
+        self._thread = threading.Thread(target=self._writerLoop, name="AsyncBaker", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def isBaked(self, iteration):
+        return iteration % self.everyNth == 0
+
+    def storeIteration(self, iteration):
+        """
+        Takes copy of the current values and queues them for storing. Iterations not selected
+        by everyNth are skipped.
+        """
+        if self._error is not None:
+            raise RuntimeError("AsyncBaker writer failed!") from self._error
+        if not self.isBaked(iteration):
+            return
+
+        record = (
+            iteration,
+            self._snapshot(self.inputs, self.baker.inputs),
+            self._snapshot(self.layers, self.baker.layers),
+            self._snapshot(self.dataStreams, self.baker.dataStreams),
+            self._synapseSnapshot(),
+        )
+        self._queue.put(record)
+
+    def flush(self):
+        """
+        Waits until all queued iterations are stored and committed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("AsyncBaker writer failed!") from self._error
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        atexit.unregister(self.close)
+
+    @staticmethod
+    def _snapshot(values, selected):
+        return [(name, v.snapshot()) for name, v in values.items() if name in selected]
+
+    def _synapseSnapshot(self):
+        """
+        Copies (or None if synapses are not baked) of the SP/TM instances of the layers.
+        """
+        return [(name, {field: copy.deepcopy(source) if self.synapses else None for field, source in sources.items()})
+                for name, sources in self._synapseSources.items()]
+
+    @staticmethod
+    def _apply(snapshot, targets):
+        for name, fields in snapshot:
+            target = targets[name]
+            for field, value in fields.items():
+                setattr(target, field, value)
+
+    def _writerLoop(self):
+        stored = 0
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP or record is _FLUSH:
+                    if stored > 0:
+                        self.baker.CommitBatch()
+                        stored = 0
+                    if record is _STOP:
+                        return
+                    continue
+
+                iteration, inputs, layers, dataStreams, synapses = record
+                self._apply(inputs, self.baker.inputs)
+                self._apply(layers, self.baker.layers)
+                self._apply(synapses, self.baker.layers)
+                self._apply(dataStreams, self.baker.dataStreams)
+                self.baker.StoreIteration(iteration)
+                stored += 1
+
+                if stored >= self.batchSize:
+                    self.baker.CommitBatch()
+                    stored = 0
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
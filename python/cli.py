@@ -0,0 +1,275 @@
+"""
+Headless command line entry point of experiment1, without plotting and pandaVis.
+
+    python cli.py learn --checkpoint checkpoint
+    python cli.py infer --checkpoint checkpoint [--objects cup boat] [--stats stats]
+    python cli.py evaluate --checkpoint checkpoint [--samples 10] [--processes 8]
+    python cli.py bench [--steps 100]
+    python cli.py search [--configs 27] [--eta 3] [--processes 8] [--hyperband]
+    python cli.py submit --queue /nfs/queue [--repetitions 10]
+    python cli.py work --queue /nfs/queue
+    python cli.py collect --queue /nfs/queue [--output repetitions.json]
+    python cli.py compare [--architectures l246a l246a-1 l4l6a sp-tm] [--objects cup boat]
+
+Only the modules needed by the command are imported (htm.core on first network use,
+matplotlib and pandaBaker never), time spent by start-up is reported on stderr.
+"""
+import time
+
+_START = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+
+
+def _log(text):
+    print(text, file=sys.stderr)
+
+
+def _loadParameters(path):
+    with open(path, "r") as f:
+        return eval(f.read())
+
+
+def _createExperiment(args):
+    import experiment1
+
+    # figures and live view are not available in headless run
+    experiment1.HEADLESS_RENDER = True
+    experiment1.LIVE_VIEW = False
+    experiment = experiment1.Experiment(objectSpaceSize=args.size)
+    _log("Startup: %.1f ms" % (1000 * (time.perf_counter() - _START)))
+    return experiment
+
+
+def learn(args):
+    experiment = _createExperiment(args)
+    started = time.perf_counter()
+    experiment.learn(_loadParameters(args.params), args.repetition)
+    _log("Learning: %.2f s" % (time.perf_counter() - started))
+    experiment.network.save(args.checkpoint)
+
+
+def infer(args):
+    experiment = _createExperiment(args)
+    experiment.loadCheckpoint(_loadParameters(args.params), args.checkpoint)
+    numSensations = args.sensations or experiment.numOfSensations
+
+    writer = None
+    if args.stats:
+        from experimentFramework.statsStore import StatsWriter
+        writer = StatsWriter(args.stats)
+        experiment.network.recordOverlaps = True
+
+    for obj in args.objects or experiment.learnedObjectNames:
+        stats = experiment.inferAnytime(obj, numSensations)[0]
+        print(obj + ": " + ("correctly classified" if 1 in stats["Correct classification"] else "not classified"))
+        if writer is not None:
+            writer.writeRun(stats)
+
+    if writer is not None:
+        writer.close()
+
+
+def evaluate(args):
+    from parallelEvaluation import ParallelEvaluator
+
+    experiment = _createExperiment(args)
+    experiment.loadCheckpoint(_loadParameters(args.params), args.checkpoint)
+    numSensations = args.sensations or experiment.numOfSensations
+
+    streams = {obj: [experiment.createInferStream(obj, numSensations) for _ in range(args.samples)]
+               for obj in experiment.learnedObjectNames}
+    started = time.perf_counter()
+    evaluator = ParallelEvaluator(args.checkpoint, processes=args.processes, network=experiment.network)
+    results = evaluator.evaluate(streams)
+    _log("Evaluation: %.2f s" % (time.perf_counter() - started))
+
+    print("Accuracy: " + str(results.accuracy()))
+    with open(args.output, "w") as f:
+        f.write(json.dumps(results.summary(), indent=4))
+
+
+def bench(args):
+    import numpy as np
+
+    experiment = _createExperiment(args)
+    params = _loadParameters(args.params)
+
+    started = time.perf_counter()
+    experiment.learn(params, 0)
+    learnTime = time.perf_counter() - started
+
+    network = experiment.network
+    started = time.perf_counter()
+    for obj in experiment.learnedObjectNames:
+        network.infer(experiment.createInferStream(obj, args.steps))
+    inferTime = time.perf_counter() - started
+    steps = args.steps * len(experiment.learnedObjectNames)
+
+    result = {
+        "learn s": learnTime,
+        "infer steps": steps,
+        "infer steps/s": steps / inferTime,
+        "infer ms/step": float(np.round(1000 * inferTime / steps, 3)),
+    }
+    print(json.dumps(result, indent=4))
+
+
+def search(args):
+    import experiment1
+    import hyperparameterSearch as hs
+
+    params = _loadParameters(args.params)
+    objects = args.objects or experiment1.LEARNED_OBJECTS
+    budgets = [{"objects": len(objects), "sensations": params["num_sensations"]}]
+    for _ in range(args.rungs - 1):  # each smaller rung has 1/eta of sensations and about half of objects
+        budgets.insert(0, {"objects": max(1, (budgets[0]["objects"] + 1) // 2),
+                           "sensations": max(1, budgets[0]["sensations"] // args.eta)})
+
+    searcher = hs.HyperparameterSearch(params, objects, budgets, eta=args.eta, processes=args.processes)
+    started = time.perf_counter()
+    if args.hyperband:
+        config, result = searcher.hyperband(hs.DEFAULT_SPACE, seed=args.seed)
+    else:
+        config, result = searcher.successiveHalving(hs.sampleConfigs(hs.DEFAULT_SPACE, args.configs, seed=args.seed))
+    _log("Search: %.2f s, %d evaluations" % (time.perf_counter() - started, len(searcher.trials)))
+
+    print(json.dumps({"config": config, "result": result}, indent=4))
+    with open(args.output, "w") as f:
+        f.write(json.dumps({"budgets": budgets, "best": config, "result": result, "trials": searcher.trials},
+                           indent=4))
+
+
+def submit(args):
+    import experiment1
+    from experimentFramework.jobQueue import JobQueue
+    from experimentFramework.resultCache import canonicalKey
+
+    params = _loadParameters(args.params)
+    objects = args.objects or experiment1.LEARNED_OBJECTS
+    queue = JobQueue(args.queue)
+    for repetition in range(args.repetitions):
+        kwargs = {"params": params, "repetition": repetition, "objects": objects, "objectSpaceSize": args.size}
+        # the same run is queued only once, submitting the sweep again adds only new runs
+        print(queue.submit("experiment1:runRepetition", kwargs=kwargs, jobId=canonicalKey(**kwargs)))
+    _log(json.dumps(queue.status()))
+
+
+def work(args):
+    from experimentFramework.jobQueue import JobQueue, Worker
+
+    queue = JobQueue(args.queue, lease=args.lease)
+    count = Worker(queue, pollInterval=args.poll).run(exitWhenIdle=not args.forever)
+    _log("Jobs run: %d, queue: %s" % (count, json.dumps(queue.status())))
+
+
+def collect(args):
+    from experimentFramework.jobQueue import JobQueue
+    from experimentFramework.statsAggregator import StatsAggregator
+
+    # results are merged one at a time, memory does not grow with the number of repetitions
+    total = StatsAggregator()
+    for _, state in JobQueue(args.queue).results():
+        total.merge(StatsAggregator.fromState(state))
+
+    summary = {"runs": total.runs, "objects": {}}
+    for objectName, metric in sorted(total.results, key=str):
+        stats = total.summary(objectName, metric)
+        summary["objects"].setdefault(objectName, {})[metric] = {k: v.tolist() for k, v in stats.items()}
+    correct = total.combined("Correct classification")["mean"] if total.runs else []
+    print("Runs: " + str(total.runs) + ", correct classification at the last step: "
+          + (str(correct[-1]) if len(correct) else "-"))
+    with open(args.output, "w") as f:
+        f.write(json.dumps(summary, indent=4))
+
+
+def compare(args):
+    import architectureComparison as ac
+
+    architectures = [ac.createArchitecture(key) for key in args.architectures]
+    params, streams = ac.createStreams(_loadParameters(args.params), args.repetition, args.objects, args.size)
+    _log("Startup: %.1f ms" % (1000 * (time.perf_counter() - _START)))
+
+    results = ac.compare(architectures, params, streams, isolate=not args.shared)
+    print(ac.formatTable(results))
+    with open(args.output, "w") as f:
+        f.write(json.dumps(results, indent=4))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless L2-L4-L6a experiment")
+    parser.add_argument("--params", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "parameters.cfg"))
+    parser.add_argument("--size", type=int, default=20, help="object space size")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("learn", help="learn objects and save checkpoint")
+    command.add_argument("--checkpoint", required=True)
+    command.add_argument("--repetition", type=int, default=0)
+    command.set_defaults(run=learn)
+
+    command = commands.add_parser("infer", help="infer objects by network from checkpoint")
+    command.add_argument("--checkpoint", required=True)
+    command.add_argument("--objects", nargs="*", help="objects to infer, all learned by default")
+    command.add_argument("--sensations", type=int, default=None, help="num_sensations of parameters by default")
+    command.add_argument("--stats", default=None, help="write columnar stats into this directory")
+    command.set_defaults(run=infer)
+
+    command = commands.add_parser("evaluate", help="confusion matrix of all objects, in parallel")
+    command.add_argument("--checkpoint", required=True)
+    command.add_argument("--samples", type=int, default=10, help="trajectories of each object")
+    command.add_argument("--sensations", type=int, default=None, help="num_sensations of parameters by default")
+    command.add_argument("--processes", type=int, default=None, help="all cores by default")
+    command.add_argument("--output", default="library_evaluation.json")
+    command.set_defaults(run=evaluate)
+
+    command = commands.add_parser("bench", help="time of learning and inference")
+    command.add_argument("--steps", type=int, default=100, help="inference steps of each object")
+    command.set_defaults(run=bench)
+
+    command = commands.add_parser("search", help="successive halving search of network parameters")
+    command.add_argument("--configs", type=int, default=27, help="configurations on the smallest budget")
+    command.add_argument("--eta", type=int, default=3, help="1/eta of configurations is promoted")
+    command.add_argument("--rungs", type=int, default=3, help="number of budgets, the last one is full")
+    command.add_argument("--objects", nargs="*", help="objects of the full budget, LEARNED_OBJECTS by default")
+    command.add_argument("--hyperband", action="store_true", help="run Hyperband brackets instead of one")
+    command.add_argument("--processes", type=int, default=None, help="all cores by default")
+    command.add_argument("--seed", type=int, default=42)
+    command.add_argument("--output", default="search_results.json")
+    command.set_defaults(run=search)
+
+    command = commands.add_parser("submit", help="add repetitions of the experiment into a shared job queue")
+    command.add_argument("--queue", required=True, help="queue directory, shared by all hosts")
+    command.add_argument("--repetitions", type=int, default=1)
+    command.add_argument("--objects", nargs="*", help="objects to learn, LEARNED_OBJECTS by default")
+    command.set_defaults(run=submit)
+
+    command = commands.add_parser("work", help="run jobs of a shared job queue")
+    command.add_argument("--queue", required=True, help="queue directory, shared by all hosts")
+    command.add_argument("--lease", type=float, default=300.0, help="seconds without heartbeat of lost job")
+    command.add_argument("--poll", type=float, default=5.0, help="seconds between checks of an empty queue")
+    command.add_argument("--forever", action="store_true", help="wait for new jobs instead of exiting")
+    command.set_defaults(run=work)
+
+    command = commands.add_parser("collect", help="merge stats of finished repetitions of a shared job queue")
+    command.add_argument("--queue", required=True, help="queue directory, shared by all hosts")
+    command.add_argument("--output", default="repetitions.json")
+    command.set_defaults(run=collect)
+
+    command = commands.add_parser("compare", help="throughput, memory and accuracy of network architectures")
+    command.add_argument("--architectures", nargs="*", default=["l246a", "l246a-1", "l4l6a", "sp-tm"],
+                         help="keys of architectureComparison.ARCHITECTURES")
+    command.add_argument("--objects", nargs="*", help="objects to learn, LEARNED_OBJECTS by default")
+    command.add_argument("--repetition", type=int, default=0)
+    command.add_argument("--shared", action="store_true", help="measure all architectures in this process")
+    command.add_argument("--output", default="architecture_comparison.json")
+    command.set_defaults(run=compare)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
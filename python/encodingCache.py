@@ -0,0 +1,55 @@
+"""
+Lookup table of encoded SDRs for encoders with small set of possible inputs.
+
+Agent visits only integer positions of the environment and senses only few features, so
+the same values are encoded again and again. EncodingCache encodes every possible value
+once at start and keeps the active indices of all SDRs in one compact array, encoding at
+run time is then just a table lookup. Values missing in the table are encoded on first
+use and kept as well.
+"""
+import numpy as np
+
+
+class EncodingCache:
+    """
+    :param encode: function value -> active indices (sparse) of the encoded SDR
+    :param values: values to precompute, must be hashable (e.g. positions as tuples)
+    :param size: size of the encoded SDRs, to pick the smallest index type
+    """
+
+    def __init__(self, encode, values, size):
+        self.encode = encode
+        self.dtype = np.uint16 if size <= 2 ** 16 else np.uint32
+
+        values = list(values)
+        sparse = [np.asarray(encode(v), dtype=self.dtype) for v in values]
+        self._indices = np.concatenate(sparse) if sparse else np.zeros(0, dtype=self.dtype)
+        offsets = np.cumsum([0] + [len(s) for s in sparse])
+        self._rows = {v: (offsets[i], offsets[i + 1]) for i, v in enumerate(values)}
+        self._extra = {}  # values encoded on demand
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._rows) + len(self._extra)
+
+    def __contains__(self, value):
+        return value in self._rows or value in self._extra
+
+    def lookup(self, value):
+        """
+        Returns active indices of the encoded value. Returned array must not be modified.
+        """
+        row = self._rows.get(value)
+        if row is not None:
+            return self._indices[row[0]:row[1]]
+
+        sparse = self._extra.get(value)
+        if sparse is None:
+            self.misses += 1
+            sparse = np.asarray(self.encode(value), dtype=self.dtype)
+            self._extra[value] = sparse
+        return sparse
+
+    @property
+    def nbytes(self):
+        return self._indices.nbytes + sum(s.nbytes for s in self._extra.values())
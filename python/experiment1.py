@@ -29,25 +29,16 @@ import random
 from collections import defaultdict, OrderedDict
 import copy
 
-import matplotlib
-#matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
 import yaml
 import experimentFramework.objectSpace as objectSpace
 import experimentFramework.agent as agent
 from experimentFramework.agent import Direction
+from experimentFramework.anytimeEvaluation import AnytimeEvaluator, splitRuns
 
 import numpy as np
-from htm.bindings.encoders import ScalarEncoder, ScalarEncoderParameters
-
-from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
-from htm.advanced.support.register_regions import registerAllAdvancedRegions
 
-from utilities import (
-    isNotebook,
-    plotEnvironment,
-    plotSensations)
+# htm.core, matplotlib and pandaBaker are imported only where they are used, so processes which
+# don't plot or bake (e.g. workers, see cli.py) start fast
 
 logging.basicConfig(level=logging.WARN)
 
@@ -58,6 +49,67 @@ _OBJECTS_DIR = os.path.join(_EXEC_DIR, os.path.pardir, "objects")
 
 PLOT_LEARN_SEQUENCE = False
 PLOT_INFER_SEQUENCE = False
+# render plots without GUI into files instead of showing them, much faster for long streams
+HEADLESS_RENDER = False
+HEADLESS_RENDER_DIR = os.path.join(_EXEC_DIR, "frames")
+HEADLESS_RENDER_FORMAT = "png"  # "png" for sequence of images, "gif" for animation
+# show live state of the network in separate viewer process, does not slow down the computation
+LIVE_VIEW = False
+
+# "json" - stats.json with stats of the last object, "columnar" - compact store of all objects in stats/
+# (see experimentFramework.statsStore), "columnar" records also raw L2 overlaps for offline threshold tuning
+STATS_FORMAT = "json"
+
+# numbers of sensations to evaluate from one long inference stream per object, None to skip
+# (see Experiment.inferAnytime)
+ANYTIME_BUDGETS = None  # e.g. [5, 10, 20, 40]
+ANYTIME_ORDERS = 3  # shuffled orders of each stream, inferred in the same pass
+
+# number of random trajectories of each object inferred in parallel worker processes from
+# checkpoint of the trained network, None to skip (see parallelEvaluation)
+PARALLEL_EVAL_SAMPLES = None
+CHECKPOINT_DIR = os.path.join(_EXEC_DIR, "checkpoint")
+# "htm" - htm.core network, "numpy" - fast surrogate network without htm.core, for testing of the
+# pipeline and measuring of its overhead, recognition results are not comparable with htm
+# (see l2l4l6Framework.surrogateNetwork)
+NETWORK_BACKEND = "htm"
+# region type of some layers instead of the default Python regions, e.g. {"L4": "TMRegion"}
+# (see l2l4l6Framework.regionRegistry), None for the default selection
+REGION_IMPLEMENTATIONS = None
+# number of worker processes computing the columns in parallel, same results as serial network
+# (see l2l4l6Framework.columnParallelNetwork), None to compute all columns in this process
+COLUMN_PROCESSES = None
+
+# stats (and checkpoints if RESULT_CACHE_CHECKPOINTS) of runs are stored here, runs with the same
+# parameters, objects and code are then not computed again (see experimentFramework.resultCache)
+RESULT_CACHE_DIR = None  # e.g. os.path.join(_EXEC_DIR, "resultCache")
+RESULT_CACHE_MAX_BYTES = 10 * 2 ** 30
+RESULT_CACHE_CHECKPOINTS = True
+
+# generated sensation streams are stored here, later runs with the same objects, seed and sampler
+# read them memory-mapped instead of generating (see experimentFramework.streamCache), None to generate always
+STREAM_CACHE_DIR = None  # e.g. os.path.join(_EXEC_DIR, "streamCache")
+
+LEARNED_OBJECTS = ["cup", "palmpilot", "a", "b", "boat"]  # ["simple1", "simple2", "simple3"]
+
+# activity counts published for each column, see activityCounts()
+ACTIVITY_STREAMS = ["L2ActiveCellCnt_", "L4PredictedCellCnt_", "L4ActiveCellCnt_", "L6ActiveCellCnt_"]
+
+_regionsRegistered = False
+
+
+def registerRegions():
+    """
+    Registers advanced htm regions, needed before any network is created or loaded.
+    """
+    global _regionsRegistered
+    if NETWORK_BACKEND == "numpy":
+        return  # surrogate network has no htm regions
+    if not _regionsRegistered:
+        from htm.advanced.support.register_regions import registerAllAdvancedRegions
+        registerAllAdvancedRegions()
+        _regionsRegistered = True
+
 
 class Experiment:
 
@@ -69,9 +121,15 @@ class Experiment:
         self.agent.set_objectSpace(self.objSpace, 0, 0)
         self.learnedObjects = {}
 
-        self.bakePandaData = False # bake or not data for PandaVis
+        self.bakePandaData = False # bake or not data for PandaVis, pandaBaker network is used only if True
+        self.bakeEveryNth = 1 # bake only every Nth sensation
+        self.bakeStreams = None # names of dash plot streams to bake (see ACTIVITY_STREAMS), None for all
 
         self.fig_environment = None
+        self.renderer = None  # FrameRenderer for HEADLESS_RENDER
+        self.liveView = None  # LiveView for LIVE_VIEW
+        self.liveObject = None  # object currently shown in live view
+        self.network = None
 
 
     def loadObject(self, objectFilename):  # loads object into object space
@@ -165,13 +223,20 @@ class Experiment:
 
     def CreateSensationStream_sensations(self,sensorDirection, n, w, positionStream):
         stream = []
-        # Create scalar encoder to encode features
-        p = ScalarEncoderParameters()
-        p.size = n
-        p.activeBits = w
-        p.minimum = 0
-        p.maximum = 1
-        encoder = ScalarEncoder(p)
+        if NETWORK_BACKEND == "numpy":
+            from l2l4l6Framework.surrogateNetwork import encodeScalar
+            encode = lambda value: encodeScalar(value, n, w, 0, 1)
+        else:
+            from htm.bindings.encoders import ScalarEncoder, ScalarEncoderParameters
+
+            # Create scalar encoder to encode features
+            p = ScalarEncoderParameters()
+            p.size = n
+            p.activeBits = w
+            p.minimum = 0
+            p.maximum = 1
+            encoder = ScalarEncoder(p)
+            encode = lambda value: list(encoder.encode(value).sparse)
 
         x = positionStream[:,0]
         y = positionStream[:,1]
@@ -180,20 +245,100 @@ class Experiment:
             self.agent.move(x[i], y[i])
             f = self.agent.get_feature(sensorDirection)
             feature = (('X', 'Y').index(f)+1) if f is not None else 0
-            stream.append(([x[i], y[i]], list(encoder.encode(feature).sparse)))
+            stream.append(([x[i], y[i]], encode(feature)))
         return stream
 
 
-    def learn(self, params, repetition):
+    def learn(self, params, repetition, objects=None):
         """
         Take the steps necessary to reset the experiment before each repetition:
             - Make sure random seed is different for each repetition
             - Create the L2-L4-L6a network
             - Load objects used by the experiment
             - Learn all objects used by the experiment
+
+        :param objects: names of objects to learn, LEARNED_OBJECTS by default
         """
         print(params["name"], ":", repetition)
         self.debug = params.get("debug", False)
+        seed = self.configure(params, repetition)
+
+        L2Params = params["l2_params"]
+        L4Params = params["l4_params"]
+        L6aParams = params["l6a_params"]
+
+        # Create four column L2-L4-L6a network
+        registerRegions()
+        from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
+
+        if self.network is not None and hasattr(self.network, "close"):
+            self.network.close()  # workers of the previous repetition
+
+        if NETWORK_BACKEND == "numpy":
+            self.network = L2_L4_L6_Network(numColumns=4,
+                                        L2Params=L2Params,
+                                        L4Params=L4Params,
+                                        L6aParams=L6aParams,
+                                        repeat=self.numLearningPoints,
+                                        backend="numpy")
+        elif COLUMN_PROCESSES and not self.bakePandaData:
+            from l2l4l6Framework.columnParallelNetwork import ColumnParallelNetwork
+            self.network = ColumnParallelNetwork(numColumns=4,
+                                                 L2Params=L2Params,
+                                                 L4Params=L4Params,
+                                                 L6aParams=L6aParams,
+                                                 repeat=self.numLearningPoints,
+                                                 processes=COLUMN_PROCESSES,
+                                                 regionImplementations=REGION_IMPLEMENTATIONS)
+        else:
+            self.network = L2_L4_L6_Network(numColumns=4,
+                                        L2Params=L2Params,
+                                        L4Params=L4Params,
+                                        L6aParams=L6aParams,
+                                        repeat=self.numLearningPoints,
+                                        logCalls=self.debug,
+                                        backend="pandaVis" if self.bakePandaData else "htm",
+                                        regionImplementations=REGION_IMPLEMENTATIONS)
+
+        if self.bakePandaData:
+            # pandaBaker network bakes synchronously inside its run(), reading outputs and synapses
+            # of all regions straight from the htm.core network. Unlike the SP/TM of old_experiment
+            # (see asyncBaker), the regions can't be copied per iteration without serializing the
+            # whole network, and reading them from another thread while the network computes is
+            # not safe, so it is not baked by AsyncBaker - bake only every Nth sensation (bakeEveryNth)
+            # and selected streams (bakeStreams) to make it faster.
+
+            # data for dash plots
+            self.network.network.updateDataStreams = self.updateDataStreams
+            self.network.network.bakePandaData = self.bakePandaData # bake or not bake pandaData
+
+        if LIVE_VIEW:
+            self.startLiveView()
+        if LIVE_VIEW or (self.bakePandaData and self.bakeEveryNth > 1):
+            self.network.onSensation = self.onSensation
+
+        self.createSensations(seed + repetition, objects)
+
+        streamForAllColumns = {}
+        for obj in self.learnedObjectNames:
+            streamForAllColumns[obj] = [self.sensations[obj][0], self.sensations[obj][1],
+                                            self.sensations[obj][2], self.sensations[obj][3]] # we are feeding now just for one column
+
+            if PLOT_LEARN_SEQUENCE:
+                self.loadObject(obj)
+                self.plotStream(self.sensations[obj][0], name=obj)
+
+        # Learn objects
+        self.liveStreams = self.sensations
+        self.network.learn(streamForAllColumns)
+
+    def configure(self, params, repetition):
+        """
+        Seeds random generators and completes region parameters of the repetition in params
+        (seeds, L6a modules), as used by learn().
+
+        :return: base seed of the parameters
+        """
         self.numLearningPoints = params["num_learning_points"]
         self.numOfSensations = params["num_sensations"]
 
@@ -220,56 +365,148 @@ class Experiment:
         orientation = list(range(angle // 2, angle * numModules, angle))
         L6aParams["orientation"] = np.radians(orientation).tolist()
         L6aParams["cellsPerAxis"] = params["cells_per_axis"]
+        return seed
 
-        # Create four column L2-L4-L6a network
-        self.network = L2_L4_L6_Network(numColumns=4,
-                                    L2Params=L2Params,
-                                    L4Params=L4Params,
-                                    L6aParams=L6aParams,
-                                    repeat=self.numLearningPoints,
-                                    logCalls=self.debug)
-
-        # data for dash plots
-        self.network.network.updateDataStreams = self.updateDataStreams
-        self.network.network.bakePandaData = self.bakePandaData # bake or not bake pandaData
+    def createSensations(self, seed, objects=None):
+        """
+        Creates sensation streams of the objects for all four columns into self.sensations,
+        or reads them from STREAM_CACHE_DIR. Parameters must be set by configure().
 
-        sampleSize = L4Params["sampleSize"]
-        columnCount = L4Params["columnCount"]
+        :param seed: seed of the repetition, part of the stream cache key
+        :param objects: names of the objects, LEARNED_OBJECTS by default
+        """
+        sampleSize = self.L4Params["sampleSize"]
+        columnCount = self.L4Params["columnCount"]
 
         # Make sure w is odd per encoder requirement
         sampleSize = sampleSize if sampleSize % 2 != 0 else sampleSize + 1
 
         # Load objects
-        self.learnedObjectNames = ["cup", "palmpilot", "a", "b", "boat"]#["simple1", "simple2", "simple3"]
-
-
-        streamForAllColumns = {}
-        self.sensations = {}
-        for obj in self.learnedObjectNames:
-            self.loadObject(obj) # loads object into object space
-            self.sensations[obj] = {}
-
-            posStream = self.CreateSensationStream_positions(type="pick_percent", sparsity= self.numOfSensations / (self.objectSpaceSize*self.objectSpaceSize) , featurePerc=0.5)
+        self.learnedObjectNames = list(objects or LEARNED_OBJECTS)
+
+        streamCache = None
+        cached = None
+        if STREAM_CACHE_DIR is not None:
+            from experimentFramework.streamCache import StreamCache
+            streamCache = StreamCache(STREAM_CACHE_DIR)
+            streamKey = self.streamKey(seed, columnCount, sampleSize)
+            cached = streamCache.load(streamKey)
+
+        if cached is not None:
+            self.sensations, rngState = cached
+            np.random.set_state(rngState)  # as if the streams were generated
+        else:
+            self.sensations = {}
+            for obj in self.learnedObjectNames:
+                self.loadObject(obj) # loads object into object space
+                self.sensations[obj] = {}
+
+                posStream = self.CreateSensationStream_positions(type="pick_percent", sparsity= self.numOfSensations / (self.objectSpaceSize*self.objectSpaceSize) , featurePerc=0.5)
+
+                self.sensations[obj][0] = self.CreateSensationStream_sensations(sensorDirection = Direction.UP,
+                                                            w=sampleSize, n=columnCount, positionStream=posStream)
+                self.sensations[obj][1] = self.CreateSensationStream_sensations(sensorDirection=Direction.DOWN,
+                                                             w=sampleSize, n=columnCount, positionStream=posStream)
+                self.sensations[obj][2] = self.CreateSensationStream_sensations(sensorDirection=Direction.LEFT,
+                                                             w=sampleSize, n=columnCount, positionStream=posStream)
+                self.sensations[obj][3] = self.CreateSensationStream_sensations(sensorDirection=Direction.RIGHT,
+                                                             w=sampleSize, n=columnCount, positionStream=posStream)
+
+            if streamCache is not None:
+                streamCache.store(streamKey, self.sensations, np.random.get_state())
+
+    def streamKey(self, seed, n, w):
+        """
+        Returns key of sensation streams generated by learn(), for StreamCache.
+        """
+        import inspect
+        from experimentFramework.resultCache import canonicalKey, filesDigest
+
+        objectFiles = [os.path.join(_OBJECTS_DIR, obj + ".yml") for obj in self.learnedObjectNames]
+        methods = [self.CreateSensationStream_positions, self.CreateSensationStream_sensations, agent.Agent]
+        return canonicalKey(objects=self.learnedObjectNames,
+                            objectFiles=filesDigest(objectFiles),
+                            seed=seed,
+                            sampler={"objectSpaceSize": self.objectSpaceSize, "type": "pick_percent",
+                                     "sparsity": self.numOfSensations / (self.objectSpaceSize * self.objectSpaceSize),
+                                     "featurePerc": 0.5},
+                            encoder={"n": n, "w": w, "backend": NETWORK_BACKEND},
+                            code=[inspect.getsource(m) for m in methods])
+
+    def resultKey(self, params, repetition, objects=LEARNED_OBJECTS, **settings):
+        """
+        Returns key of results of learn(params, repetition) and inference, for ResultCache.
+        Key covers parameters, contents of the object files, sensation sampling and the code
+        computing the results, but not the analysis code.
 
-            self.sensations[obj][0] = self.CreateSensationStream_sensations(sensorDirection = Direction.UP,
-                                                        w=sampleSize, n=columnCount, positionStream=posStream)
-            self.sensations[obj][1] = self.CreateSensationStream_sensations(sensorDirection=Direction.DOWN,
-                                                         w=sampleSize, n=columnCount, positionStream=posStream)
-            self.sensations[obj][2] = self.CreateSensationStream_sensations(sensorDirection=Direction.LEFT,
-                                                         w=sampleSize, n=columnCount, positionStream=posStream)
-            self.sensations[obj][3] = self.CreateSensationStream_sensations(sensorDirection=Direction.RIGHT,
-                                                         w=sampleSize, n=columnCount, positionStream=posStream)
+        :param objects: names of learned and inferred objects
+        :param settings: other settings which change the results
+        """
+        import inspect
+        from experimentFramework.resultCache import canonicalKey, filesDigest
+
+        objectFiles = [os.path.join(_OBJECTS_DIR, obj + ".yml") for obj in objects]
+        sources = glob.glob(os.path.join(_EXEC_DIR, "l2l4l6Framework", "*.py")) + [
+            objectSpace.__file__, agent.__file__]
+        methods = [self.learn, self.configure, self.createSensations, self.infer, self.loadObject,
+                   self.CreateSensationStream_positions, self.CreateSensationStream_sensations]
+        try:
+            from importlib.metadata import version
+            htmVersion = version("htm.core")
+        except Exception:
+            htmVersion = None
+
+        return canonicalKey(params=params,
+                            seed=params.get("seed", 42) + repetition,
+                            repetition=repetition,
+                            objects=list(objects),
+                            objectFiles=filesDigest(objectFiles),
+                            sampler={"objectSpaceSize": self.objectSpaceSize, "type": "pick_percent",
+                                     "featurePerc": 0.5},
+                            code=filesDigest(sources),
+                            methods=[inspect.getsource(m) for m in methods],
+                            htm=htmVersion,
+                            backend=NETWORK_BACKEND,
+                            **settings)
+
+    def loadCheckpoint(self, params, path):
+        """
+        Loads network trained by learn() and saved by L2_L4_L6_Network.save, instead of learning.
+        Learned sensation streams are not part of checkpoint, infer with inferAnytime or createInferStream.
+        """
+        registerRegions()
+        from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
 
-            streamForAllColumns[obj] = [self.sensations[obj][0], self.sensations[obj][1],
-                                            self.sensations[obj][2], self.sensations[obj][3]] # we are feeding now just for one column
+        self.numLearningPoints = params["num_learning_points"]
+        self.numOfSensations = params["num_sensations"]
+        self.L4Params = params["l4_params"]
+        self.sdrSize = params["l2_params"]["sdrSize"]
+
+        self.network = L2_L4_L6_Network.load(path)
+        self.learnedObjectNames = list(self.network.learnedObjects)
+
+    def getRenderer(self):
+        if self.renderer is None:
+            from frameRenderer import FrameRenderer
+            self.renderer = FrameRenderer(self.objSpace.width, self.objSpace.height)
+        return self.renderer
+
+    def writeRenderedFrames(self, name):
+        if HEADLESS_RENDER_FORMAT == "gif":
+            os.makedirs(HEADLESS_RENDER_DIR, exist_ok=True)
+            self.renderer.writeAnimation(os.path.join(HEADLESS_RENDER_DIR, name + ".gif"))
+        else:
+            self.renderer.writePNGs(HEADLESS_RENDER_DIR, prefix=name)
 
-            if PLOT_LEARN_SEQUENCE:
-                self.plotStream(self.sensations[obj][0])
+    def plotStream(self, stream, name="stream"):
 
-        # Learn objects
-        self.network.learn(streamForAllColumns)
+        if HEADLESS_RENDER:
+            self.getRenderer().addEnvironmentFrames(self.objSpace, [s[0] for s in stream])
+            self.writeRenderedFrames(name)
+            return
 
-    def plotStream(self, stream):
+        import matplotlib.pyplot as plt
+        from utilities import isNotebook, plotEnvironment
 
         for s in stream:
             # Plotting and visualising environment-------------------------------------------
@@ -286,14 +523,55 @@ class Experiment:
             plt.show(block=False)
             plt.pause(0.001)  # delay is needed for proper redraw
 
+    def activityCounts(self):
+        """
+        Returns number of active cells for each of ACTIVITY_STREAMS, column by column.
+        """
+        L2 = self.network.getL2Representations()
+        L4Predicted = self.network.getL4PredictedCells()
+        L4 = self.network.getL4Representations()
+        L6 = self.network.getL6aRepresentations()
+
+        values = []
+        for col in range(self.network.numColumns):
+            values += [len(L2[col]), len(L4Predicted[col]), len(L4[col]), len(L6[col])]
+        return values
+
     def updateDataStreams(self):
 
-        # for first column
-        for col in [0, 1, 2, 3]:
-            self.network.network.UpdateDataStream("L2ActiveCellCnt_"+str(col), len(self.network.getL2Representations()[col]))
-            self.network.network.UpdateDataStream("L4PredictedCellCnt_"+str(col), len(self.network.getL4PredictedCells()[col]))
-            self.network.network.UpdateDataStream("L4ActiveCellCnt_"+str(col), len(self.network.getL4Representations()[col]))
-            self.network.network.UpdateDataStream("L6ActiveCellCnt_"+str(col), len(self.network.getL6aRepresentations()[col]))
+        names = [name + str(col) for col in range(self.network.numColumns) for name in ACTIVITY_STREAMS]
+        for name, value in zip(names, self.activityCounts()):
+            if self.bakeStreams is None or name in self.bakeStreams:
+                self.network.network.UpdateDataStream(name, value)
+
+    def onSensation(self, objectName, sensation):  # called by network after each computed sensation
+        if self.liveView is not None:
+            self.publishLiveView(objectName, sensation)
+
+        if self.bakePandaData and self.bakeEveryNth > 1:
+            # bake the next sensation only if it is the Nth one
+            self.network.network.bakePandaData = (sensation + 1) % self.bakeEveryNth == 0
+
+    def startLiveView(self):
+        from liveView import LiveView
+
+        if self.liveView is None:
+            names = [name + str(col) for col in range(self.network.numColumns) for name in ACTIVITY_STREAMS]
+            self.liveView = LiveView(self.objSpace.width, self.objSpace.height, names)
+
+    def publishLiveView(self, objectName, sensation):
+        if objectName != self.liveObject:
+            self.loadObject(objectName)
+            self.liveView.publishObject(self.objSpace)
+            self.liveObject = objectName
+
+        position = self.liveStreams[objectName][0][sensation][0]
+        self.liveView.publish(self.network.iteration, position, self.activityCounts())
+
+    def closeLiveView(self):
+        if self.liveView is not None:
+            self.liveView.close()
+            self.liveView = None
 
     def infer(self, objectName):
         """
@@ -340,6 +618,7 @@ class Experiment:
 
 
         self.inferSensations = self.sensations # learned sensations are identical with inferring sensations
+        self.liveStreams = self.inferSensations
 
         # Collect all statistics for every inference.
         # See L246aNetwork._updateInferenceStats
@@ -349,9 +628,63 @@ class Experiment:
 
         return stats
 
+    def inferAnytime(self, objectName, maxSensations, orders=1):
+        """
+        Infers one long stream of the object, so accuracy for every smaller number of sensations
+        can be evaluated from it (see experimentFramework.anytimeEvaluation). With more orders,
+        the stream positions are shuffled differently for each of them and all orders are
+        inferred in one pass, with reset between them.
+
+        :param objectName: Object name to infer
+        :param maxSensations: length of the stream, the largest evaluated number of sensations
+        :param orders: number of shuffled orders of the stream
+        :return: list of stats, one for each order
+        """
+        streams = self.createInferStream(objectName, maxSensations, orders)
+        self.liveStreams = {objectName: streams}
+
+        runLength = len(streams[0]) // orders
+        stats = defaultdict(list)
+        self.network.infer(sensations=streams, stats=stats, objname=objectName, resetEvery=runLength)
+        stats.update({"name": objectName})
+
+        return splitRuns(stats, runLength)
+
+    def createInferStream(self, objectName, numSensations, orders=1):
+        """
+        Creates new random sensation stream of the object for all four columns. With more
+        orders, the same positions are repeated in different shuffled order.
+
+        :return: list of streams, one for each column
+        """
+        sampleSize = self.L4Params["sampleSize"]
+        sampleSize = sampleSize if sampleSize % 2 != 0 else sampleSize + 1
+        columnCount = self.L4Params["columnCount"]
+
+        self.loadObject(objectName)
+        posStream = self.CreateSensationStream_positions(type="pick_percent",
+                                                         sparsity=numSensations / (self.objectSpaceSize * self.objectSpaceSize),
+                                                         featurePerc=0.5)
+        posStream = np.concatenate([posStream[np.random.permutation(len(posStream))] for _ in range(orders)])
+
+        return [self.CreateSensationStream_sensations(sensorDirection=direction, w=sampleSize, n=columnCount,
+                                                      positionStream=posStream)
+                for direction in [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]]
+
     def PlotSensations(self, obj):
         self.loadObject(obj)
 
+        s1 = [x[0] for x in self.sensations[obj][0]]
+        s2 = [x[0] for x in self.inferSensations[obj][0]]
+
+        if HEADLESS_RENDER:
+            self.getRenderer().addSensationsFrame(self.objSpace, s1, s2)
+            self.writeRenderedFrames("sensations_" + obj)
+            return
+
+        import matplotlib.pyplot as plt
+        from utilities import isNotebook, plotSensations
+
         # Plotting and visualising environment-------------------------------------------
         if (
                 self.fig_environment == None or isNotebook()
@@ -360,39 +693,116 @@ class Experiment:
         else:
             self.fig_environment.axes[0].clear()
 
-        s1 = [x[0] for x in self.sensations[obj][0]]
-        s2 = [x[0] for x in self.inferSensations[obj][0]]
-
         plotSensations(self.fig_environment.axes[0], "Sensations", self.objSpace, s1, s2)
         self.fig_environment.canvas.draw()
 
         plt.show(block=True)
 
 
+def runRepetition(params, repetition, objects=None, objectSpaceSize=20):
+    """
+    Learns objects and infers each of them once, e.g. as a job of experimentFramework.jobQueue.
+    Stats of the runs are folded into StatsAggregator, so results of many repetitions are merged
+    without keeping per step lists of every run (see cli.py collect).
+
+    :return: state of StatsAggregator of the objects' inference stats
+    """
+    from experimentFramework.statsAggregator import StatsAggregator
+
+    registerRegions()
+    experiment = Experiment(objectSpaceSize=objectSpaceSize)
+    experiment.learn(params, repetition, objects=objects)
+    aggregator = StatsAggregator()
+    for obj in experiment.learnedObjectNames:
+        aggregator.add(experiment.infer(objectName=obj), objectName=obj)
+    return aggregator.state()
+
+
 if __name__ == "__main__":
-    registerAllAdvancedRegions()
+    registerRegions()
 
     with open("parameters.cfg", "r") as f:
         parameters = eval(f.read())
 
     experiment = Experiment(objectSpaceSize=20) # "map size" - adjust to fit objects into object space
 
-    experiment.learn(parameters, 0)
+    # raw overlaps, thresholds can be evaluated later by experimentFramework.overlapEvaluation
+    recordOverlaps = STATS_FORMAT == "columnar"
+
+    cache = None
+    allStats = None
+    if RESULT_CACHE_DIR is not None:
+        from experimentFramework.resultCache import ResultCache
+        cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES)
+        cacheKey = experiment.resultKey(parameters, 0, recordOverlaps=recordOverlaps)
+        allStats = cache.get(cacheKey)
+
+    learned = allStats is None
+    if allStats is not None:
+        print("Results loaded from cache")
+        if ANYTIME_BUDGETS is not None or PARALLEL_EVAL_SAMPLES is not None:
+            # these need the trained network
+            if cache.checkpointPath(cacheKey) is not None:
+                experiment.loadCheckpoint(parameters, cache.checkpointPath(cacheKey))
+            else:
+                experiment.learn(parameters, 0)
+                learned = True
+    else:
+        experiment.learn(parameters, 0)
+
+        print("Learning done, begin inferring")
 
-    print("Learning done, begin inferring")
+        experiment.network.recordOverlaps = recordOverlaps
+        allStats = [experiment.infer(objectName=obj) for obj in LEARNED_OBJECTS]
 
-    for obj in ["cup", "palmpilot", "a", "b", "boat"]:
-        stats = experiment.infer(objectName=obj)
+        if cache is not None:
+            cache.put(cacheKey, allStats, experiment.network.save if RESULT_CACHE_CHECKPOINTS else None)
 
+    for stats in allStats:
         if 1 in stats['Correct classification']:
             print("Correctly classified!!")
 
-    printedStats = json.dumps(stats, indent=4)
-    with open("stats.json", "w") as f:
-        f.write(printedStats)
-
-
-    experiment.PlotSensations('boat')
+    if ANYTIME_BUDGETS is not None:
+        anytime = AnytimeEvaluator(ANYTIME_BUDGETS, experiment.learnedObjectNames)
+        for obj in experiment.learnedObjectNames:
+            for runStats in experiment.inferAnytime(obj, max(ANYTIME_BUDGETS), orders=ANYTIME_ORDERS):
+                anytime.add(runStats)
+
+        for budget, result in anytime.summary().items():
+            print("Sensations: " + str(budget) + ", accuracy: " + str(result["accuracy"])
+                  + ", final accuracy: " + str(result["final accuracy"]))
+        with open("anytime.json", "w") as f:
+            f.write(json.dumps(anytime.summary(), indent=4))
+
+    if PARALLEL_EVAL_SAMPLES is not None:
+        from parallelEvaluation import ParallelEvaluator
+
+        experiment.network.save(CHECKPOINT_DIR)
+        streams = {obj: [experiment.createInferStream(obj, experiment.numOfSensations)
+                         for _ in range(PARALLEL_EVAL_SAMPLES)]
+                   for obj in experiment.learnedObjectNames}
+        # forked workers share the trained network, the checkpoint is loaded only where fork is not available
+        results = ParallelEvaluator(CHECKPOINT_DIR, network=experiment.network).evaluate(streams)
+
+        print("Library accuracy: " + str(results.accuracy()))
+        with open("library_evaluation.json", "w") as f:
+            f.write(json.dumps(results.summary(), indent=4))
+
+    experiment.closeLiveView()
+
+    if STATS_FORMAT == "columnar":
+        from experimentFramework.statsStore import StatsWriter
+        with StatsWriter("stats") as statsWriter:
+            for stats in allStats:
+                statsWriter.writeRun(stats)
+    else:
+        printedStats = json.dumps(allStats[-1], indent=4)
+        with open("stats.json", "w") as f:
+            f.write(printedStats)
+
+
+    if learned:
+        experiment.PlotSensations('boat')
 
 
 
@@ -0,0 +1,99 @@
+# Anytime evaluation - accuracy for several sensation budgets from one inference pass
+#
+# Inference stats are recorded at every step, so the result after the first N sensations
+# of a long stream is the same as the result of a run with N sensations. One run with the
+# largest budget therefore answers every smaller budget as well.
+import numpy as np
+
+NONE = "none"  # predicted label when no object or more objects are classified
+
+
+def splitRuns(stats, runLength):
+    """
+    Splits stats of inference over concatenated streams (see L2_L4_L6_Network.infer, resetEvery)
+    into stats of the individual runs.
+    """
+    runs = []
+    steps = max(len(v) for k, v in stats.items() if k != "name")
+    for start in range(0, steps, runLength):
+        run = {k: list(v[start:start + runLength]) for k, v in stats.items() if k != "name"}
+        run["name"] = stats.get("name")
+        runs.append(run)
+    return runs
+
+
+def predictedObject(classification):
+    """
+    Returns the object with score 1 in "Actual classification" (see getCurrentClassification),
+    NONE if no object or more objects have it.
+    """
+    classified = [name for name, score in classification.items() if score >= 1.0]
+    return classified[0] if len(classified) == 1 else NONE
+
+
+class AnytimeEvaluator:
+    """
+    Accumulates accuracy and confusion of inference runs for each sensation budget.
+
+    :param budgets: numbers of sensations to evaluate, e.g. [5, 10, 20, 40]
+    :param objectNames: names of the learned objects
+    """
+
+    def __init__(self, budgets, objectNames):
+        self.budgets = sorted(budgets)
+        self.objectNames = list(objectNames)
+        self.labels = self.objectNames + [NONE]
+
+        self.runs = np.zeros(len(self.budgets), dtype=np.int64)  # runs long enough for the budget
+        self.recognized = np.zeros(len(self.budgets), dtype=np.int64)
+        self.stepsToRecognition = []  # first step (1-based) with correct classification, -1 if none
+        self.confusion = np.zeros((len(self.budgets), len(self.objectNames), len(self.labels)), dtype=np.int64)
+
+    def add(self, stats, objectName=None):
+        """
+        Adds stats of one inference run (dict of lists, see Experiment.infer).
+        """
+        objectName = objectName if objectName is not None else stats["name"]
+        true = self.objectNames.index(objectName)
+        correct = np.asarray(stats["Correct classification"]) > 0
+        classification = stats["Actual classification"]
+
+        # number of correct steps within each budget, from one cumulative sum
+        correctSoFar = np.cumsum(correct)
+        first = int(correct.argmax()) + 1 if correct.any() else -1
+        self.stepsToRecognition.append(first)
+
+        for b, budget in enumerate(self.budgets):
+            if budget > len(correct):
+                break
+            self.runs[b] += 1
+            self.recognized[b] += correctSoFar[budget - 1] > 0
+            predicted = self.labels.index(predictedObject(classification[budget - 1]))
+            self.confusion[b, true, predicted] += 1
+
+    def accuracy(self):
+        """
+        Fraction of runs where the object was correctly classified within the budget,
+        same as "1 in stats['Correct classification']" of a run with that many sensations.
+        """
+        with np.errstate(invalid="ignore"):
+            return self.recognized / self.runs
+
+    def finalAccuracy(self):
+        """
+        Fraction of runs where the object is the only one classified after the last sensation of the budget.
+        """
+        diagonal = self.confusion[:, np.arange(len(self.objectNames)), np.arange(len(self.objectNames))]
+        with np.errstate(invalid="ignore"):
+            return diagonal.sum(axis=1) / self.runs
+
+    def summary(self):
+        return {
+            budget: {
+                "runs": int(self.runs[b]),
+                "accuracy": float(self.accuracy()[b]),
+                "final accuracy": float(self.finalAccuracy()[b]),
+                "confusion": self.confusion[b].tolist(),
+            }
+            for b, budget in enumerate(self.budgets)
+        }
@@ -0,0 +1,282 @@
+# Job queue on a shared directory (e.g. NFS mount), without any scheduler or service
+#
+# Every job is a JSON file which moves between subdirectories of the queue:
+#   - "pending/<id>.json" - waiting for a worker
+#   - "running/<id>.json" - claimed by a worker, its modification time is the last heartbeat
+#   - "done/<id>.json", "failed/<id>.json" - finished, failed more than maxAttempts times
+#   - "results/<id>.pkl" - pickled return value of the job
+# Workers claim jobs by renaming them from pending to running, rename is atomic also on NFS,
+# so exactly one worker gets each job. Running jobs without heartbeat for longer than the lease
+# (crashed worker or host) are moved back to pending by any other worker and retried.
+# Leases compare modification times with clocks of the hosts, so they should be much longer
+# than the clock difference of the hosts.
+import importlib
+import json
+import os
+import pickle
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+RESULTS = "results"
+STATES = [PENDING, RUNNING, DONE, FAILED]
+
+
+def workerName():
+    return socket.gethostname() + "-" + str(os.getpid())
+
+
+def resolveFunction(name):
+    """
+    Returns function from "module:function" name, e.g. "experiment1:runRepetition".
+    """
+    module, _, function = name.partition(":")
+    if not function:
+        raise RuntimeError("Job function '" + name + "' should be 'module:function'")
+    return getattr(importlib.import_module(module), function)
+
+
+class JobQueue:
+    """
+    :param directory: shared directory of the queue, the same path on all hosts
+    :param lease: seconds without heartbeat after which a running job is considered lost
+    :param maxAttempts: job is moved to failed after so many lost or failed attempts
+    """
+
+    def __init__(self, directory, lease=300.0, maxAttempts=3):
+        self.directory = directory
+        self.lease = lease
+        self.maxAttempts = maxAttempts
+        for state in STATES + [RESULTS]:
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def _path(self, state, jobId):
+        return os.path.join(self.directory, state, jobId + ".json")
+
+    def resultPath(self, jobId):
+        return os.path.join(self.directory, RESULTS, jobId + ".pkl")
+
+    def _write(self, path, data, binary=False):
+        # other hosts see either nothing or the whole file
+        tmp = path + "." + workerName() + ".tmp"
+        with open(tmp, "wb" if binary else "w") as f:
+            if binary:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _read(self, path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def ids(self, state):
+        return sorted(name[:-len(".json")] for name in os.listdir(os.path.join(self.directory, state))
+                      if name.endswith(".json"))
+
+    def status(self):
+        """
+        Returns dict state -> number of jobs.
+        """
+        return {state: len(self.ids(state)) for state in STATES}
+
+    def state(self, jobId):
+        for state in STATES:
+            if os.path.exists(self._path(state, jobId)):
+                return state
+        return None
+
+    def submit(self, function, args=(), kwargs=None, jobId=None):
+        """
+        Adds job calling function(*args, **kwargs), arguments must be JSON serializable.
+        Job with the same id is submitted only once, so a sweep can be submitted again after
+        a crash, e.g. with canonicalKey of the arguments as the id.
+
+        :param function: "module:function", imported by the worker
+        :return: job id
+        """
+        jobId = jobId or uuid.uuid4().hex
+        if self.state(jobId) is not None:
+            return jobId
+        job = {"id": jobId, "function": function, "args": list(args), "kwargs": kwargs or {},
+               "attempts": 0, "errors": []}
+        self._write(self._path(PENDING, jobId), job)
+        return jobId
+
+    def claim(self, worker=None):
+        """
+        Returns the first pending job moved to running, None if there is none.
+        """
+        for jobId in self.ids(PENDING):
+            pending = self._path(PENDING, jobId)
+            running = self._path(RUNNING, jobId)
+            try:
+                os.utime(pending)  # claimed job starts with fresh heartbeat
+                os.rename(pending, running)
+            except FileNotFoundError:  # claimed by other worker
+                continue
+
+            job = self._read(running)
+            if os.path.exists(self.resultPath(jobId)):  # finished by worker whose lease expired
+                self._finish(job, DONE)
+                continue
+            job["attempts"] += 1
+            job["worker"] = worker or workerName()
+            self._write(running, job)
+            return job
+        return None
+
+    def heartbeat(self, job):
+        """
+        Extends the lease of the running job.
+
+        :return: False if the lease was lost (job was moved back to pending)
+        """
+        try:
+            os.utime(self._path(RUNNING, job["id"]))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _finish(self, job, state):
+        try:
+            os.rename(self._path(RUNNING, job["id"]), self._path(state, job["id"]))
+        except FileNotFoundError:  # lease expired meanwhile, claim() completes it again
+            return
+        self._write(self._path(state, job["id"]), job)
+
+    def complete(self, job, result):
+        self._write(self.resultPath(job["id"]), result, binary=True)
+        self._finish(job, DONE)
+
+    def fail(self, job, error):
+        """
+        Records the error, job is retried until it fails maxAttempts times.
+        """
+        job["errors"].append(error)
+        if job["attempts"] >= self.maxAttempts:
+            self._finish(job, FAILED)
+        else:
+            self._requeue(job)
+
+    def _requeue(self, job):
+        running = self._path(RUNNING, job["id"])
+        reaping = running + "." + workerName() + ".reaping"
+        try:
+            os.rename(running, reaping)  # only one worker requeues the job
+        except FileNotFoundError:
+            return False
+        self._write(self._path(PENDING, job["id"]), job)
+        os.remove(reaping)
+        return True
+
+    def requeueExpired(self, now=None):
+        """
+        Moves running jobs without heartbeat for longer than the lease back to pending
+        (or to failed after maxAttempts).
+
+        :return: ids of the requeued jobs
+        """
+        now = time.time() if now is None else now
+        requeued = []
+        for jobId in self.ids(RUNNING):
+            path = self._path(RUNNING, jobId)
+            try:
+                if now - os.path.getmtime(path) <= self.lease:
+                    continue
+                job = self._read(path)
+            except FileNotFoundError:
+                continue
+            job["errors"].append("Lease of worker " + str(job.get("worker")) + " expired")
+            if job["attempts"] >= self.maxAttempts:
+                self._finish(job, FAILED)
+            elif self._requeue(job):
+                requeued.append(jobId)
+        return requeued
+
+    def result(self, jobId):
+        """
+        Returns the result of finished job, None if it is not finished.
+        """
+        try:
+            with open(self.resultPath(jobId), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def results(self):
+        """
+        Yields (job id, result) of all finished jobs, one at a time.
+        """
+        for jobId in self.ids(DONE):
+            result = self.result(jobId)
+            if result is not None:
+                yield jobId, result
+
+    def job(self, jobId):
+        state = self.state(jobId)
+        return None if state is None else self._read(self._path(state, jobId))
+
+
+class Worker:
+    """
+    Claims and runs jobs of the queue, sends heartbeats from a thread while the job runs.
+
+    :param heartbeatInterval: seconds between heartbeats, third of the lease by default
+    """
+
+    def __init__(self, queue, name=None, heartbeatInterval=None, pollInterval=5.0):
+        self.queue = queue
+        self.name = name or workerName()
+        self.heartbeatInterval = heartbeatInterval or queue.lease / 3
+        self.pollInterval = pollInterval
+
+    def _heartbeats(self, job, finished):
+        while not finished.wait(self.heartbeatInterval):
+            if not self.queue.heartbeat(job):
+                return  # lease lost, the result is still stored when the job finishes
+
+    def runJob(self, job):
+        finished = threading.Event()
+        heartbeats = threading.Thread(target=self._heartbeats, args=(job, finished), daemon=True)
+        heartbeats.start()
+        error = None
+        try:
+            result = resolveFunction(job["function"])(*job["args"], **job["kwargs"])
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            finished.set()
+            heartbeats.join()
+
+        if error is not None:
+            self.queue.fail(job, error)
+            return False
+        self.queue.complete(job, result)
+        return True
+
+    def run(self, exitWhenIdle=True, maxJobs=None):
+        """
+        Runs jobs until the queue has no pending or running jobs (or forever if not exitWhenIdle).
+        Running jobs of other workers are waited for, their lease may expire and they are retried.
+
+        :return: number of jobs run
+        """
+        count = 0
+        while maxJobs is None or count < maxJobs:
+            self.queue.requeueExpired()
+            job = self.queue.claim(self.name)
+            if job is None:
+                if exitWhenIdle and not self.queue.ids(RUNNING) and not self.queue.ids(PENDING):
+                    break
+                time.sleep(self.pollInterval)
+                continue
+            self.runJob(job)
+            count += 1
+        return count
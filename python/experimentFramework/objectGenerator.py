@@ -0,0 +1,334 @@
+# Procedural generator of 2D objects for the TwoDimensionalObjectSpace
+#
+# Objects are kept as one integer array "grids" of shape (count, width, height),
+# indexed [object][x][y] same as TwoDimensionalObjectSpace._features.
+# Value 0 means empty place, value k means feature vocabulary[k-1].
+import os
+
+import numpy as np
+import yaml
+
+KINDS = ("random", "blobs", "lines", "shapes", "letters")
+
+# 3x5 bitmap font, rows from top to bottom
+_FONT_ROWS = {
+    "A": "010101111101101", "B": "110101110101110", "C": "011100100100011",
+    "D": "110101101101110", "E": "111100110100111", "F": "111100110100100",
+    "G": "011100101101011", "H": "101101111101101", "I": "111010010010111",
+    "J": "001001001101010", "K": "101101110101101", "L": "100100100100111",
+    "M": "101111111101101", "N": "110101101101101", "O": "010101101101010",
+    "P": "110101110100100", "Q": "010101101110011", "R": "110101110101101",
+    "S": "011100010001110", "T": "111010010010010", "U": "101101101101111",
+    "V": "101101101101010", "W": "101101111111101", "X": "101101010101101",
+    "Y": "101101010010010", "Z": "111001010100111",
+}
+_LETTERS = "".join(sorted(_FONT_ROWS))
+# font[letter, row, col]
+_FONT = np.array(
+    [[int(b) for b in _FONT_ROWS[letter]] for letter in _LETTERS], dtype=np.uint8
+).reshape(len(_LETTERS), 5, 3)
+
+
+class ObjectBundle:
+    """
+    Set of generated objects, loadable directly into TwoDimensionalObjectSpace.
+    """
+
+    def __init__(self, grids, vocabulary, names=None, sources=None):
+        self.grids = np.asarray(grids, dtype=np.uint8)
+        self.vocabulary = tuple(vocabulary)
+        if names is None:
+            names = ["obj" + str(i) for i in range(len(self.grids))]
+        self.names = list(names)
+        # name of the object each one was derived from (see objectTransforms)
+        self.sources = list(sources) if sources is not None else list(self.names)
+
+    @classmethod
+    def from_yaml(cls, yamlTexts, vocabulary, names=None, width=None, height=None):
+        """
+        Creates bundle from objects in YAML format (e.g. files in the objects folder).
+        Names are taken from the YAML, if not given.
+        """
+        objects = [yaml.safe_load(text) for text in yamlTexts]
+        width = width or max(obj.get("width") for obj in objects)
+        height = height or max(obj.get("height") for obj in objects)
+        vocabulary = tuple(vocabulary)
+
+        grids = np.zeros((len(objects), width, height), dtype=np.uint8)
+        for i, obj in enumerate(objects):
+            for feature in obj.get("features"):
+                grids[i, feature.get("x"), feature.get("y")] = vocabulary.index(feature.get("data")) + 1
+        return cls(grids, vocabulary, names or [obj.get("name") for obj in objects])
+
+    def __len__(self):
+        return len(self.grids)
+
+    @property
+    def width(self):
+        return self.grids.shape[1]
+
+    @property
+    def height(self):
+        return self.grids.shape[2]
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def load_into(self, objectSpace, i):
+        objectSpace.load_object_array(self.grids[i], self.vocabulary)
+
+    def to_yaml(self, i):  # same format as files in the objects folder
+        xs, ys = np.nonzero(self.grids[i])
+        codes = self.grids[i][xs, ys]
+        lines = [
+            "---",
+            "name: " + self.names[i],
+            "width: " + str(self.width),
+            "height: " + str(self.height),
+            "features:",
+        ]
+        lines += [
+            "  - { x: %d, y: %d, data: %s }" % (x, y, self.vocabulary[c - 1])
+            for x, y, c in zip(xs, ys, codes)
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_yaml(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for i, name in enumerate(self.names):
+            with open(os.path.join(directory, name + ".yml"), "w") as f:
+                f.write(self.to_yaml(i))
+
+    def save(self, path):
+        """
+        Saves bundle as compact binary file. With single feature vocabulary
+        the occupancy is stored bit-packed.
+        """
+        if len(self.vocabulary) == 1:
+            data = np.packbits(self.grids.reshape(len(self), -1), axis=1)
+        else:
+            data = self.grids.reshape(len(self), -1)
+        np.savez_compressed(
+            path,
+            data=data,
+            shape=np.array(self.grids.shape),
+            vocabulary=np.array(self.vocabulary),
+            names=np.array(self.names),
+            sources=np.array(self.sources),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            shape = tuple(f["shape"])
+            vocabulary = [str(v) for v in f["vocabulary"]]
+            data = f["data"]
+            if len(vocabulary) == 1:
+                data = np.unpackbits(data, axis=1, count=shape[1] * shape[2])
+            return cls(
+                data.reshape(shape), vocabulary, [str(n) for n in f["names"]], [str(n) for n in f["sources"]]
+            )
+
+
+class ObjectGenerator:
+    """
+    Generates batches of random or structured objects with numpy array operations.
+
+    :param width: width of generated objects
+    :param height: height of generated objects
+    :param vocabulary: features that can be placed on the object, e.g. ("X", "Y")
+    :param margin: number of empty places kept along the borders
+    :param seed: random seed
+    """
+
+    def __init__(self, width=20, height=20, vocabulary=("X",), margin=2, seed=42):
+        if width - 2 * margin < 3 or height - 2 * margin < 5:
+            raise RuntimeError("Object is too small for given margin!")
+        self.width = width
+        self.height = height
+        self.vocabulary = tuple(vocabulary)
+        self.margin = margin
+        self.rng = np.random.default_rng(seed)
+
+        self._innerW = width - 2 * margin
+        self._innerH = height - 2 * margin
+
+    def generate(self, count, kind="blobs", density=0.1, minDissimilarity=0.0, batchSize=None, maxBatches=100):
+        """
+        Generates objects of one kind.
+
+        :param count: number of objects to generate
+        :param kind: one of "random", "blobs", "lines", "shapes", "letters"
+        :param density: requested fraction of places with feature (exact for random and blobs,
+                        approximate for lines and shapes, ignored for letters)
+        :param minDissimilarity: minimal Jaccard distance between any two generated objects,
+                                 two places match only when they hold the same feature
+        :param batchSize: how many candidates are generated at once
+        :param maxBatches: give up after this number of batches
+        :return: ObjectBundle with the objects
+        """
+        if kind not in KINDS:
+            raise RuntimeError("Unknown object kind '" + str(kind) + "'!")
+        if batchSize is None:
+            batchSize = max(count, 64)
+
+        accepted = np.zeros((0, self.width, self.height), dtype=np.uint8)
+        for _ in range(maxBatches):
+            batch = self._generateBatch(kind, batchSize, density)
+            batch = batch[batch.reshape(len(batch), -1).any(axis=1)]  # drop empty objects
+            if minDissimilarity > 0.0:
+                batch = self._filterDissimilar(accepted, batch, minDissimilarity)
+            accepted = np.concatenate([accepted, batch[: count - len(accepted)]])
+            if len(accepted) == count:
+                break
+        else:
+            raise RuntimeError(
+                "Wasn't able to generate " + str(count) + " objects with given dissimilarity, got "
+                + str(len(accepted))
+            )
+
+        return ObjectBundle(accepted, self.vocabulary, [kind + str(i) for i in range(count)])
+
+    def _generateBatch(self, kind, n, density):
+        inner = getattr(self, "_" + kind)(n, density)
+
+        # assign features from vocabulary
+        codes = self.rng.integers(1, len(self.vocabulary) + 1, size=inner.shape, dtype=np.uint8)
+        grids = np.zeros((n, self.width, self.height), dtype=np.uint8)
+        m = self.margin
+        grids[:, m:m + self._innerW, m:m + self._innerH] = codes * inner
+        return grids
+
+    def _topFraction(self, field, density):  # marks given fraction of highest values of each object
+        n = field.shape[0]
+        flat = field.reshape(n, -1)
+        k = min(max(int(round(density * self.width * self.height)), 1), flat.shape[1])
+        idx = np.argpartition(-flat, k - 1, axis=1)[:, :k]
+        mask = np.zeros(flat.shape, dtype=np.uint8)
+        np.put_along_axis(mask, idx, 1, axis=1)
+        return mask.reshape(field.shape)
+
+    def _random(self, n, density):
+        return self._topFraction(self.rng.random((n, self._innerW, self._innerH)), density)
+
+    def _blobs(self, n, density):
+        field = self.rng.random((n, self._innerW, self._innerH))
+        # smooth the noise few times by 3x3 box filter, this creates continuous areas
+        for _ in range(3):
+            padded = np.pad(field, ((0, 0), (1, 1), (1, 1)), mode="edge")
+            field = sum(
+                padded[:, 1 + dx:1 + dx + self._innerW, 1 + dy:1 + dy + self._innerH]
+                for dx in (-1, 0, 1)
+                for dy in (-1, 0, 1)
+            )
+        return self._topFraction(field, density)
+
+    def _lines(self, n, density):
+        w, h = self._innerW, self._innerH
+        maxLen = max(w, h)
+        meanLen = min(w, h) / 4.0  # lines are often cut by the border
+        k = max(1, int(round(density * self.width * self.height / meanLen)))
+
+        count = n * k
+        owner = np.repeat(np.arange(n), k)
+        x0 = self.rng.integers(0, w, count)
+        y0 = self.rng.integers(0, h, count)
+        directions = np.array([[1, 0], [0, 1], [1, 1], [1, -1], [-1, 0], [0, -1], [-1, -1], [-1, 1]])
+        d = directions[self.rng.integers(0, len(directions), count)]
+        length = self.rng.integers(2, min(w, h) + 1, count)
+
+        t = np.arange(maxLen)
+        xs = x0[:, None] + t[None, :] * d[:, 0:1]
+        ys = y0[:, None] + t[None, :] * d[:, 1:2]
+        valid = (t[None, :] < length[:, None]) & (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+
+        grids = np.zeros((n, w, h), dtype=np.uint8)
+        grids[np.broadcast_to(owner[:, None], valid.shape)[valid], xs[valid], ys[valid]] = 1
+        return grids
+
+    def _shapes(self, n, density):  # outlined or filled rectangles and circles
+        w, h = self._innerW, self._innerH
+        meanArea = (min(w, h) / 4.0) ** 2
+        k = max(1, int(round(density * self.width * self.height / meanArea)))
+
+        count = n * k
+        x0 = self.rng.integers(0, w - 2, count)[:, None, None]
+        y0 = self.rng.integers(0, h - 2, count)[:, None, None]
+        sx = self.rng.integers(3, max(4, w // 2), count)[:, None, None]
+        sy = self.rng.integers(3, max(4, h // 2), count)[:, None, None]
+        x1 = np.minimum(x0 + sx - 1, w - 1)
+        y1 = np.minimum(y0 + sy - 1, h - 1)
+        filled = self.rng.random(count)[:, None, None] < 0.5
+        circle = self.rng.random(count)[:, None, None] < 0.5
+
+        X = np.arange(w)[None, :, None]
+        Y = np.arange(h)[None, None, :]
+
+        rect = (X >= x0) & (X <= x1) & (Y >= y0) & (Y <= y1)
+        rectInside = (X > x0) & (X < x1) & (Y > y0) & (Y < y1)
+
+        cx = (x0 + x1) / 2.0
+        cy = (y0 + y1) / 2.0
+        r = np.minimum(x1 - x0, y1 - y0) / 2.0
+        dist = np.sqrt((X - cx) ** 2 + (Y - cy) ** 2)
+        disc = dist <= r + 0.5
+        discInside = dist <= r - 0.5
+
+        shape = np.where(circle, disc, rect)
+        inside = np.where(circle, discInside, rectInside)
+        shape &= filled | ~inside
+
+        return shape.reshape(n, k, w, h).any(axis=1).astype(np.uint8)
+
+    def _letters(self, n, density):
+        w, h = self._innerW, self._innerH
+        letter = self.rng.integers(0, len(_LETTERS), n)
+        maxScale = max(1, min(w // 3, h // 5))
+        scale = self.rng.integers(1, maxScale + 1, n)
+        ox = self.rng.integers(0, w - 3 * scale + 1)
+        oy = self.rng.integers(0, h - 5 * scale + 1)
+
+        # for every place, find the font pixel it falls into
+        fx = (np.arange(w)[None, :] - ox[:, None]) // scale[:, None]
+        fy = (np.arange(h)[None, :] - oy[:, None]) // scale[:, None]
+        validX = (fx >= 0) & (fx < 3)
+        validY = (fy >= 0) & (fy < 5)
+
+        pixels = _FONT[
+            letter[:, None, None],
+            np.clip(fy, 0, 4)[:, None, :],
+            np.clip(fx, 0, 2)[:, :, None],
+        ]
+        return pixels * (validX[:, :, None] & validY[:, None, :])
+
+    def _filterDissimilar(self, accepted, batch, minDissimilarity):
+        """
+        Keeps only candidates which are at least minDissimilarity (Jaccard distance) away
+        from all accepted objects and from the previously kept candidates of the batch.
+        """
+        maxSimilarity = 1.0 - minDissimilarity
+        V = len(self.vocabulary)
+
+        def oneHot(grids):
+            flat = grids.reshape(len(grids), -1)
+            return np.concatenate([(flat == v) for v in range(1, V + 1)], axis=1).astype(np.float32)
+
+        cand = oneHot(batch)
+        candSize = cand.sum(axis=1)
+
+        keep = np.ones(len(batch), dtype=bool)
+        if len(accepted):
+            acc = oneHot(accepted)
+            inter = cand @ acc.T
+            union = candSize[:, None] + acc.sum(axis=1)[None, :] - inter
+            keep &= (inter / union <= maxSimilarity).all(axis=1)
+
+        inter = cand @ cand.T
+        union = candSize[:, None] + candSize[None, :] - inter
+        tooSimilar = inter / union > maxSimilarity
+        for i in range(len(batch)):
+            if keep[i]:
+                tooSimilar[i, i] = False
+                keep[i + 1:] &= ~tooSimilar[i, i + 1:]
+
+        return batch[keep]
@@ -1,3 +1,4 @@
+import numpy as np
 import yaml
 
 
@@ -30,6 +31,22 @@ class TwoDimensionalObjectSpace:
 
             self._features[x][y] = data
 
+    def load_object_array(self, grid, vocabulary):
+        """
+        Loads object from integer grid indexed [x][y], without any YAML parsing.
+        Value 0 means empty place, value k means feature vocabulary[k-1].
+        """
+        grid = np.asarray(grid)
+        if self.width < grid.shape[0] or self.height < grid.shape[1]:
+            raise RuntimeError("Dimension of object is bigger than environment!")
+
+        lookup = np.empty(len(vocabulary) + 1, dtype=object)
+        lookup[1:] = list(vocabulary)
+
+        features = np.empty((self.width, self.height), dtype=object)
+        features[: grid.shape[0], : grid.shape[1]] = lookup[grid]
+        self._features = features.tolist()
+
     def size(self):
         return self.width * self.height
 
@@ -0,0 +1,140 @@
+# Bulk transformations of objects for testing translation, rotation and mirror invariance
+#
+# All functions work on grids of shape (count, width, height) indexed [object][x][y],
+# see objectGenerator.ObjectBundle. Features moved outside of the grid are lost.
+import numpy as np
+
+from experimentFramework.objectGenerator import ObjectBundle
+
+
+def translate(grids, shifts):
+    """
+    Translates every object by every shift.
+
+    :param grids: array (count, width, height)
+    :param shifts: array (shiftCount, 2) of [dx, dy]
+    :return: array (count, shiftCount, width, height)
+    """
+    grids = np.asarray(grids)
+    shifts = np.asarray(shifts, dtype=int).reshape(-1, 2)
+    width, height = grids.shape[1:]
+
+    # gather from position shifted back, positions coming from outside are empty
+    srcX = np.arange(width)[None, :] - shifts[:, 0:1]
+    srcY = np.arange(height)[None, :] - shifts[:, 1:2]
+    valid = ((srcX >= 0) & (srcX < width))[:, :, None] & ((srcY >= 0) & (srcY < height))[:, None, :]
+
+    out = grids[:, np.clip(srcX, 0, width - 1)[:, :, None], np.clip(srcY, 0, height - 1)[:, None, :]]
+    return out * valid[None]
+
+
+def rotate90(grids, k):
+    """
+    Rotates objects by k * 90 degrees. Objects must be square for odd k.
+    """
+    grids = np.asarray(grids)
+    if k % 2 == 1 and grids.shape[1] != grids.shape[2]:
+        raise RuntimeError("Rotation by 90 degrees is possible only for square objects!")
+    return np.rot90(grids, k, axes=(1, 2))
+
+
+def mirror(grids, axis="x"):
+    """
+    Mirrors objects, axis "x" flips left and right, "y" flips up and down.
+    """
+    if axis not in ("x", "y"):
+        raise RuntimeError("Wrong mirror axis!")
+    return np.flip(grids, axis=1 if axis == "x" else 2)
+
+
+def crop(grids, windows):
+    """
+    Keeps only the features inside every window, all other places become empty.
+    Grid size is not changed, so the cropped variants stay at the same place.
+
+    :param grids: array (count, width, height)
+    :param windows: array (windowCount, 4) of [x, y, width, height]
+    :return: array (count, windowCount, width, height)
+    """
+    grids = np.asarray(grids)
+    windows = np.asarray(windows, dtype=int).reshape(-1, 4)
+    X = np.arange(grids.shape[1])[None, :]
+    Y = np.arange(grids.shape[2])[None, :]
+    inX = (X >= windows[:, 0:1]) & (X < windows[:, 0:1] + windows[:, 2:3])
+    inY = (Y >= windows[:, 1:2]) & (Y < windows[:, 1:2] + windows[:, 3:4])
+    return grids[:, None] * (inX[:, :, None] & inY[:, None, :])[None]
+
+
+def random_shifts(count, maxShift, rng=None):
+    """
+    Returns count distinct shifts [dx, dy] with |dx|, |dy| <= maxShift, without [0, 0].
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    side = 2 * maxShift + 1
+    candidates = np.stack(np.divmod(np.arange(side * side), side), axis=1) - maxShift
+    candidates = candidates[(candidates != 0).any(axis=1)]
+    if count > len(candidates):
+        raise RuntimeError("Not enough distinct shifts for given maxShift!")
+    return candidates[rng.choice(len(candidates), count, replace=False)]
+
+
+def variants(bundle, rotations=(0,), mirrors=(False,), shifts=((0, 0),), windows=None, dropClipped=True):
+    """
+    Creates every combination of rotation, mirroring, translation and cropping
+    of every object in the bundle.
+
+    :param bundle: ObjectBundle with source objects
+    :param rotations: list of k for rotation by k * 90 degrees
+    :param mirrors: list of booleans, True for mirroring along x (applied after rotation)
+    :param shifts: list of translations [dx, dy]
+    :param windows: optional list of crop windows [x, y, width, height], applied last
+    :param dropClipped: drop translated variants which lost some feature behind the border
+    :return: ObjectBundle, sources of the variants are names of their source objects
+    """
+    shifts = np.asarray(shifts, dtype=int).reshape(-1, 2)
+    count = len(bundle)
+
+    # dihedral variants, shape (count, orientations, width, height)
+    oriented = []
+    orientationNames = []
+    for k in rotations:
+        rotated = rotate90(bundle.grids, k)
+        for m in mirrors:
+            oriented.append(mirror(rotated, "x") if m else rotated)
+            orientationNames.append("_r" + str(k % 4) + ("m" if m else ""))
+    oriented = np.stack(oriented, axis=1)
+    orientationCount = oriented.shape[1]
+
+    # translations, shape (count * orientations, shifts, width, height)
+    flat = oriented.reshape((-1,) + oriented.shape[2:])
+    out = translate(flat, shifts)
+    keep = np.ones(out.shape[:2], dtype=bool)
+    if dropClipped:
+        before = np.count_nonzero(flat.reshape(len(flat), -1), axis=1)
+        after = np.count_nonzero(out.reshape(out.shape[:2] + (-1,)), axis=2)
+        keep = after == before[:, None]
+
+    if windows is not None:
+        windows = np.asarray(windows, dtype=int).reshape(-1, 4)
+        out = crop(out.reshape((-1,) + out.shape[2:]), windows).reshape(
+            out.shape[:2] + (len(windows),) + out.shape[2:]
+        )
+        keep = np.repeat(keep[:, :, None], len(windows), axis=2)
+        # drop crops without any feature
+        keep &= out.reshape(out.shape[:3] + (-1,)).any(axis=3)
+    else:
+        out = out[:, :, None]
+        keep = keep[:, :, None]
+
+    windowCount = out.shape[2]
+    grids = out.reshape((count, orientationCount, len(shifts), windowCount) + out.shape[3:])
+    keep = keep.reshape(count, orientationCount, len(shifts), windowCount)
+
+    idx = np.nonzero(keep)
+    names = [
+        bundle.names[o] + orientationNames[r] + "_t" + str(shifts[s][0]) + "," + str(shifts[s][1])
+        + ("_c" + str(w) if windows is not None else "")
+        for o, r, s, w in zip(*idx)
+    ]
+    sources = [bundle.sources[o] for o in idx[0]]
+    return ObjectBundle(grids[idx], bundle.vocabulary, names, sources)
@@ -0,0 +1,113 @@
+# Offline evaluation of classification thresholds from recorded L2 overlaps
+#
+# With L2_L4_L6_Network.recordOverlaps enabled, every inference step records overlap of
+# the L2 activity with every learned object ("L2 overlaps", [column, object]) and
+# the L2 sizes ("L2 Representation C*"). From these, the classification of
+# L2_L4_L6_Network.isObjectClassified can be recomputed for any minOverlap and maxL2Size
+# without running the network again.
+import numpy as np
+
+
+class OverlapEvaluator:
+    """
+    :param overlaps: int array [run, step, column, object]
+    :param sizes: int array [run, step, column] of L2 representation sizes
+    :param trueObjects: index of the inferred object for each run
+    :param objectNames: names of learned objects, in the order of the object axis
+    :param lengths: number of valid steps of each run, the rest is padding. All steps by default.
+    """
+
+    def __init__(self, overlaps, sizes, trueObjects, objectNames=None, lengths=None):
+        self.overlaps = np.asarray(overlaps)
+        self.sizes = np.asarray(sizes)
+        self.trueObjects = np.asarray(trueObjects)
+        self.objectNames = objectNames
+        if lengths is None:
+            lengths = np.full(len(self.trueObjects), self.overlaps.shape[1])
+        self.lengths = np.asarray(lengths)
+
+    @classmethod
+    def fromStats(cls, statsList, objectNames):
+        """
+        Creates evaluator from stats of inference runs (see Experiment.infer). Runs with less
+        steps are padded with empty L2 activity, which is never classified.
+        """
+        numColumns = np.asarray(statsList[0]["L2 overlaps"][0]).shape[0]
+        steps = max(len(s["L2 overlaps"]) for s in statsList)
+
+        overlaps = np.zeros((len(statsList), steps, numColumns, len(objectNames)), dtype=np.int32)
+        sizes = np.zeros((len(statsList), steps, numColumns), dtype=np.int32)
+        lengths = [len(s["L2 overlaps"]) for s in statsList]
+        for r, stats in enumerate(statsList):
+            n = len(stats["L2 overlaps"])
+            overlaps[r, :n] = np.asarray(stats["L2 overlaps"])
+            for col in range(numColumns):
+                sizes[r, :n, col] = stats["L2 Representation C" + str(col)]
+
+        trueObjects = [objectNames.index(s["name"]) for s in statsList]
+        return cls(overlaps, sizes, trueObjects, objectNames, lengths)
+
+    def _reduceColumns(self):
+        """
+        Object is classified when every column is active, has overlap >= minOverlap and
+        size <= maxL2Size (see L2_L4_L6_Network.isObjectClassified). That is the same as
+        smallest overlap >= minOverlap and largest size <= maxL2Size, so the column axis
+        can be reduced before thresholds are applied.
+        """
+        active = self.sizes.min(axis=2) > 0  # [run, step]
+        maxSize = self.sizes.max(axis=2)  # [run, step]
+        minOverlap = self.overlaps.min(axis=2)  # [run, step, object]
+        return active, maxSize, minOverlap
+
+    def evaluate(self, minOverlaps, maxL2Sizes):
+        """
+        Evaluates every combination of thresholds.
+
+        :return: dict of arrays [minOverlap, maxL2Size]:
+            "accuracy" - fraction of runs where the true object was classified at some step
+                         (as "Correct classification" in stats)
+            "finalAccuracy" - fraction of runs classified correctly at the last step
+            "falsePositiveRate" - fraction of (run, other object) pairs classified at the last step
+            "meanStepsToRecognition" - mean of the first step with correct classification (1-based),
+                                       over recognized runs, NaN if none
+            "stepsToRecognition" - array [minOverlap, maxL2Size, run], -1 for not recognized
+        """
+        minOverlaps = np.asarray(minOverlaps).reshape(-1, 1, 1, 1)
+        maxL2Sizes = np.asarray(maxL2Sizes).reshape(1, -1, 1, 1)
+        active, maxSize, minOverlap = self._reduceColumns()
+        runs = np.arange(len(self.trueObjects))
+
+        # true object at every step, [minOverlap, maxL2Size, run, step]
+        trueOverlap = minOverlap[runs, :, self.trueObjects]
+        correct = (active & (maxSize <= maxL2Sizes)) & (trueOverlap >= minOverlaps)
+
+        recognized = correct.any(axis=3)
+        firstStep = np.where(recognized, correct.argmax(axis=3) + 1, -1)
+
+        # every object at the last step, [minOverlap, maxL2Size, run, object]
+        last = self.lengths - 1
+        finalOk = (active[runs, last] & (maxSize[runs, last] <= maxL2Sizes[..., 0]))[..., None]
+        final = finalOk & (minOverlap[runs, last, :] >= minOverlaps)
+        isTrue = np.zeros(final.shape[2:], dtype=bool)
+        isTrue[runs, self.trueObjects] = True
+        otherCount = max(isTrue.size - isTrue.sum(), 1)
+
+        with np.errstate(invalid="ignore"):
+            meanSteps = np.where(recognized, firstStep, 0).sum(axis=2) / recognized.sum(axis=2)
+
+        return {
+            "accuracy": recognized.mean(axis=2),
+            "finalAccuracy": final[:, :, isTrue].mean(axis=2),
+            "falsePositiveRate": final[:, :, ~isTrue].sum(axis=2) / otherCount,
+            "meanStepsToRecognition": meanSteps,
+            "stepsToRecognition": firstStep,
+        }
+
+    def roc(self, minOverlaps, maxL2Size):
+        """
+        ROC curve over minOverlap thresholds at the last step.
+
+        :return: (falsePositiveRate, truePositiveRate) arrays, one value for each minOverlap
+        """
+        result = self.evaluate(minOverlaps, [maxL2Size])
+        return result["falsePositiveRate"][:, 0], result["finalAccuracy"][:, 0]
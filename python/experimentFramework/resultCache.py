@@ -0,0 +1,145 @@
+# Content addressed cache of experiment results
+#
+# Results of a run are stored under hash of everything the run depends on - parameters,
+# seeds, contents of object files, sampler settings and source code - so the same run
+# is computed only once, also across sweeps and after changes of analysis code only.
+# Every entry is a directory "<key>/" with pickled stats and optionally trained network
+# checkpoint. Size of the cache is bounded, least recently used entries are evicted first
+# (last use is kept as modification time of the entry directory).
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+STATS_FILE = "stats.pkl"
+CHECKPOINT_DIR = "checkpoint"
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(v) for v in value)
+    if isinstance(value, np.ndarray):
+        return _canonical(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)  # 1.0 and 1 give the same key
+    return value
+
+
+def canonicalKey(**parts):
+    """
+    Returns hash of the given values, independent of dict order and of container types.
+    """
+    text = json.dumps(_canonical(parts), sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def filesDigest(paths):
+    """
+    Returns hash of contents of the files, e.g. object library or source code.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def _directorySize(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+class ResultCache:
+    """
+    :param directory: where the entries are stored
+    :param maxBytes: max total size, least recently used entries are removed when exceeded
+    """
+
+    def __init__(self, directory, maxBytes=10 * 2 ** 30):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self._entry(key), STATS_FILE))
+
+    def get(self, key):
+        """
+        Returns stored stats, None if the key is not cached.
+        """
+        path = os.path.join(self._entry(key), STATS_FILE)
+        try:
+            with open(path, "rb") as f:
+                stats = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        os.utime(self._entry(key))  # mark as recently used
+        return stats
+
+    def checkpointPath(self, key):
+        """
+        Returns directory of the stored checkpoint, None if there is none.
+        """
+        path = os.path.join(self._entry(key), CHECKPOINT_DIR)
+        return path if os.path.isdir(path) else None
+
+    def put(self, key, stats, saveCheckpoint=None):
+        """
+        Stores stats of the run.
+
+        :param saveCheckpoint: optional function path -> None, which saves trained network
+                               (e.g. L2_L4_L6_Network.save)
+        """
+        tmp = self._entry(key) + "." + str(os.getpid()) + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        with open(os.path.join(tmp, STATS_FILE), "wb") as f:
+            pickle.dump(stats, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if saveCheckpoint is not None:
+            saveCheckpoint(os.path.join(tmp, CHECKPOINT_DIR))
+
+        # entry appears complete or not at all, also when other process stores the same key
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+        try:
+            os.rename(tmp, self._entry(key))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """
+        Returns list of (key, size, last use), most recently used first.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp") or not os.path.isdir(path):
+                continue
+            entries.append((name, _directorySize(path), os.path.getmtime(path)))
+        return sorted(entries, key=lambda e: e[2], reverse=True)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits into maxBytes.
+        """
+        total = 0
+        for key, size, _ in self.entries():
+            total += size
+            if total > self.maxBytes:
+                shutil.rmtree(self._entry(key), ignore_errors=True)
+                total -= size
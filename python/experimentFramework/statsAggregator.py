@@ -0,0 +1,167 @@
+# Streaming aggregation of inference statistics across repetitions
+#
+# Instead of keeping per step lists of every run, each step's value is folded into
+# running mean / variance (Welford) per object, metric and step index. Memory does not
+# grow with the number of repetitions. Partial aggregators (e.g. from worker processes)
+# are merged with the parallel variant of the algorithm (Chan et al.).
+import fnmatch
+
+import numpy as np
+
+DEFAULT_METRICS = ("L2 Representation C*", "Overlap L2 with object C*", "Correct classification")
+
+
+class RunningStats:
+    """
+    Mean, variance, min and max for each step index.
+    """
+
+    def __init__(self, steps=0):
+        self.count = np.zeros(steps, dtype=np.int64)
+        self.mean = np.zeros(steps)
+        self.m2 = np.zeros(steps)
+        self.min = np.full(steps, np.inf)
+        self.max = np.full(steps, -np.inf)
+
+    def _grow(self, steps):
+        extra = steps - len(self.count)
+        if extra <= 0:
+            return
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.mean = np.concatenate([self.mean, np.zeros(extra)])
+        self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+        self.min = np.concatenate([self.min, np.full(extra, np.inf)])
+        self.max = np.concatenate([self.max, np.full(extra, -np.inf)])
+
+    def add(self, values):
+        """
+        Folds one run in, values[i] is the value at step i.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        self._grow(n)
+
+        self.count[:n] += 1
+        delta = values - self.mean[:n]
+        self.mean[:n] += delta / self.count[:n]
+        self.m2[:n] += delta * (values - self.mean[:n])
+        np.minimum(self.min[:n], values, out=self.min[:n])
+        np.maximum(self.max[:n], values, out=self.max[:n])
+
+    def merge(self, other):
+        self._grow(len(other.count))
+        n = len(other.count)
+
+        count = self.count[:n] + other.count
+        delta = other.mean - self.mean[:n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, self.mean[:n] + delta * other.count / count, 0.0)
+            m2 = np.where(count > 0, self.m2[:n] + other.m2 + delta ** 2 * self.count[:n] * other.count / count, 0.0)
+
+        self.count[:n] = count
+        self.mean[:n] = mean
+        self.m2[:n] = m2
+        np.minimum(self.min[:n], other.min, out=self.min[:n])
+        np.maximum(self.max[:n], other.max, out=self.max[:n])
+
+    @property
+    def variance(self):  # sample variance, NaN where there are less than two values
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def summary(self):
+        return {
+            "count": self.count.copy(),
+            "mean": self.mean.copy(),
+            "std": self.std,
+            "min": self.min.copy(),
+            "max": self.max.copy(),
+        }
+
+    def state(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def fromState(cls, state):
+        stats = cls()
+        stats.count = np.array(state["count"], dtype=np.int64)
+        stats.mean = np.array(state["mean"], dtype=np.float64)
+        stats.m2 = np.array(state["m2"], dtype=np.float64)
+        stats.min = np.array(state["min"], dtype=np.float64)
+        stats.max = np.array(state["max"], dtype=np.float64)
+        return stats
+
+
+class StatsAggregator:
+    """
+    Aggregates stats of inference runs (dict of lists, see Experiment.infer) per object,
+    metric and step.
+
+    :param metrics: stats keys to aggregate, fnmatch patterns are allowed
+    """
+
+    def __init__(self, metrics=DEFAULT_METRICS):
+        self.metrics = tuple(metrics)
+        self.results = {}  # (objectName, metric) -> RunningStats
+        self.runs = 0
+
+    def _isAggregated(self, key):
+        return any(fnmatch.fnmatchcase(key, pattern) for pattern in self.metrics)
+
+    def add(self, stats, objectName=None):
+        objectName = objectName if objectName is not None else stats.get("name")
+        for key, values in stats.items():
+            if key == "name" or not self._isAggregated(key):
+                continue
+            if (objectName, key) not in self.results:
+                self.results[(objectName, key)] = RunningStats()
+            self.results[(objectName, key)].add(values)
+        self.runs += 1
+
+    def merge(self, other):
+        for key, stats in other.results.items():
+            if key not in self.results:
+                self.results[key] = RunningStats()
+            self.results[key].merge(stats)
+        self.runs += other.runs
+
+    def objects(self):
+        return sorted({o for o, _ in self.results}, key=str)
+
+    def summary(self, objectName, metric):
+        """
+        :return: dict of per step arrays "count", "mean", "std", "min", "max"
+        """
+        return self.results[(objectName, metric)].summary()
+
+    def combined(self, metric):
+        """
+        Returns summary of the metric over all objects.
+        """
+        total = RunningStats()
+        for (_, key), stats in self.results.items():
+            if key == metric:
+                total.merge(stats)
+        return total.summary()
+
+    def state(self):
+        """
+        Plain picklable state, e.g. to send partial results from worker process.
+        """
+        return {
+            "metrics": self.metrics,
+            "runs": self.runs,
+            "results": [(o, k, s.state()) for (o, k), s in self.results.items()],
+        }
+
+    @classmethod
+    def fromState(cls, state):
+        aggregator = cls(state["metrics"])
+        aggregator.runs = state["runs"]
+        for objectName, key, s in state["results"]:
+            aggregator.results[(objectName, key)] = RunningStats.fromState(s)
+        return aggregator
@@ -0,0 +1,261 @@
+# Compact columnar storage of inference statistics
+#
+# Replaces dumping whole stats (see L2_L4_L6_Network.updateInferenceStats) into JSON.
+# Store is a directory with "index.json" and chunk files "chunk_00000.npz", each chunk
+# holds several inference runs. Every stats key is one column:
+#   - numeric columns (cell counts, overlaps, classification) as fixed width arrays
+#   - SDR columns ("Full L2 SDR C*") as delta encoded sorted indices + lengths
+#   - dict columns ("Actual classification") as matrix steps x keys, NaN where key is missing
+#   - matrix columns ("L2 overlaps") as one stacked int32 array
+import json
+import os
+
+import numpy as np
+
+NUMERIC = "numeric"
+SDR = "sdr"
+DICT = "dict"
+MATRIX = "matrix"
+
+INDEX_FILE = "index.json"
+
+
+def _columnType(value):
+    if isinstance(value, dict):
+        return DICT
+    if isinstance(value, np.ndarray) and value.ndim > 1:
+        return MATRIX
+    if isinstance(value, (list, tuple, set, np.ndarray)):
+        return SDR
+    return NUMERIC
+
+
+def _smallestUInt(maxValue):
+    return np.uint16 if maxValue < 2 ** 16 else np.uint32
+
+
+def encodeSDRs(sdrs):
+    """
+    Encodes list of SDRs (lists of active indices) into (lengths, deltas) arrays.
+    First index of each SDR is stored as is, the others as difference to the previous index.
+    """
+    sdrs = [np.sort(np.asarray(list(s), dtype=np.int64)) for s in sdrs]
+    lengths = np.array([len(s) for s in sdrs], dtype=np.int64)
+    if lengths.sum() == 0:
+        return lengths.astype(np.uint16), np.zeros(0, dtype=np.uint16)
+    deltas = np.concatenate([np.diff(s, prepend=0) for s in sdrs])
+    return lengths.astype(_smallestUInt(lengths.max())), deltas.astype(_smallestUInt(deltas.max()))
+
+
+def decodeSDRs(lengths, deltas):
+    lengths = np.asarray(lengths, dtype=np.int64)
+    ends = np.cumsum(lengths)
+    if len(deltas) == 0:
+        return [np.zeros(0, dtype=np.int64) for _ in lengths]
+
+    # cumulative sum restarted at the start of each SDR
+    values = deltas.astype(np.int64)
+    total = np.cumsum(values)
+    starts = np.minimum(ends - lengths, len(values) - 1)
+    absolute = total - np.repeat(total[starts] - values[starts], lengths)
+    return np.split(absolute, ends[:-1])
+
+
+class StatsWriter:
+    """
+    Writes stats of inference runs into columnar store.
+
+    :param path: directory of the store, created if needed
+    :param runsPerChunk: number of runs kept in memory before they are written as one chunk
+    :param compress: compress the chunk files
+    """
+
+    def __init__(self, path, runsPerChunk=64, compress=False):
+        self.path = path
+        self.runsPerChunk = runsPerChunk
+        self.compress = compress
+        os.makedirs(path, exist_ok=True)
+
+        self.columns = {}  # name -> {"type": ..., "id": ...}
+        self.runs = []  # [{"name": ..., "counts": {column: rows}}]
+        self.chunks = []  # [{"file": ..., "runs": count}]
+        self._pending = []
+
+    def writeRun(self, stats):
+        """
+        Adds stats of one inference run (dict of lists, see Experiment.infer).
+        """
+        counts = {}
+        run = {}
+        for key, values in stats.items():
+            if key == "name":
+                continue
+            values = list(values)
+            if key not in self.columns:
+                if len(values) == 0:
+                    continue
+                self.columns[key] = {"type": _columnType(values[0]), "id": len(self.columns)}
+            run[key] = values
+            counts[key] = len(values)
+
+        self.runs.append({"name": stats.get("name"), "counts": counts})
+        self._pending.append(run)
+        if len(self._pending) >= self.runsPerChunk:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+
+        arrays = {}
+        for key, column in self.columns.items():
+            values = [v for run in self._pending for v in run.get(key, [])]
+            prefix = "c" + str(column["id"]) + "_"
+            if column["type"] == NUMERIC:
+                arr = np.asarray(values)
+                if arr.dtype.kind == "f" or arr.dtype.kind == "b":
+                    arr = arr.astype(np.float32)
+                else:
+                    arr = arr.astype(np.int32)
+                arrays[prefix + "values"] = arr
+            elif column["type"] == SDR:
+                arrays[prefix + "lengths"], arrays[prefix + "deltas"] = encodeSDRs(values)
+            elif column["type"] == MATRIX:
+                if values:
+                    arrays[prefix + "values"] = np.stack(values).astype(np.int32)
+            else:
+                keys = sorted({k for v in values for k in v})
+                matrix = np.full((len(values), len(keys)), np.nan, dtype=np.float32)
+                keyIndex = {k: i for i, k in enumerate(keys)}
+                for row, v in enumerate(values):
+                    for k, score in v.items():
+                        matrix[row, keyIndex[k]] = score
+                arrays[prefix + "keys"] = np.array(keys, dtype=str)
+                arrays[prefix + "values"] = matrix
+
+        filename = "chunk_%05d.npz" % len(self.chunks)
+        save = np.savez_compressed if self.compress else np.savez
+        save(os.path.join(self.path, filename), **arrays)
+        self.chunks.append({"file": filename, "runs": len(self._pending)})
+        self._pending = []
+        self._writeIndex()
+
+    def _writeIndex(self):
+        written = sum(c["runs"] for c in self.chunks)
+        index = {"columns": self.columns, "runs": self.runs[:written], "chunks": self.chunks}
+        tmp = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(self.path, INDEX_FILE))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class StatsReader:
+    """
+    Reads columnar store lazily, chunk files are opened only when their data are needed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), "r") as f:
+            index = json.load(f)
+        self.columns = index["columns"]
+        self.runs = index["runs"]
+        self.chunks = index["chunks"]
+        self._files = {}
+
+        # first run of each chunk
+        self._chunkStart = np.cumsum([0] + [c["runs"] for c in self.chunks])
+
+    def __len__(self):
+        return len(self.runs)
+
+    def runNames(self):
+        return [r["name"] for r in self.runs]
+
+    def _chunk(self, i):
+        if i not in self._files:
+            self._files[i] = np.load(os.path.join(self.path, self.chunks[i]["file"]))
+        return self._files[i]
+
+    def _chunkColumn(self, i, key):
+        column = self.columns[key]
+        data = self._chunk(i)
+        prefix = "c" + str(column["id"]) + "_"
+        if column["type"] == SDR:
+            if prefix + "lengths" not in data:
+                return []
+            return decodeSDRs(data[prefix + "lengths"], data[prefix + "deltas"])
+        if prefix + "values" not in data:
+            return np.zeros(0)
+        if column["type"] == DICT:
+            return [str(k) for k in data[prefix + "keys"]], data[prefix + "values"]
+        return data[prefix + "values"]
+
+    def column(self, key):
+        """
+        Returns whole column: numeric and matrix column as array, SDR column as list of arrays
+        and dict column as (keys, matrix).
+        """
+        parts = [self._chunkColumn(i, key) for i in range(len(self.chunks))]
+        columnType = self.columns[key]["type"]
+        if columnType == NUMERIC:
+            return np.concatenate(parts) if parts else np.zeros(0)
+        if columnType == MATRIX:
+            return np.concatenate([p for p in parts if len(p)])
+        if columnType == SDR:
+            return [sdr for part in parts for sdr in part]
+
+        keys = sorted({k for part in parts if len(part) for k in part[0]})
+        keyIndex = {k: i for i, k in enumerate(keys)}
+        matrices = []
+        for part in parts:
+            if not len(part):
+                continue
+            partKeys, matrix = part
+            full = np.full((len(matrix), len(keys)), np.nan, dtype=np.float32)
+            full[:, [keyIndex[k] for k in partKeys]] = matrix
+            matrices.append(full)
+        return keys, (np.concatenate(matrices) if matrices else np.zeros((0, len(keys)), dtype=np.float32))
+
+    def run(self, i):
+        """
+        Returns stats of one run in the same form as Experiment.infer (dict of lists).
+        """
+        chunk = int(np.searchsorted(self._chunkStart, i, side="right") - 1)
+        first = self._chunkStart[chunk]
+
+        stats = {}
+        for key in self.columns:
+            if key not in self.runs[i]["counts"]:
+                continue
+            start = sum(self.runs[r]["counts"].get(key, 0) for r in range(first, i))
+            end = start + self.runs[i]["counts"][key]
+            data = self._chunkColumn(chunk, key)
+            columnType = self.columns[key]["type"]
+            if columnType == NUMERIC:
+                stats[key] = data[start:end].tolist()
+            elif columnType == MATRIX:
+                stats[key] = list(data[start:end])
+            elif columnType == SDR:
+                stats[key] = [sdr.tolist() for sdr in data[start:end]]
+            else:
+                keys, matrix = data
+                stats[key] = [
+                    {k: float(v) for k, v in zip(keys, row) if not np.isnan(v)} for row in matrix[start:end]
+                ]
+        stats["name"] = self.runs[i]["name"]
+        return stats
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
@@ -0,0 +1,100 @@
+# Disk cache of generated sensation streams
+#
+# Sensation streams of Experiment.learn are fully determined by the objects, seed, sampler
+# and encoder settings, so across a sweep which varies only network parameters they are the
+# same. Streams of all objects are stored once as .npy files and later opened memory-mapped:
+#   - "<object>_positions.npy" - int32 [sensation, 2]
+#   - "<object>_features.npy" - int32 [column, sensation, active bits] of the feature SDRs
+#   - "rng.pkl" - state of numpy random generator after generation, restored when loaded,
+#                 so anything random after the streams behaves the same as without cache
+import os
+import pickle
+import shutil
+from collections.abc import Sequence
+
+import numpy as np
+
+RNG_FILE = "rng.pkl"
+
+
+class SensationStream(Sequence):
+    """
+    Read-only stream of (location, feature SDR) pairs of one column, backed by arrays.
+    Items are views into the arrays, nothing is copied.
+    """
+
+    def __init__(self, positions, features):
+        self.positions = positions
+        self.features = features
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SensationStream(self.positions[i], self.features[i])
+        return self.positions[i], self.features[i]
+
+
+class StreamCache:
+    """
+    :param directory: where the streams are stored
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self._entry(key), RNG_FILE))
+
+    def load(self, key):
+        """
+        :return: (streams, rngState), streams are dict objectName -> {column: SensationStream}
+                 as Experiment.sensations, None if the key is not cached
+        """
+        if key not in self:
+            return None
+        path = self._entry(key)
+        with open(os.path.join(path, RNG_FILE), "rb") as f:
+            state = pickle.load(f)
+
+        streams = {}
+        for obj in state["objects"]:
+            positions = np.load(os.path.join(path, obj + "_positions.npy"), mmap_mode="r")
+            features = np.load(os.path.join(path, obj + "_features.npy"), mmap_mode="r")
+            streams[obj] = {col: SensationStream(positions, features[col]) for col in range(len(features))}
+        return streams, state["rng"]
+
+    def store(self, key, streams, rngState):
+        """
+        :param streams: dict objectName -> {column: [(location, feature SDR), ...]}, columns share locations
+        :param rngState: numpy.random.get_state() after the streams were generated
+        """
+        tmp = self._entry(key) + "." + str(os.getpid()) + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        for obj, columns in streams.items():
+            first = columns[0]
+            positions = np.array([location for location, _ in first], dtype=np.int32).reshape(len(first), 2)
+            try:
+                features = np.array([[feature for _, feature in columns[col]] for col in sorted(columns)],
+                                    dtype=np.int32)
+            except ValueError:
+                raise RuntimeError("Feature SDRs of object '" + str(obj) + "' have different sizes, can't be cached")
+            features = features.reshape(len(columns), len(first), -1)
+            np.save(os.path.join(tmp, obj + "_positions.npy"), positions)
+            np.save(os.path.join(tmp, obj + "_features.npy"), features)
+
+        with open(os.path.join(tmp, RNG_FILE), "wb") as f:
+            pickle.dump({"objects": list(streams), "rng": rngState}, f)
+
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+        try:
+            os.rename(tmp, self._entry(key))
+        except OSError:  # stored by other process meanwhile
+            shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Headless rendering of experiment frames into PNG sequence or animated GIF.
+
+    Uses one Agg canvas and one imshow artist, only the image data are replaced
+    for each frame, so there is no figure redraw from scratch nor GUI event loop.
+"""
+import os
+
+import numpy as np
+import matplotlib.colors as Colors
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from utilities import environmentFrames, sensationsArray
+
+ENVIRONMENT_COLORS = ["white", "blue", "red", "lightGray", "cyan"]
+
+
+class FrameRenderer:
+    """
+    Collects frames (small integer arrays, see utilities.environmentFrames)
+    and renders them on demand.
+
+    :param width: width of the object space
+    :param height: height of the object space
+    :param title: title of the plot
+    :param colors: colors for values 0..len(colors)-1
+    :param figsize: size of the figure in inches
+    :param dpi: resolution of the rendered images
+    """
+
+    def __init__(self, width, height, title="Environment", colors=ENVIRONMENT_COLORS, figsize=(6, 4), dpi=80):
+        self.width = width
+        self.height = height
+        self.frames = []
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        axes = self.figure.add_subplot(1, 1, 1)
+        self.axes = axes
+
+        axes.set_title(title)
+        axes.set_xlabel("x")
+        axes.set_ylabel("y")
+        axes.set_xticks(np.arange(-0.5, width, 1))
+        axes.set_yticks(np.arange(-0.5, height, 1))
+        axes.set_xticklabels([])
+        axes.set_yticklabels([])
+        axes.grid(color="w", linestyle="-", linewidth=2)
+
+        cm = Colors.LinearSegmentedColormap.from_list("myCMap", colors, N=len(colors))
+        self.image = axes.imshow(
+            np.zeros((height, width), dtype=np.uint8),
+            interpolation="nearest",
+            norm=Colors.Normalize(0, len(colors)),
+            cmap=cm,
+        )
+
+        # everything except the image and the grid over it is drawn only once (blitting)
+        self.image.set_animated(True)
+        self._overlay = axes.get_xgridlines() + axes.get_ygridlines() + list(axes.spines.values())
+        for line in self._overlay:
+            line.set_animated(True)
+        self._background = None
+
+    def addEnvironmentFrames(self, env, agentPositions):
+        """
+        Adds one frame for each agent position, all built at once.
+        """
+        self.frames.extend(environmentFrames(env, agentPositions))
+
+    def addSensationsFrame(self, env, sensations1, sensations2):
+        self.frames.append(sensationsArray(env, sensations1, sensations2))
+
+    def render(self, frame):
+        """
+        Renders one frame (array width x height) and returns RGBA image as numpy array.
+        The array is the canvas buffer, it is overwritten by the next frame.
+        """
+        if self._background is None:
+            self.canvas.draw()
+            self._background = self.canvas.copy_from_bbox(self.axes.bbox)
+
+        self.image.set_data(np.asarray(frame).T)
+        self.canvas.restore_region(self._background)
+        self.axes.draw_artist(self.image)
+        for line in self._overlay:
+            self.axes.draw_artist(line)
+        return np.asarray(self.canvas.buffer_rgba())
+
+    def writePNGs(self, directory, prefix="frame", clear=True):
+        from PIL import Image  # pillow is dependency of matplotlib
+
+        os.makedirs(directory, exist_ok=True)
+        for i, frame in enumerate(self.frames):
+            image = Image.fromarray(self.render(frame))
+            # low compression level, speed is more important than size here
+            image.save(os.path.join(directory, "%s_%05d.png" % (prefix, i)), compress_level=1)
+        if clear:
+            self.frames = []
+
+    def writeAnimation(self, path, fps=10, clear=True):
+        """
+        Writes all frames as animated GIF.
+        """
+        from PIL import Image  # pillow is dependency of matplotlib
+
+        images = [Image.fromarray(self.render(frame)).convert("P") for frame in self.frames]
+        if images:
+            images[0].save(path, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+        if clear:
+            self.frames = []
@@ -0,0 +1,169 @@
+"""
+Hyperparameter search with successive halving and Hyperband.
+
+Every configuration is first evaluated with a small budget - few objects and sensations.
+Only the best 1/eta of them is promoted to the next, larger budget (rung), so most of the
+bad configurations are dropped after a fraction of the full learn and infer cost.
+Hyperband runs several successive halving brackets, which start at different budgets, to
+be robust to configurations which look bad only on the small budgets.
+
+Configurations of one rung are evaluated in parallel worker processes.
+
+    python cli.py search --configs 27 --eta 3 --processes 8
+"""
+import copy
+import math
+import multiprocessing
+import random
+
+# parameter path (dots for nested dicts of parameters.cfg) -> possible values
+DEFAULT_SPACE = {
+    "l6a_params.moduleCount": [5, 10, 15, 20],
+    "scale": [1, 2, 3, 4],
+    "angle": [60, 90, 120],
+    "cells_per_axis": [10, 15, 20, 25],
+    "l4_params.sampleSize": [35, 55, 75],
+    "l4_params.activationThreshold": [6, 8, 10],
+    "l2_params.sdrSize": [30, 40, 50],
+    "l2_params.activationThresholdDistal": [15, 20, 25],
+}
+
+# rungs from the smallest to the full budget
+DEFAULT_BUDGETS = [
+    {"objects": 2, "sensations": 5},
+    {"objects": 3, "sensations": 10},
+    {"objects": 5, "sensations": 20},
+]
+
+
+def setParameter(params, path, value):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        params = params[key]
+    if keys[-1] not in params:
+        raise RuntimeError("Unknown parameter '" + path + "'")
+    params[keys[-1]] = value
+
+
+def sampleConfigs(space, count, seed=42):
+    """
+    Returns count random configurations, dicts of parameter path -> value.
+    """
+    rng = random.Random(seed)
+    return [{path: rng.choice(values) for path, values in sorted(space.items())} for _ in range(count)]
+
+
+def applyConfig(params, config):
+    params = copy.deepcopy(params)
+    for path, value in config.items():
+        setParameter(params, path, value)
+    return params
+
+
+def evaluateConfig(params, config, budget, objects, repetition=0):
+    """
+    Learns and infers first budget["objects"] objects with budget["sensations"] sensations.
+
+    :return: dict with "accuracy" - fraction of correctly classified objects and "meanSteps" -
+             mean number of sensations to the correct classification (numSensations if not classified)
+    """
+    import experiment1
+
+    experiment1.registerRegions()
+    params = applyConfig(params, config)
+    params["num_sensations"] = budget["sensations"]
+    params["debug"] = False
+
+    experiment = experiment1.Experiment(objectSpaceSize=20)
+    experiment.learn(params, repetition, objects=objects[:budget["objects"]])
+
+    correct = []
+    steps = []
+    for obj in experiment.learnedObjectNames:
+        classification = experiment.infer(objectName=obj)["Correct classification"]
+        recognized = 1 in classification
+        correct.append(recognized)
+        steps.append(classification.index(1) + 1 if recognized else len(classification))
+
+    return {"accuracy": sum(correct) / len(correct), "meanSteps": sum(steps) / len(steps)}
+
+
+def _rank(result):
+    return -result["accuracy"], result["meanSteps"]
+
+
+def _evaluateTask(task):
+    evaluate, params, config, budget, objects, repetition = task
+    try:
+        return evaluate(params, config, budget, objects, repetition)
+    except Exception as e:  # e.g. invalid combination of parameters
+        return {"accuracy": -1.0, "meanSteps": math.inf, "error": str(e)}
+
+
+class HyperparameterSearch:
+    """
+    :param params: base parameters (parameters.cfg)
+    :param objects: names of objects, budgets take the first ones
+    :param budgets: list of {"objects": count, "sensations": count}, from the smallest to the full one
+    :param eta: 1/eta of configurations is promoted to the next rung
+    :param processes: number of worker processes, 1 to evaluate in this process
+    :param evaluate: function (params, config, budget, objects, repetition) -> result dict
+                     with "accuracy" and "meanSteps", must be picklable for processes > 1
+    """
+
+    def __init__(self, params, objects, budgets=DEFAULT_BUDGETS, eta=3, processes=None,
+                 evaluate=evaluateConfig, repetition=0):
+        if not budgets:
+            raise RuntimeError("At least one budget is needed")
+        self.params = params
+        self.objects = list(objects)
+        self.budgets = list(budgets)
+        self.eta = eta
+        self.processes = processes or multiprocessing.cpu_count()
+        self.evaluate = evaluate
+        self.repetition = repetition
+        self.trials = []  # every evaluation: {"config", "rung", "budget", "result"}
+
+    def _evaluateRung(self, configs, rung):
+        budget = self.budgets[rung]
+        tasks = [(self.evaluate, self.params, config, budget, self.objects, self.repetition) for config in configs]
+        if self.processes > 1 and len(tasks) > 1:
+            with multiprocessing.Pool(min(self.processes, len(tasks))) as pool:
+                results = pool.map(_evaluateTask, tasks, chunksize=1)
+        else:
+            results = [_evaluateTask(task) for task in tasks]
+
+        for config, result in zip(configs, results):
+            self.trials.append({"config": config, "rung": rung, "budget": budget, "result": result})
+        return results
+
+    def successiveHalving(self, configs, firstRung=0):
+        """
+        Evaluates configs from the firstRung, promoting the best 1/eta to each next rung.
+
+        :return: (best config, its result on the largest evaluated budget)
+        """
+        for rung in range(firstRung, len(self.budgets)):
+            results = self._evaluateRung(configs, rung)
+            order = sorted(range(len(configs)), key=lambda i: _rank(results[i]))
+            if rung == len(self.budgets) - 1 or len(configs) == 1:
+                return configs[order[0]], results[order[0]]
+            keep = max(1, len(configs) // self.eta)
+            configs = [configs[i] for i in order[:keep]]
+
+    def hyperband(self, space, seed=42):
+        """
+        Runs Hyperband brackets, from the most aggressive (many configs from the smallest budget)
+        to plain evaluation of few configs on the full budget.
+
+        :return: (best config, its result on the full budget)
+        """
+        sMax = len(self.budgets) - 1
+        best = None
+        for s in range(sMax, -1, -1):
+            count = int(math.ceil((sMax + 1) / (s + 1) * self.eta ** s))
+            configs = sampleConfigs(space, count, seed=seed + s)
+            config, result = self.successiveHalving(configs, firstRung=sMax - s)
+            if best is None or _rank(result) < _rank(best[1]):
+                best = (config, result)
+        return best
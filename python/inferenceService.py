@@ -0,0 +1,180 @@
+"""
+Local inference service - classifies sensation streams of live agents step by step.
+
+Service loads trained network checkpoint (see L2_L4_L6_Network.save) into several
+replicas. Every client connection is one session: it gets its own replica for the whole
+session, so concurrent sessions never share network state. When all replicas are in use,
+new sessions wait for a free one.
+
+Protocol is newline delimited JSON over localhost TCP or Unix socket. Client sends one
+message per step:
+    {"sensation": [[displacement, featureSDR], ...]}  - one pair for each column
+    {"reset": true}                                    - start new object, same session
+and receives {"step": n, "classification": {objectName: score, ...}} (see
+getCurrentClassification) or {"error": message}.
+
+Every step is dispatched immediately to a thread pool with one worker per replica, so network
+computation does not block the event loop and steps of different sessions are computed
+concurrently (in parallel as far as the network code releases the GIL). A replica is used by one
+session at a time, so its steps are never computed concurrently.
+
+Run as: python inferenceService.py checkpoint [--replicas 4] [--port 8765 | --socket path]
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+
+def loadReplicas(checkpoint, count):
+    from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network, checkpointBackend
+
+    if checkpointBackend(checkpoint) != "numpy":  # surrogate network has no htm regions
+        from htm.advanced.support.register_regions import registerAllAdvancedRegions
+        registerAllAdvancedRegions()
+    return [L2_L4_L6_Network.load(checkpoint) for _ in range(count)]
+
+
+class InferenceService:
+    """
+    :param replicas: networks used by sessions, e.g. from loadReplicas
+    """
+
+    def __init__(self, replicas):
+        self.replicas = list(replicas)
+
+        self._free = None  # asyncio.Queue of free replicas, created in the event loop
+        self._executor = ThreadPoolExecutor(max_workers=len(self.replicas))
+        self._server = None
+        self._sessions = set()
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """
+        Starts listening on TCP port, or on Unix socket if path is given.
+        """
+        self._free = asyncio.Queue()
+        for network in self.replicas:
+            self._free.put_nowait(network)
+
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._session, path=path)
+        else:
+            self._server = await asyncio.start_server(self._session, host=host, port=port)
+        return self._server
+
+    async def close(self):
+        """
+        Stops accepting connections and waits until open sessions end.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await asyncio.gather(*self._sessions, return_exceptions=True)
+        self._executor.shutdown()
+
+    async def _session(self, reader, writer):
+        task = asyncio.current_task()
+        self._sessions.add(task)
+        task.add_done_callback(self._sessions.discard)
+        network = await self._free.get()
+        try:
+            await self._reset(network)
+            step = 0
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if message.get("reset"):
+                        await self._reset(network)
+                        step = 0
+                        response = {"step": step}
+                    else:
+                        classification = await self.infer(network, message["sensation"])
+                        step += 1
+                        response = {"step": step, "classification": classification}
+                except Exception as e:
+                    response = {"error": str(e)}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        finally:
+            await self._reset(network)  # no state is left for the next session
+            self._free.put_nowait(network)
+            writer.close()
+
+    async def _reset(self, network):
+        await asyncio.get_running_loop().run_in_executor(self._executor, network.startInference)
+
+    async def infer(self, network, sensation):
+        """
+        Computes one step of the session using the network and returns its classification.
+        """
+        if len(sensation) != network.numColumns:
+            raise RuntimeError("Expected sensation for " + str(network.numColumns) + " columns, got "
+                               + str(len(sensation)))
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._computeStep, network, sensation)
+
+    @staticmethod
+    def _computeStep(network, sensation):
+        network.inferStep(sensation)
+        return network.getCurrentClassification()
+
+
+class InferenceClient:
+    """
+    Client of one session, e.g. for agent simulator.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _request(self, message):
+        self.writer.write((json.dumps(message) + "\n").encode())
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def step(self, sensation):
+        """
+        :param sensation: (displacement, feature SDR) for each column
+        :return: classification, dict of object names and their score
+        """
+        sensation = [[[int(d) for d in displacement], [int(f) for f in feature]]
+                     for displacement, feature in sensation]
+        return (await self._request({"sensation": sensation}))["classification"]
+
+    async def reset(self):
+        await self._request({"reset": True})
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _serve(args):
+    service = InferenceService(loadReplicas(args.checkpoint, args.replicas))
+    server = await service.start(port=args.port, path=args.socket)
+    print("Serving " + str(args.replicas) + " replicas on " + (args.socket or "port " + str(args.port)))
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local inference service of trained L2-L4-L6a network")
+    parser.add_argument("checkpoint", help="checkpoint directory, see L2_L4_L6_Network.save")
+    parser.add_argument("--replicas", type=int, default=4, help="max number of concurrent sessions")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", default=None, help="Unix socket path, used instead of TCP port")
+    asyncio.run(_serve(parser.parse_args()))
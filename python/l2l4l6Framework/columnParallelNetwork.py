@@ -0,0 +1,256 @@
+"""
+L2-L4-L6a network with columns computed in parallel worker processes.
+
+Within one iteration the columns are independent, they are coupled only by the lateral
+links between L2 regions, which have propagationDelay=1. So columns are split across worker
+processes, each worker has its own htm.core network with its columns only (see columns of
+createMultipleL246aNetwork) and feedForwardOutput of the other columns from the previous
+iteration is fed in through "remoteL2_<column>" sensors. Workers exchange only these outputs,
+through double buffered shared memory, and wait for each other once per iteration.
+
+Regions of every column are created with the same parameters and seeds as in the serial
+network, so results are the same as of L2_L4_L6_Network, only latency of an iteration scales
+with the number of cores instead of the number of columns.
+"""
+import ctypes
+import multiprocessing
+import traceback
+
+import numpy as np
+
+from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network, createNetworkInstance
+from l2l4l6Framework.regionRegistry import selectRegions
+
+
+def partitionColumns(numColumns, processes):
+  """
+    Splits columns into at most processes contiguous groups of nearly equal size.
+    """
+  return [group.tolist() for group in np.array_split(np.arange(numColumns), min(processes, numColumns))]
+
+
+class LateralExchange(object):
+  """
+    feedForwardOutput of every L2 column in shared memory, one buffer for the current iteration
+    and one for the previous. Iteration i is written only after all workers finished reading
+    iteration i - 2, because all of them passed the barrier of iteration i - 1.
+    """
+
+  def __init__(self, buffer, numColumns, cellCount):
+    self.outputs = np.frombuffer(buffer, dtype=np.uint8).reshape(2, numColumns, cellCount)
+
+  @staticmethod
+  def allocate(context, numColumns, cellCount):
+    return context.RawArray(ctypes.c_uint8, 2 * numColumns * cellCount)
+
+  def write(self, iteration, column, output):
+    self.outputs[iteration % 2, column] = np.asarray(output) != 0
+
+  def read(self, iteration, column):
+    """
+        Returns active cells of the column in the iteration, no cells before the first one.
+        """
+    if iteration < 0:
+      return []
+    return self.outputs[iteration % 2, column].nonzero()[0].tolist()
+
+
+def _work(connection, columns, numColumns, L2Params, L4Params, L6aParams, regionImplementations, buffer, barrier):
+  from htm.advanced.support.register_regions import registerAllAdvancedRegions
+  # factories import htm.advanced location framework, only needed when network is built
+  from l2l4l6Framework.multi_l2_l4_l6_networkFactory import REMOTE_L2, createMultipleL246aNetwork
+
+  try:
+    registerAllAdvancedRegions()
+    regions = selectRegions(regionImplementations)
+    network = createNetworkInstance("htm")
+    createMultipleL246aNetwork(network=network,
+                               numberOfColumns=numColumns,
+                               L2Params=L2Params,
+                               L4Params=L4Params,
+                               L6aParams=L6aParams,
+                               columns=columns,
+                               regions=regions)
+    network.initialize()
+
+    exchange = LateralExchange(buffer, numColumns, L2Params["cellCount"])
+    remoteSensors = {col: network.getRegion(REMOTE_L2 + str(col))
+                     for col in range(numColumns) if col not in columns and numColumns > 1}
+    L2Regions = {col: network.getRegion("L2_" + str(col)) for col in columns}
+    L2Output = regions["L2"].output("feedForwardOutput")
+    iteration = 0
+    connection.send(None)
+  except Exception:
+    connection.send(traceback.format_exc())
+    return
+
+  while True:
+    commands, request, args = connection.recv()
+    try:
+      for name, method, methodArgs in commands:
+        getattr(network.getRegion(name), method)(*methodArgs)
+
+      reply = None
+      if request == "run":
+        for _ in range(args):
+          for col, sensor in remoteSensors.items():
+            sensor.executeCommand('addDataToQueue', exchange.read(iteration - 1, col), False, 0)
+          network.run(1)
+          for col, L2 in L2Regions.items():
+            exchange.write(iteration, col, L2.getOutputArray(L2Output))
+          barrier.wait()
+          iteration += 1
+      elif request == "outputs":
+        reply = {(name, output): np.array(network.getRegion(name).getOutputArray(output))
+                 for name, output in args}
+      elif request == "close":
+        connection.send(None)
+        return
+      connection.send(reply)
+    except Exception:
+      barrier.abort()  # don't let other workers wait for this one
+      connection.send(RuntimeError(traceback.format_exc()))
+
+
+class _RegionProxy(object):
+  """
+    Region of a column computed by a worker, commands are sent with the next request
+    to the worker and outputs are read from the worker.
+    """
+
+  def __init__(self, owner, worker, name):
+    self.owner = owner
+    self.worker = worker
+    self.name = name
+
+  def executeCommand(self, *args):
+    self.owner._queue(self.worker, self.name, "executeCommand", args)
+
+  def setParameterBool(self, *args):
+    self.owner._queue(self.worker, self.name, "setParameterBool", args)
+
+  def getOutputArray(self, output):
+    return self.owner._getOutput(self.name, output)
+
+
+class ColumnParallelNetwork(L2_L4_L6_Network):
+  """
+    L2_L4_L6_Network with columns computed by worker processes, see module description.
+    Call close() to stop the workers. Checkpoints (save) are not supported.
+
+    :param processes: number of worker processes, columns are split evenly between them
+    :param regionImplementations: region type of some roles, see L2_L4_L6_Network
+    """
+
+  def __init__(self, numColumns, L2Params, L4Params, L6aParams, repeat, processes=None, regionImplementations=None):
+    self.logCalls = False
+    self.backend = "htm"
+    self.numColumns = numColumns
+    self.repeat = repeat
+    self.iteration = 0
+    self.dimensions = L6aParams.get("dimensions", 2) if L6aParams is not None else 2
+    self.sdrSize = L2Params["sdrSize"]
+    self.L2CellCount = L2Params["cellCount"]
+    self.learnedObjects = {}
+    self._objectMatrices = None
+    self.recordOverlaps = False
+    self.onSensation = None
+    self.network = None
+    self.regionImplementations = regionImplementations
+    self.regions = selectRegions(regionImplementations)
+
+    # spawned workers, htm.core of this process may have threads which don't survive fork
+    context = multiprocessing.get_context("spawn")
+    self.columns = partitionColumns(numColumns, processes or multiprocessing.cpu_count())
+    self._buffer = LateralExchange.allocate(context, numColumns, self.L2CellCount)
+    barrier = context.Barrier(len(self.columns))
+
+    self._connections = []
+    self._workers = []
+    self._commands = []
+    self._outputs = {}
+    for columns in self.columns:
+      connection, workerConnection = context.Pipe()
+      worker = context.Process(target=_work, daemon=True,
+                               args=(workerConnection, columns, numColumns, L2Params, L4Params, L6aParams,
+                                     regionImplementations, self._buffer, barrier))
+      worker.start()
+      self._connections.append(connection)
+      self._workers.append(worker)
+      self._commands.append([])
+
+    for connection in self._connections:
+      error = connection.recv()
+      if error is not None:
+        self.close()
+        raise RuntimeError("Worker failed to create the network:\n" + error)
+
+    self._findRegions()
+
+  def _findRegions(self):
+    self.sensorInput = []
+    self.motorInput = []
+    self.L2Regions = []
+    self.L4Regions = []
+    self.L6aRegions = []
+    for worker, columns in enumerate(self.columns):
+      for col in columns:
+        col = str(col)
+        self.sensorInput.append(_RegionProxy(self, worker, "sensorInput_" + col))
+        self.motorInput.append(_RegionProxy(self, worker, "motorInput_" + col))
+        self.L2Regions.append(_RegionProxy(self, worker, "L2_" + col))
+        self.L4Regions.append(_RegionProxy(self, worker, "L4_" + col))
+        self.L6aRegions.append(_RegionProxy(self, worker, "L6a_" + col))
+
+  def _queue(self, worker, name, method, args):
+    self._commands[worker].append((name, method, args))
+
+  def _request(self, request, args=None):
+    """
+        Sends the request with queued commands to all workers, they compute it in parallel.
+
+        :return: list of replies of the workers
+        """
+    for worker, connection in enumerate(self._connections):
+      connection.send((self._commands[worker], request, args[worker] if isinstance(args, list) else args))
+      self._commands[worker] = []
+
+    replies = [connection.recv() for connection in self._connections]
+    for reply in replies:
+      if isinstance(reply, Exception):
+        raise reply
+    return replies
+
+  def _getOutput(self, name, output):
+    """
+        Returns the output of the region, outputs of the same layer of all columns are read
+        at once and kept until the network runs again.
+        """
+    if (name, output) not in self._outputs:
+      layer = name.rsplit("_", 1)[0]
+      requests = [[(layer + "_" + str(col), output) for col in columns] for columns in self.columns]
+      for reply in self._request("outputs", requests):
+        self._outputs.update(reply)
+    return self._outputs[(name, output)]
+
+  def run(self, iterations):
+    self._request("run", iterations)
+    self._outputs = {}
+    self.iteration += iterations
+
+  def save(self, path):
+    raise RuntimeError("Checkpoints of column parallel network are not supported, use L2_L4_L6_Network")
+
+  def close(self):
+    for connection, worker in zip(self._connections, self._workers):
+      if worker.is_alive():
+        try:
+          connection.send(([], "close", None))
+          connection.recv()
+        except (EOFError, OSError):
+          pass
+      worker.join(timeout=5)
+      if worker.is_alive():
+        worker.terminate()
+    self._connections = []
+    self._workers = []
@@ -21,18 +21,59 @@ This file contains main class, which represents network containing one or severa
 
 This is the top level class for experiments. This class contains "self.network" instance, which is "NetworkAPI network".
 """
+import os
+import pickle
 import sys
 import numpy as np
 
-#from htm.bindings.engine_internal import Network
-from pandaBaker.pandaNetwork import Network
+from l2l4l6Framework.regionRegistry import selectRegions
 
-from l2l4l6Framework.multi_l2_l4_l6_networkFactory import createMultipleL246aNetwork
+try:
+  from htm.advanced.support.logging_decorator import LoggingDecorator
+except ImportError:  # htm.core is not needed by the "numpy" backend
+  class LoggingDecorator(object):
+    def __call__(self, function):
+      return function
 
-from htm.advanced.support.logging_decorator import LoggingDecorator
+    @staticmethod
+    def load(filename):
+      raise RuntimeError("Call logs need htm.core")
 
 np.set_printoptions(formatter={'float': '{: 0.3f}'.format})
 
+# "htm" - plain htm.core Network, "pandaVis" - pandaBaker wrapper, which can bake data for HTMpandaVis,
+# "numpy" - fast surrogate without htm.core for tests of the pipeline (see surrogateNetwork)
+BACKENDS = ("htm", "pandaVis", "numpy")
+
+# files of checkpoint directory, see L2_L4_L6_Network.save
+CHECKPOINT_NETWORK_FILE = "network.htm"
+CHECKPOINT_STATE_FILE = "state.pkl"
+
+
+def checkpointBackend(path):
+  """
+    Returns backend of network saved by L2_L4_L6_Network.save, "htm" or "numpy". Advanced
+    regions need to be registered only for "htm" checkpoints.
+    """
+  with open(os.path.join(path, CHECKPOINT_STATE_FILE), "rb") as f:
+    return pickle.load(f).get("backend", "htm")
+
+
+def createNetworkInstance(backend="htm"):
+  """
+    Creates empty network of given backend. pandaBaker is imported only when requested,
+    so it is not needed (and costs nothing) for runs without visualisation.
+    """
+  if backend == "htm":
+    from htm.bindings.engine_internal import Network
+  elif backend == "pandaVis":
+    from pandaBaker.pandaNetwork import Network
+  elif backend == "numpy":
+    raise RuntimeError("Network of the numpy backend is created with its regions, use SurrogateNetwork")
+  else:
+    raise RuntimeError("Unknown network backend '" + str(backend) + "', use one of " + str(BACKENDS))
+  return Network()
+
 class L2_L4_L6_Network(object):
   """
     This class allows to easily create experiments using a L2-L4-L6a network for
@@ -61,7 +102,8 @@ class L2_L4_L6_Network(object):
     return exp
 
   @LoggingDecorator()
-  def __init__(self, numColumns, L2Params, L4Params, L6aParams, repeat, logCalls=False):
+  def __init__(self, numColumns, L2Params, L4Params, L6aParams, repeat, logCalls=False, backend="htm",
+               regionImplementations=None):
     """
         Create a network consisting of multiple columns. Each column contains one L2,
         one L4 and one L6a layers. In addition all the L2 columns are fully
@@ -83,6 +125,13 @@ class L2_L4_L6_Network(object):
                                          rerunExperimentFromLogfile which is very useful for
                                          debugging.
         :type logCalls: bool
+        :param backend: "htm" for plain htm.core Network, "pandaVis" for pandaBaker
+                                        Network used to bake data for HTMpandaVis, "numpy" for
+                                        surrogate network without htm.core
+        :type backend: str
+        :param regionImplementations: region type of some roles ("L4", "L2", ...) instead of
+                                      the default selection (see regionRegistry.selectRegions)
+        :type regionImplementations: dict[str, str] or None
         """
     # Handle logging - this has to be done first
     self.logCalls = logCalls
@@ -90,26 +139,27 @@ class L2_L4_L6_Network(object):
     self.numColumns = numColumns
     self.repeat = repeat
 
-    network = Network()
-    self.network = createMultipleL246aNetwork(network=network,
-                                                     numberOfColumns=self.numColumns,
-                                                     L2Params=L2Params,
-                                                     L4Params=L4Params,
-                                                     L6aParams=L6aParams)
-    network.initialize()
+    self.backend = backend
+    self.iteration = 0  # number of network iterations run so far
+    self.regionImplementations = regionImplementations
+    self.regions = selectRegions(regionImplementations)
 
-    self.sensorInput = []
-    self.motorInput = []
-    self.L2Regions = []
-    self.L4Regions = []
-    self.L6aRegions = []
-    for i in range(self.numColumns):
-      col = str(i)
-      self.sensorInput.append(network.getRegion("sensorInput_" + col))
-      self.motorInput.append(network.getRegion("motorInput_" + col))
-      self.L2Regions.append(network.getRegion("L2_" + col))
-      self.L4Regions.append(network.getRegion("L4_" + col))
-      self.L6aRegions.append(network.getRegion("L6a_" + col))
+    if backend == "numpy":
+      from l2l4l6Framework.surrogateNetwork import SurrogateNetwork
+      self.network = SurrogateNetwork(self.numColumns, L2Params, L4Params, L6aParams)
+    else:
+      # factories import htm.advanced location framework, only needed when network is built
+      from l2l4l6Framework.multi_l2_l4_l6_networkFactory import createMultipleL246aNetwork
+
+      network = createNetworkInstance(backend)
+      self.network = createMultipleL246aNetwork(network=network,
+                                                       numberOfColumns=self.numColumns,
+                                                       L2Params=L2Params,
+                                                       L4Params=L4Params,
+                                                       L6aParams=L6aParams,
+                                                       regions=self.regions)
+      network.initialize()
+    self._findRegions()
 
     if L6aParams is not None and "dimensions" in L6aParams:
       self.dimensions = L6aParams["dimensions"]
@@ -117,26 +167,111 @@ class L2_L4_L6_Network(object):
       self.dimensions = 2
 
     self.sdrSize = L2Params["sdrSize"]
+    self.L2CellCount = L2Params["cellCount"]
 
     # will be populated during training
     self.learnedObjects = {}
+    self._objectMatrices = None  # learned L2 SDRs as dense matrices, see getL2Overlaps
+
+    # if True, inference stats contain also "L2 overlaps" - overlap with every learned object,
+    # so any classification threshold can be evaluated offline (see experimentFramework.overlapEvaluation)
+    self.recordOverlaps = False
+
+    # optional callback(objectName, sensationIndex) called after each sensation is computed,
+    # e.g. for live visualisation. When set, learning runs network sensation by sensation.
+    self.onSensation = None
+
+  def _findRegions(self):
+    self.sensorInput = []
+    self.motorInput = []
+    self.L2Regions = []
+    self.L4Regions = []
+    self.L6aRegions = []
+    for i in range(self.numColumns):
+      col = str(i)
+      self.sensorInput.append(self.network.getRegion("sensorInput_" + col))
+      self.motorInput.append(self.network.getRegion("motorInput_" + col))
+      self.L2Regions.append(self.network.getRegion("L2_" + col))
+      self.L4Regions.append(self.network.getRegion("L4_" + col))
+      self.L6aRegions.append(self.network.getRegion("L6a_" + col))
+
+  def save(self, path):
+    """
+        Saves trained network as checkpoint - directory with serialized htm.core network
+        and learned object representations. Advanced regions must be registered
+        (registerAllAdvancedRegions) before "htm" checkpoint is loaded, see checkpointBackend.
+        """
+    os.makedirs(path, exist_ok=True)
+    self.network.saveToFile(os.path.join(path, CHECKPOINT_NETWORK_FILE))
+
+    state = {
+      "backend": "numpy" if self.backend == "numpy" else "htm",
+      "numColumns": self.numColumns,
+      "repeat": self.repeat,
+      "dimensions": self.dimensions,
+      "sdrSize": self.sdrSize,
+      "L2CellCount": self.L2CellCount,
+      "iteration": self.iteration,
+      "learnedObjects": self.learnedObjects,
+      "regionImplementations": {role: implementation.regionType for role, implementation in self.regions.items()},
+    }
+    with open(os.path.join(path, CHECKPOINT_STATE_FILE), "wb") as f:
+      pickle.dump(state, f)
+
+  @classmethod
+  def load(cls, path):
+    """
+        Loads checkpoint created by save(). Network uses the "htm" backend, or "numpy"
+        if it was saved by the numpy backend.
+        """
+    with open(os.path.join(path, CHECKPOINT_STATE_FILE), "rb") as f:
+      state = pickle.load(f)
+
+    self = cls.__new__(cls)
+    self.logCalls = False
+    self.backend = state.get("backend", "htm")
+    self.numColumns = state["numColumns"]
+    self.repeat = state["repeat"]
+    self.dimensions = state["dimensions"]
+    self.sdrSize = state["sdrSize"]
+    self.L2CellCount = state["L2CellCount"]
+    self.iteration = state["iteration"]
+    self.learnedObjects = state["learnedObjects"]
+    self._objectMatrices = None
+    self.recordOverlaps = False
+    self.onSensation = None
+    self.regionImplementations = state.get("regionImplementations")
+    self.regions = selectRegions(self.regionImplementations)
+
+    if self.backend == "numpy":
+      from l2l4l6Framework.surrogateNetwork import SurrogateNetwork
+      self.network = SurrogateNetwork.loadFromFile(os.path.join(path, CHECKPOINT_NETWORK_FILE))
+    else:
+      self.network = createNetworkInstance("htm")
+      self.network.loadFromFile(os.path.join(path, CHECKPOINT_NETWORK_FILE))
+    self._findRegions()
+    return self
 
   @LoggingDecorator()
   def sendReset(self):
-    print("Reset - at iter. " + str(self.network.iteration))
+    print("Reset - at iter. " + str(self.iteration))
     for col in range(self.numColumns):
       displacement = [0] * self.dimensions
       self.sensorInput[col].executeCommand('addDataToQueue', [], True, 0)
       self.motorInput[col].executeCommand('addDataToQueue', displacement, True)
 
-    self.network.run(1)
+    self.run(1)
+
+  def run(self, iterations):
+    self.network.run(iterations)
+    self.iteration += iterations
 
   @LoggingDecorator()
   def setLearning(self, learn):
     for col in range(self.numColumns):
-      self.L2Regions[col].setParameterBool("learningMode", learn)
-      self.L4Regions[col].setParameterBool("learn", learn)
-      self.L6aRegions[col].setParameterBool("learningMode", learn)
+      self.L2Regions[col].setParameterBool(self.regions["L2"].parameter("learningMode"), learn)
+      self.L4Regions[col].setParameterBool(self.regions["L4"].parameter("learn"), learn)
+      self.L6aRegions[col].setParameterBool(self.regions["L6a"].parameter("learningMode"), learn)
 
   @LoggingDecorator()
   def learn(self, objects):
@@ -160,7 +295,7 @@ class L2_L4_L6_Network(object):
       numFeatures = len(sensationList[0])
       displacement = [0] * self.dimensions
 
-      print("Learning of object '" + str(objectName) + "' starting at iter. " + str(self.network.iteration))
+      print("Learning of object '" + str(objectName) + "' starting at iter. " + str(self.iteration))
       print("Features:" + str(numFeatures) + ", repeating:" + str(
         self.repeat))
 
@@ -182,14 +317,19 @@ class L2_L4_L6_Network(object):
             # Only move to the location on the first sensation.
             displacement = [0] * self.dimensions
 
-      self.network.run(self.repeat * numFeatures)
+        if self.onSensation is not None:
+          self.run(self.repeat)
+          self.onSensation(objectName, sensation)
+
+      if self.onSensation is None:
+        self.run(self.repeat * numFeatures)
 
       # update L2 representations for the object
       self.learnedObjects[objectName] = self.getL2Representations()
 
-      print("Done at iter." + str(self.network.iteration))
+      print("Done at iter." + str(self.iteration))
 
-  def infer(self, sensations, stats=None, objname=None):
+  def infer(self, sensations, stats=None, objname=None, resetEvery=None):
     """
         Attempt to recognize the object given a list of sensations.
         You may use :meth:`getCurrentClassification` to extract the current object
@@ -208,6 +348,10 @@ class L2_L4_L6_Network(object):
         :type stats: defaultdict[str, list]
         :param objname: Name of the inferred object, if known
         :type objname: str or None
+        :param resetEvery: if set, network is reset after every resetEvery sensations, so
+                                             several sensation streams concatenated together are inferred
+                                             independently in one call
+        :type resetEvery: int or None
         """
     self.setLearning(False)
 
@@ -216,11 +360,16 @@ class L2_L4_L6_Network(object):
     prevLoc = [None] * self.numColumns
     numFeatures = len(sensations[0])
 
-    print("Inferring of object '" + str(objname) + "' starting at iter. " + str(self.network.iteration))
+    print("Inferring of object '" + str(objname) + "' starting at iter. " + str(self.iteration))
     print("Columns:" + str(self.numColumns) + ", numFeatures:" + str(
       numFeatures))
 
     for sensation in range(numFeatures):
+      if resetEvery and sensation > 0 and sensation % resetEvery == 0:
+        self.sendReset()
+        prevLoc = [None] * self.numColumns
+
+      step = []
       for col in range(self.numColumns):
         assert numFeatures == len(sensations[col])
 
@@ -232,16 +381,38 @@ class L2_L4_L6_Network(object):
         if prevLoc[col] is not None:
           displacement = location - prevLoc[col]
         prevLoc[col] = location
+        step.append((displacement, feature))
 
-        self.motorInput[col].executeCommand('addDataToQueue', displacement)
-        self.sensorInput[col].executeCommand('addDataToQueue', feature, False, 0)
-
-      self.network.run(1)
+      self.inferStep(step)
 
       if stats is not None:
         self.updateInferenceStats(stats=stats, objectName=objname)
 
-    print("Done at iter." + str(self.network.iteration))
+      if self.onSensation is not None:
+        self.onSensation(objname, sensation)
+
+    print("Done at iter." + str(self.iteration))
+
+  def startInference(self):
+    """
+        Prepares network for inference step by step with inferStep (infer does this itself).
+        """
+    self.setLearning(False)
+    self.sendReset()
+
+  def inferStep(self, sensation):
+    """
+        Computes one inference step.
+
+        :param sensation: (displacement, feature SDR) for each column, displacement is movement
+                                            from the previous location, zeros for the first sensation
+        :type sensation: list[tuple[list[int], list[int]]]
+        """
+    for col, (displacement, feature) in enumerate(sensation):
+      self.motorInput[col].executeCommand('addDataToQueue', displacement)
+      self.sensorInput[col].executeCommand('addDataToQueue', feature, False, 0)
+
+    self.run(1)
 
   def updateInferenceStats(self, stats, objectName=None):
     """
@@ -280,48 +451,79 @@ class L2_L4_L6_Network(object):
 
     stats["Actual classification"].append(self.getCurrentClassification())
 
+    if self.recordOverlaps:
+      stats["L2 overlaps"].append(self.getL2Overlaps())
+
+  def _output(self, role, name):
+    return self.regions[role].output(name)
+
+  def _cells(self, role, regions, name):
+    output = self._output(role, name)
+    return [set(np.array(region.getOutputArray(output)).nonzero()[0]) for region in regions]
+
   def getL2Representations(self):
     """
         Returns the active representation in L2.
         """
-    return [set(np.array(L2.getOutputArray("activeCells")).nonzero()[0]) for L2 in self.L2Regions]
+    return self._cells("L2", self.L2Regions, "activeCells")
+
+  def getL2Overlaps(self):
+    """
+        Returns overlap of the current L2 activity with representation of every learned object.
+
+        :return: int array [column, object], objects are in order of self.learnedObjects
+        """
+    names = list(self.learnedObjects)
+    if self._objectMatrices is None or self._objectMatrices[0] != names:
+      matrices = np.zeros((self.numColumns, len(names), self.L2CellCount), dtype=bool)
+      for i, name in enumerate(names):
+        for col in range(self.numColumns):
+          matrices[col, i, list(self.learnedObjects[name][col])] = True
+      self._objectMatrices = (names, matrices)
+
+    matrices = self._objectMatrices[1]
+    overlaps = np.zeros((self.numColumns, len(names)), dtype=np.int32)
+    for col, L2 in enumerate(self.L2Regions):
+      active = np.array(L2.getOutputArray(self._output("L2", "activeCells"))) != 0
+      overlaps[col] = matrices[col][:, active].sum(axis=1, dtype=np.int32)
+    return overlaps
 
   def getL4Representations(self):
     """
         Returns the active representation in L4.
         """
-    return [set(np.array(L4.getOutputArray("activeCells")).nonzero()[0]) for L4 in self.L4Regions]
+    return self._cells("L4", self.L4Regions, "activeCells")
 
   def getL4PredictedCells(self):
     """
         Returns the cells in L4 that were predicted by the location input.
         """
-    return [set(np.array(L4.getOutputArray("predictedCells")).nonzero()[0]) for L4 in self.L4Regions]
+    return self._cells("L4", self.L4Regions, "predictedCells")
 
   def getL4PredictedActiveCells(self):
     """
         Returns the cells in L4 that were predicted by the location signal
         and are currently active.    Does not consider apical input.
         """
-    return [set(np.array(L4.getOutputArray("predictedActiveCells")).nonzero()[0]) for L4 in self.L4Regions]
+    return self._cells("L4", self.L4Regions, "predictedActiveCells")
 
   def getL6aRepresentations(self):
     """
         Returns the active representation in L6a.
         """
-    return [set(np.array(L6a.getOutputArray("activeCells")).nonzero()[0]) for L6a in self.L6aRegions]
+    return self._cells("L6a", self.L6aRegions, "activeCells")
 
   def getL6aLearnableCells(self):
     """
         Returns the sensoryAssociatedCells in L6a.
         """
-    return [set(np.array(L6a.getOutputArray("learnableCells")).nonzero()[0]) for L6a in self.L6aRegions]
+    return self._cells("L6a", self.L6aRegions, "learnableCells")
 
   def getL6aSensoryAssociatedCells(self):
     """
         Returns the sensoryAssociatedCells in L6a.
         """
-    return [set(np.array(L6a.getOutputArray("sensoryAssociatedCells")).nonzero()[0]) for L6a in self.L6aRegions]
+    return self._cells("L6a", self.L6aRegions, "sensoryAssociatedCells")
 
   def isObjectClassified(self, objectName, minOverlap=None, maxL2Size=None):
     """
@@ -1,10 +1,10 @@
-import json
 import copy
 from l2l4l6Framework.l4_l6_networkFactory import createL4L6Nework
+from l2l4l6Framework.regionRegistry import addRegion, linkRegions, selectRegions
 
 def createL246Nework(network, L2Params, L4Params, L6aParams,
                               baselineCellsPerAxis=6,
-                              inverseReadoutResolution=None, suffix=""):
+                              inverseReadoutResolution=None, suffix="", regions=None):
   """
     Create a single column network composed of L2, L4 and L6a layers.
     L2 layer computes the object representation using :class:`ColumnPoolerRegion`,
@@ -71,6 +71,9 @@ def createL246Nework(network, L2Params, L4Params, L6aParams,
     :param suffix: optional string suffix appended to region name. Useful when
                                  creating multicolumn networks.
     :type suffix: str
+    :param regions: implementation of every region role, see regionRegistry.selectRegions,
+                                 default selection if None
+    :type regions: dict[str, RegionImplementation]
     :return: Reference to the given network
     :rtype: Network
     """
@@ -91,24 +94,26 @@ def createL246Nework(network, L2Params, L4Params, L6aParams,
                                       L6aParams=L6aParams,
                                       inverseReadoutResolution=inverseReadoutResolution,
                                       baselineCellsPerAxis=baselineCellsPerAxis,
-                                      suffix=suffix)
+                                      suffix=suffix,
+                                      regions=regions)
   L4Name = "L4" + suffix
   sensorInputName = "sensorInput" + suffix
 
   # Add L2 - L4 object layers
   L2Name = "L2" + suffix
-  network.addRegion(L2Name, "py.ColumnPoolerRegion", json.dumps(L2Params))
+  regions = regions or selectRegions()
+  sensor, L4, L2 = regions["sensor"], regions["L4"], regions["L2"]
+  addRegion(network, L2Name, L2, L2Params)
 
   # Link L4 to L2
-  network.link(L4Name, L2Name, "UniformLink", "", srcOutput="activeCells", destInput="feedforwardInput")
-  network.link(L4Name, L2Name, "UniformLink", "", srcOutput="winnerCells", destInput="feedforwardGrowthCandidates")
+  linkRegions(network, L4Name, L4, "activeCells", L2Name, L2, "feedforwardInput")
+  linkRegions(network, L4Name, L4, "winnerCells", L2Name, L2, "feedforwardGrowthCandidates")
 
   # Link L2 feedback to L4
-  network.link(L2Name, L4Name, "UniformLink", "", srcOutput="feedForwardOutput", destInput="apicalInput",
-               propagationDelay=1)
+  linkRegions(network, L2Name, L2, "feedForwardOutput", L4Name, L4, "apicalInput", propagationDelay=1)
 
   # Link reset output to L2
-  network.link(sensorInputName, L2Name, "UniformLink", "", srcOutput="resetOut", destInput="resetIn")
+  linkRegions(network, sensorInputName, sensor, "resetOut", L2Name, L2, "resetIn")
 
   # Set L2 phase to be after L4
   network.setPhases(L2Name, set([3]))
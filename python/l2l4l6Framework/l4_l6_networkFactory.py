@@ -1,11 +1,11 @@
-import json
 import copy
 from htm.advanced.frameworks.location.path_integration_union_narrowing import \
   computeRatModuleParametersFromReadoutResolution
 from htm.advanced.frameworks.location.path_integration_union_narrowing import computeRatModuleParametersFromCellCount
+from l2l4l6Framework.regionRegistry import addRegion, linkRegions, selectRegions
 
 def createL4L6Nework(network, L4Params, L6aParams, inverseReadoutResolution=None, baselineCellsPerAxis=6,
-                              suffix=""):
+                              suffix="", regions=None):
   """
     Create a single column network containing L4 and L6a layers. L4 layer
     processes sensor inputs while L6a processes motor commands using grid cell
@@ -62,6 +62,9 @@ def createL4L6Nework(network, L4Params, L6aParams, inverseReadoutResolution=None
     :param suffix: optional string suffix appended to region name. Useful when
                                  creating multicolumn networks.
     :type suffix: str
+    :param regions: implementation of every region role, see regionRegistry.selectRegions,
+                                 default selection if None
+    :type regions: dict[str, RegionImplementation]
 
     :return: Reference to the given network
     :rtype: Network
@@ -96,28 +99,30 @@ def createL4L6Nework(network, L4Params, L6aParams, inverseReadoutResolution=None
   L6aName = "L6a" + suffix
   dimensions = L6aParams.get("dimensions", 2)
 
-  network.addRegion(sensorInputName, "py.RawSensor", json.dumps({"outputWidth": columnCount}))
-  network.addRegion(motorInputName, "py.RawValues", json.dumps({"outputWidth": dimensions}))
-  network.addRegion(L4Name, "py.ApicalTMPairRegion", json.dumps(L4Params))
-  network.addRegion(L6aName, "py.GridCellLocationRegion", json.dumps(L6aParams))
+  regions = regions or selectRegions()
+  sensor, motor, L4, L6a = regions["sensor"], regions["motor"], regions["L4"], regions["L6a"]
+  addRegion(network, sensorInputName, sensor, {"outputWidth": columnCount})
+  addRegion(network, motorInputName, motor, {"outputWidth": dimensions})
+  addRegion(network, L4Name, L4, L4Params)
+  addRegion(network, L6aName, L6a, L6aParams)
 
   # Link sensory input to L4
-  network.link(sensorInputName, L4Name, "UniformLink", "", srcOutput="dataOut", destInput="activeColumns")
+  linkRegions(network, sensorInputName, sensor, "dataOut", L4Name, L4, "activeColumns")
 
   # Link motor input to L6a
-  network.link(motorInputName, L6aName, "UniformLink", "", srcOutput="dataOut", destInput="displacement")
+  linkRegions(network, motorInputName, motor, "dataOut", L6aName, L6a, "displacement")
 
   # Link L6a to L4
-  network.link(L6aName, L4Name, "UniformLink", "", srcOutput="activeCells", destInput="basalInput")
-  network.link(L6aName, L4Name, "UniformLink", "", srcOutput="learnableCells", destInput="basalGrowthCandidates")
+  linkRegions(network, L6aName, L6a, "activeCells", L4Name, L4, "basalInput")
+  linkRegions(network, L6aName, L6a, "learnableCells", L4Name, L4, "basalGrowthCandidates")
 
   # Link L4 feedback to L6a
-  network.link(L4Name, L6aName, "UniformLink", "", srcOutput="activeCells", destInput="anchorInput")
-  network.link(L4Name, L6aName, "UniformLink", "", srcOutput="winnerCells", destInput="anchorGrowthCandidates")
+  linkRegions(network, L4Name, L4, "activeCells", L6aName, L6a, "anchorInput")
+  linkRegions(network, L4Name, L4, "winnerCells", L6aName, L6a, "anchorGrowthCandidates")
 
   # Link reset signal to L4 and L6a
-  network.link(sensorInputName, L4Name, "UniformLink", "", srcOutput="resetOut", destInput="resetIn")
-  network.link(sensorInputName, L6aName, "UniformLink", "", srcOutput="resetOut", destInput="resetIn")
+  linkRegions(network, sensorInputName, sensor, "resetOut", L4Name, L4, "resetIn")
+  linkRegions(network, sensorInputName, sensor, "resetOut", L6aName, L6a, "resetIn")
 
   # Set phases appropriately
   network.setPhases(motorInputName, set([0]))
@@ -1,10 +1,17 @@
 import copy
+
 from l2l4l6Framework.l2_l4_l6_networkFactory import createL246Nework
+from l2l4l6Framework.regionRegistry import addRegion, linkRegions, selectRegions
+
+# prefix of regions feeding lateral input from columns computed by other process
+REMOTE_L2 = "remoteL2_"
 
 def createMultipleL246aNetwork(network, numberOfColumns, L2Params,
                                       L4Params, L6aParams,
                                       inverseReadoutResolution=None,
-                                      baselineCellsPerAxis=6):
+                                      baselineCellsPerAxis=6,
+                                      columns=None,
+                                      regions=None):
   """
     Create a network consisting of multiple columns. Each column contains one L2,
     one L4 and one L6a layers identical in structure to the network created by
@@ -68,9 +75,18 @@ def createMultipleL246aNetwork(network, numberOfColumns, L2Params,
         that the readout resolution is approximately 1/3. If baselineCellsPerAxis=8,
         the readout resolution is approximately 1/4
     :type baselineCellsPerAxis: int or float
+    :param columns: indices of columns to create, all by default. Lateral input from every
+        column which is not created comes from region "remoteL2_<column>" (py.RawSensor) with
+        no delay, its data must be the feedForwardOutput of that column from the previous
+        iteration (see columnParallelNetwork). Columns get the same seeds as in the full network.
+    :type columns: list[int] or None
+    :param regions: implementation of every region role, see regionRegistry.selectRegions,
+        default selection if None
+    :type regions: dict[str, RegionImplementation]
     :return: Reference to the given network
     :rtype: Network
     """
+  regions = regions or selectRegions()
   L2Params = copy.deepcopy(L2Params)
   L4Params = copy.deepcopy(L4Params)
   L6aParams = copy.deepcopy(L6aParams)
@@ -84,6 +100,9 @@ def createMultipleL246aNetwork(network, numberOfColumns, L2Params,
     L4Params["seed"] = L4Params.get("seed", 42) + i
     L6aParams["seed"] = L6aParams.get("seed", 42) + i
 
+    if columns is not None and i not in columns:
+      continue
+
     # Create column
     network = createL246Nework(network=network,
                                         L2Params=L2Params,
@@ -91,16 +110,26 @@ def createMultipleL246aNetwork(network, numberOfColumns, L2Params,
                                         L6aParams=L6aParams,
                                         inverseReadoutResolution=inverseReadoutResolution,
                                         baselineCellsPerAxis=baselineCellsPerAxis,
-                                        suffix="_" + str(i))
+                                        suffix="_" + str(i),
+                                        regions=regions)
 
-  # Now connect the L2 columns laterally
+  # Now connect the L2 columns laterally, in the same order for all subsets of columns,
+  # so the lateral input of every column is concatenated in the same way
+  sensor, L2 = regions["sensor"], regions["L2"]
   if numberOfColumns > 1:
     for i in range(numberOfColumns):
       src = str(i)
+      remote = columns is not None and i not in columns
+      if remote:
+        addRegion(network, REMOTE_L2 + src, sensor, {"outputWidth": L2Params["cellCount"]})
+        network.setPhases(REMOTE_L2 + src, set([0]))
       for j in range(numberOfColumns):
-        if i != j:
+        if i != j and (columns is None or j in columns):
           dest = str(j)
-          network.link("L2_" + src, "L2_" + dest, "UniformLink", "", srcOutput="feedForwardOutput",
-                       destInput="lateralInput", propagationDelay=1)
+          if remote:
+            linkRegions(network, REMOTE_L2 + src, sensor, "dataOut", "L2_" + dest, L2, "lateralInput")
+          else:
+            linkRegions(network, "L2_" + src, L2, "feedForwardOutput", "L2_" + dest, L2, "lateralInput",
+                        propagationDelay=1)
 
   return network
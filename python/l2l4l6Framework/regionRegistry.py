@@ -0,0 +1,166 @@
+"""
+Registry of region implementations used by the network factories.
+
+Every layer of the column (role) can be computed by several region types - pure Python regions
+of htm.advanced or native C++ regions of htm.core. Implementation maps the inputs, outputs
+and parameters the factories and L2_L4_L6_Network use to names of the region type.
+
+By default the first available exact implementation of each role is selected, exact means its
+outputs are the same as of the Python region (see tests/test_regionRegistry.py, which compares
+them). Approximate implementations, e.g. htm.core TMRegion as L4, which has no apical tiebreak
+and no growth candidate inputs, are used only when selected explicitly:
+
+    createMultipleL246aNetwork(..., regions=selectRegions({"L4": "TMRegion"}))
+"""
+import copy
+import json
+
+ROLES = ("sensor", "motor", "L4", "L6a", "L2")
+
+
+def _htmAvailable(module):
+  try:
+    __import__(module)
+    return True
+  except ImportError:
+    return False
+
+
+class RegionImplementation(object):
+  """
+    :param role: one of ROLES
+    :param regionType: type name for Network.addRegion
+    :param native: True for C++ region of htm.core, False for Python region
+    :param exact: True if outputs are the same as of the Python region of the role
+    :param inputs: input name used by the factories -> input name of the region, None if the region
+        has no such input (link is not created), names not listed are the same
+    :param outputs: output name -> output name of the region, names not listed are the same
+    :param parameters: parameter name -> parameter name of the region, names not listed are the same
+    :param convertParams: function converting region parameters of the factories to parameters of the region
+    """
+
+  def __init__(self, role, regionType, native=False, exact=True, inputs=None, outputs=None, parameters=None,
+               convertParams=None):
+    if role not in ROLES:
+      raise RuntimeError("Unknown region role '" + str(role) + "', use one of " + str(ROLES))
+    self.role = role
+    self.regionType = regionType
+    self.native = native
+    self.exact = exact
+    self.inputs = inputs or {}
+    self.outputs = outputs or {}
+    self.parameters = parameters or {}
+    self.convertParams = convertParams
+
+  def available(self):
+    return _htmAvailable("htm.bindings.engine_internal" if self.native else "htm.advanced")
+
+  def input(self, name):
+    return self.inputs.get(name, name)
+
+  def output(self, name):
+    output = self.outputs.get(name, name)
+    if output is None:
+      raise RuntimeError("Region " + self.regionType + " has no output for '" + str(name) + "'")
+    return output
+
+  def parameter(self, name):
+    return self.parameters.get(name, name)
+
+  def params(self, params):
+    params = copy.deepcopy(params)
+    return self.convertParams(params) if self.convertParams is not None else params
+
+  def __repr__(self):
+    return "RegionImplementation(" + self.role + ", " + self.regionType + ")"
+
+
+def _TMRegionParams(params):
+  return {
+    "numberOfCols": params["columnCount"],
+    "cellsPerColumn": params["cellsPerColumn"],
+    "activationThreshold": params["activationThreshold"],
+    "minThreshold": params["minThreshold"],
+    "initialPermanence": params["initialPermanence"],
+    "connectedPermanence": params["connectedPermanence"],
+    "permanenceIncrement": params["permanenceIncrement"],
+    "permanenceDecrement": params["permanenceDecrement"],
+    "predictedSegmentDecrement": params.get("basalPredictedSegmentDecrement", 0.0),
+    "maxNewSynapseCount": params["sampleSize"],
+    "maxSegmentsPerCell": params["maxSegmentsPerCell"],
+    "maxSynapsesPerSegment": max(params["maxSynapsesPerSegment"], 0) or 255,
+    "externalPredictiveInputs": params["basalInputWidth"],
+    "seed": params.get("seed", 42),
+  }
+
+
+def addRegion(network, name, implementation, params):
+  network.addRegion(name, implementation.regionType, json.dumps(implementation.params(params)))
+
+
+def linkRegions(network, src, srcImplementation, srcOutput, dest, destImplementation, destInput, **kwargs):
+  """
+    Links regions by the output and input names of the factories, link is not created if
+    the destination region has no such input.
+    """
+  destInput = destImplementation.input(destInput)
+  if destInput is not None:
+    network.link(src, dest, "UniformLink", "", srcOutput=srcImplementation.output(srcOutput), destInput=destInput,
+                 **kwargs)
+
+
+# role -> implementations in order of preference
+REGION_IMPLEMENTATIONS = {role: [] for role in ROLES}
+
+
+def registerImplementation(implementation, preferred=False):
+  """
+    Adds implementation of its role, preferred implementations are tried first.
+    """
+  implementations = REGION_IMPLEMENTATIONS[implementation.role]
+  implementations.insert(0 if preferred else len(implementations), implementation)
+
+
+def findImplementation(role, regionType):
+  for implementation in REGION_IMPLEMENTATIONS[role]:
+    if implementation.regionType == regionType:
+      return implementation
+  raise RuntimeError("No implementation '" + str(regionType) + "' of " + str(role) + " is registered")
+
+
+def selectRegions(overrides=None):
+  """
+    Returns dict role -> RegionImplementation, used by the factories.
+
+    :param overrides: dict role -> region type, selected regardless of exactness
+    """
+  overrides = overrides or {}
+  selection = {}
+  for role in ROLES:
+    if role in overrides:
+      selection[role] = findImplementation(role, overrides[role])
+      continue
+    candidates = [i for i in REGION_IMPLEMENTATIONS[role] if i.exact]
+    available = [i for i in candidates if i.available()]
+    # without htm.core nothing is available, keep the default for the error of addRegion
+    selection[role] = (available or candidates)[0]
+  return selection
+
+
+# Python regions of htm.advanced, the reference implementation of every role
+registerImplementation(RegionImplementation("sensor", "py.RawSensor"))
+registerImplementation(RegionImplementation("motor", "py.RawValues"))
+registerImplementation(RegionImplementation("L4", "py.ApicalTMPairRegion"))
+registerImplementation(RegionImplementation("L6a", "py.GridCellLocationRegion"))
+registerImplementation(RegionImplementation("L2", "py.ColumnPoolerRegion"))
+
+# htm.core temporal memory with external basal (L6a) and apical (L2) input. Apical input only
+# adds to the basal context, there is no apical tiebreak, growth candidates are its own active
+# cells and winner cells are not available, so learned representations differ.
+registerImplementation(RegionImplementation(
+  "L4", "TMRegion", native=True, exact=False,
+  inputs={"activeColumns": "bottomUpIn", "basalInput": "externalBasalInput", "apicalInput": "externalApicalInput",
+          "basalGrowthCandidates": None, "apicalGrowthCandidates": None},
+  outputs={"predictedCells": "predictiveCells", "winnerCells": "activeCells"},
+  parameters={"learn": "learningMode"},
+  convertParams=_TMRegionParams))
@@ -0,0 +1,238 @@
+"""
+Pure NumPy surrogate of the htm.core L2-L4-L6a network, used by the "numpy" backend of
+L2_L4_L6_Network.
+
+It has the regions, inputs and outputs of the network created by createMultipleL246aNetwork,
+so L2_L4_L6_Network works with it unchanged, but no HTM learning is computed:
+  - L6a - location is the sum of displacements since reset, hashed into one cell per module
+  - L4 - (location, feature) pair is hashed into one cell of every active column, cells of
+         pairs learned before are also predicted
+  - L2 - every learned object gets a random SDR, inference narrows hypotheses (object, location)
+         to those consistent with all sensed features and movements - as path integration of
+         L6a, but exact - and voting between columns keeps objects of all columns
+
+Everything is deterministic and many orders faster than htm.core, so experiment pipeline,
+stats and classification can be tested without htm.core and framework overhead can be
+measured separately from HTM compute. Recognition results are not comparable with HTM.
+"""
+import hashlib
+import pickle
+from collections import deque
+
+import numpy as np
+
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hashValues(values, salt=0):
+  """
+    Returns deterministic 63 bit hash of integer values (so hashes can be hashed again).
+    """
+  data = np.asarray(values, dtype=np.int64).tobytes()
+  digest = hashlib.blake2b(data, digest_size=8, salt=salt.to_bytes(16, "little")).digest()
+  return int.from_bytes(digest, "little") >> 1
+
+
+def hashCells(key, groups, groupSize):
+  """
+    Hashes key into one cell of each group, groups are numbers of the groups.
+
+    :return: sorted cell indices
+    """
+  groups = np.asarray(groups, dtype=np.uint64)
+  offsets = ((groups + np.uint64(key & 0xFFFFFFFF)) * _MULTIPLIER) >> np.uint64(40)
+  return np.sort(groups * np.uint64(groupSize) + offsets % np.uint64(groupSize)).astype(np.int64)
+
+
+def encodeScalar(value, size, activeBits, minimum, maximum):
+  """
+    Active bits of value encoded as contiguous block, like htm.core ScalarEncoder (input is clipped).
+    """
+  value = min(max(value, minimum), maximum)
+  start = int(round((value - minimum) / (maximum - minimum) * (size - activeBits)))
+  return list(range(start, start + activeBits))
+
+
+def _dense(cells, size):
+  output = np.zeros(size, dtype=np.uint8)
+  output[np.asarray(sorted(cells), dtype=np.int64)] = 1
+  return output
+
+
+class _Region(object):
+
+  def __init__(self, outputs):
+    self.outputs = {name: np.zeros(size, dtype=np.uint8) for name, size in outputs.items()}
+    self.parameters = {}
+
+  def setParameterBool(self, name, value):
+    self.parameters[name] = bool(value)
+
+  def getParameterBool(self, name):
+    return self.parameters.get(name, False)
+
+  def getOutputArray(self, name):
+    return self.outputs[name]
+
+
+class _InputRegion(_Region):
+  """
+    py.RawSensor and py.RawValues - data are queued by executeCommand('addDataToQueue', ...).
+    """
+
+  def __init__(self, outputWidth):
+    super().__init__({"dataOut": outputWidth})
+    self.queue = deque()
+
+  def executeCommand(self, command, data, reset=False, sequenceId=0):
+    if command != "addDataToQueue":
+      raise RuntimeError("Unknown command '" + str(command) + "'")
+    self.queue.append((np.asarray(data), bool(reset)))
+
+  def pop(self):
+    if not self.queue:
+      return np.zeros(0, dtype=np.int64), False
+    return self.queue.popleft()
+
+
+class SurrogateNetwork(object):
+  """
+    :param numColumns: number of columns
+    :param L2Params, L4Params, L6aParams: parameters of the regions as for createMultipleL246aNetwork,
+        only sizes and seeds are used
+    """
+
+  def __init__(self, numColumns, L2Params, L4Params, L6aParams):
+    self.numColumns = numColumns
+    self.dimensions = L6aParams.get("dimensions", 2)
+    self.columnCount = L4Params["columnCount"]
+    self.cellsPerColumn = L4Params["cellsPerColumn"]
+    self.moduleCount = L6aParams["moduleCount"]
+    self.moduleSize = L6aParams["cellsPerAxis"] ** 2
+    self.cellCount = L2Params["cellCount"]
+    self.sdrSize = L2Params["sdrSize"]
+    self.seed = L2Params.get("seed", 42)
+
+    self.regions = {}
+    self.columns = []
+    for i in range(numColumns):
+      col = str(i)
+      self.regions["sensorInput_" + col] = _InputRegion(self.columnCount)
+      self.regions["motorInput_" + col] = _InputRegion(self.dimensions)
+      self.regions["L6a_" + col] = _Region({name: self.moduleCount * self.moduleSize for name in
+                                           ("activeCells", "learnableCells", "sensoryAssociatedCells")})
+      self.regions["L4_" + col] = _Region({name: self.columnCount * self.cellsPerColumn for name in
+                                          ("activeCells", "predictedCells", "predictedActiveCells", "winnerCells")})
+      self.regions["L2_" + col] = _Region({"activeCells": self.cellCount, "feedForwardOutput": self.cellCount})
+      self.columns.append({
+        "location": np.zeros(self.dimensions, dtype=np.int64),
+        "pairs": set(),  # learned (location, feature) hashes
+        "maps": [],  # location -> feature hashes of every learned object
+        "objects": [],  # L2 SDR of every learned object
+        "hypotheses": None,  # possible (object, location) in inference, None after reset
+        "newObject": True,  # next learned sensation starts new object
+      })
+
+  def initialize(self):
+    pass
+
+  def getRegion(self, name):
+    try:
+      return self.regions[name]
+    except KeyError:
+      raise RuntimeError("Unknown region '" + str(name) + "'")
+
+  def _objectSDR(self, col, index):
+    rng = np.random.RandomState((self.seed + col * 1000003 + index) % 2 ** 32)
+    return set(rng.choice(self.cellCount, self.sdrSize, replace=False).tolist())
+
+  def _computeColumn(self, i):
+    col = str(i)
+    column = self.columns[i]
+    feature, reset = self.regions["sensorInput_" + col].pop()
+    displacement, _ = self.regions["motorInput_" + col].pop()
+    L6a = self.regions["L6a_" + col]
+    L4 = self.regions["L4_" + col]
+    learn = L4.getParameterBool("learn")
+
+    if reset:
+      column["location"][:] = 0
+      column["hypotheses"] = None
+      column["newObject"] = True
+      for region in (L6a, L4, self.regions["L2_" + col]):
+        for output in region.outputs.values():
+          output[:] = 0
+      return None
+
+    if len(displacement):
+      column["location"] += np.asarray(displacement, dtype=np.int64)
+    locationKey = hashValues(column["location"], salt=i)
+    featureKey = hashValues(np.sort(feature), salt=i)
+    pairKey = hashValues([locationKey, featureKey])
+
+    locationCells = hashCells(locationKey, np.arange(self.moduleCount), self.moduleSize)
+    known = pairKey in column["pairs"]
+    L6a.outputs["activeCells"][:] = _dense(locationCells, L6a.outputs["activeCells"].size)
+    L6a.outputs["learnableCells"][:] = L6a.outputs["activeCells"] if learn else 0
+    L6a.outputs["sensoryAssociatedCells"][:] = L6a.outputs["activeCells"] if known else 0
+
+    cells = hashCells(pairKey, np.unique(feature), self.cellsPerColumn) if len(feature) else []
+    active = _dense(cells, L4.outputs["activeCells"].size)
+    L4.outputs["activeCells"][:] = active
+    L4.outputs["winnerCells"][:] = active
+    L4.outputs["predictedCells"][:] = active if known else 0
+    L4.outputs["predictedActiveCells"][:] = active if known else 0
+
+    if learn:
+      if column["newObject"]:
+        column["maps"].append({})
+        column["objects"].append(self._objectSDR(i, len(column["objects"])))
+        column["newObject"] = False
+      column["pairs"].add(pairKey)
+      column["maps"][-1].setdefault(tuple(column["location"].tolist()), set()).add(featureKey)
+      return {len(column["objects"]) - 1}
+
+    maps = column["maps"]
+    if column["hypotheses"] is None:
+      # the first sensation can be anywhere on any object
+      hypotheses = {(index, location) for index, objectMap in enumerate(maps)
+                    for location, features in objectMap.items() if featureKey in features}
+    else:
+      move = np.zeros(self.dimensions, dtype=np.int64)
+      if len(displacement):
+        move += np.asarray(displacement, dtype=np.int64)
+      hypotheses = set()
+      for index, location in column["hypotheses"]:
+        location = tuple((np.array(location) + move).tolist())
+        if featureKey in maps[index].get(location, ()):
+          hypotheses.add((index, location))
+    column["hypotheses"] = hypotheses
+    return {index for index, _ in hypotheses}
+
+  def run(self, iterations):
+    for _ in range(iterations):
+      candidates = [self._computeColumn(i) for i in range(self.numColumns)]
+
+      # voting - objects of all columns which sensed something, if there are any
+      sensed = [c for c in candidates if c]
+      consensus = set.intersection(*sensed) if sensed else set()
+      for i, objects in enumerate(candidates):
+        if objects is None:
+          continue
+        if consensus:
+          objects = consensus
+        cells = set()
+        for index in objects:
+          cells |= self.columns[i]["objects"][index]
+        L2 = self.regions["L2_" + str(i)]
+        L2.outputs["activeCells"][:] = _dense(cells, self.cellCount)
+        L2.outputs["feedForwardOutput"][:] = L2.outputs["activeCells"]
+
+  def saveToFile(self, path):
+    with open(path, "wb") as f:
+      pickle.dump(self, f)
+
+  @staticmethod
+  def loadFromFile(path):
+    with open(path, "rb") as f:
+      return pickle.load(f)
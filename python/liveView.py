@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Live visualisation of running experiment in separate viewer process.
+
+    The experiment only writes the latest state into shared memory, it never waits
+    for the viewer. The viewer reads the latest state at its own frame rate, so
+    when it falls behind, the intermediate states are simply dropped.
+
+    Shared memory layout (float64):
+    [sequence, closed, objectVersion, iteration, agentX, agentY, values..., object grid...]
+    Sequence is odd while the writer is in the middle of update (seqlock).
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_SEQ, _CLOSED, _OBJ_VERSION, _ITERATION, _AGENT_X, _AGENT_Y = range(6)
+_HEADER_SIZE = 6
+
+
+class LiveView:
+    """
+    Publisher side of the live view.
+
+    :param width: width of the object space
+    :param height: height of the object space
+    :param streams: names of the values published each iteration, e.g. "L2ActiveCellCnt_0"
+    :param fps: how often the viewer refreshes
+    :param historyLength: how many past values of the streams are plotted
+    """
+
+    def __init__(self, width, height, streams, fps=20, historyLength=500):
+        self.width = width
+        self.height = height
+        self.streams = list(streams)
+        self._valuesEnd = _HEADER_SIZE + len(self.streams)
+
+        size = self._valuesEnd + width * height
+        self._shm = shared_memory.SharedMemory(create=True, size=size * 8)
+        self._state = np.ndarray((size,), dtype=np.float64, buffer=self._shm.buf)
+        self._state[:] = 0
+
+        self._process = multiprocessing.Process(
+            target=_viewerMain,
+            args=(self._shm.name, width, height, self.streams, fps, historyLength),
+            daemon=True,
+        )
+        self._process.start()
+
+    def _beginWrite(self):
+        self._state[_SEQ] += 1
+
+    def _endWrite(self):
+        self._state[_SEQ] += 1
+
+    def publishObject(self, objectSpace):
+        """
+        Publishes new object in the object space, call it after object is loaded.
+        """
+        from utilities import environmentArray
+
+        self._beginWrite()
+        self._state[self._valuesEnd:] = environmentArray(objectSpace).ravel()
+        self._state[_OBJ_VERSION] += 1
+        self._endWrite()
+
+    def publish(self, iteration, agentPos, values):
+        """
+        Publishes state of one iteration. Never blocks.
+
+        :param values: values of the streams, in the same order as streams in constructor
+        """
+        self._beginWrite()
+        self._state[_ITERATION] = iteration
+        self._state[_AGENT_X] = agentPos[0]
+        self._state[_AGENT_Y] = agentPos[1]
+        self._state[_HEADER_SIZE:self._valuesEnd] = values
+        self._endWrite()
+
+    def isAlive(self):
+        return self._process.is_alive()
+
+    def close(self, timeout=1.0):
+        self._state[_CLOSED] = 1
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        del self._state
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _readState(state):
+    """
+    Returns consistent copy of the state, or None if writer is just updating it.
+    """
+    seq = state[_SEQ]
+    if seq % 2 == 1:
+        return None
+    snapshot = state.copy()
+    if state[_SEQ] != seq:
+        return None
+    return snapshot
+
+
+def _viewerMain(shmName, width, height, streams, fps, historyLength):
+    import matplotlib.pyplot as plt
+    import matplotlib.colors as Colors
+    from utilities import environmentFramesFromArray
+
+    shm = shared_memory.SharedMemory(name=shmName)
+    state = np.ndarray((shm.size // 8,), dtype=np.float64, buffer=shm.buf)
+    valuesEnd = _HEADER_SIZE + len(streams)
+
+    fig, (axEnv, axStreams) = plt.subplots(nrows=1, ncols=2, figsize=(11, 4))
+    colors = ["white", "blue", "red", "lightGray", "cyan"]
+    cm = Colors.LinearSegmentedColormap.from_list("myCMap", colors, N=5)
+    image = axEnv.imshow(
+        np.zeros((height, width), dtype=np.uint8), interpolation="nearest", norm=Colors.Normalize(0, 5), cmap=cm
+    )
+    axEnv.set_xlabel("x")
+    axEnv.set_ylabel("y")
+
+    history = np.full((historyLength, len(streams)), np.nan)
+    lines = axStreams.plot(history)
+    axStreams.legend(lines, streams, fontsize="x-small", loc="upper left")
+    axStreams.set_xlabel("iteration")
+
+    plt.show(block=False)
+
+    base = np.zeros((width, height), dtype=np.uint8)
+    objVersion = 0
+    lastIteration = None
+    period = 1.0 / fps
+    try:
+        while state[_CLOSED] == 0 and plt.fignum_exists(fig.number):
+            start = time.time()
+            snapshot = _readState(state)
+            if snapshot is not None and snapshot[_ITERATION] != lastIteration:
+                lastIteration = snapshot[_ITERATION]
+                if snapshot[_OBJ_VERSION] != objVersion:
+                    objVersion = snapshot[_OBJ_VERSION]
+                    base = snapshot[valuesEnd:].reshape(width, height).astype(np.uint8)
+
+                agentPos = [int(snapshot[_AGENT_X]), int(snapshot[_AGENT_Y])]
+                image.set_data(environmentFramesFromArray(base, [agentPos])[0].T)
+                axEnv.set_title("Iteration " + str(int(lastIteration)))
+
+                history = np.roll(history, -1, axis=0)
+                history[-1] = snapshot[_HEADER_SIZE:valuesEnd]
+                for i, line in enumerate(lines):
+                    line.set_ydata(history[:, i])
+                axStreams.relim()
+                axStreams.autoscale_view()
+
+                fig.canvas.draw_idle()
+            fig.canvas.flush_events()
+            time.sleep(max(0.0, period - (time.time() - start)))
+    finally:
+        plt.close(fig)
+        del state
+        shm.close()
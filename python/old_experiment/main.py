@@ -10,30 +10,44 @@ import numpy as np
 import time
 import matplotlib.pyplot as plt
 import random
+import copy
+import multiprocessing
 
 from utilities import (
     plotBinaryMap,
     isNotebook,
     plotEnvironment,
 )  # auxiliary functions from utilities.py
+from encodingCache import EncodingCache
 
 from htm.bindings.algorithms import SpatialPooler, TemporalMemory
 from htm.bindings.sdr import SDR, Metrics
 from htm.encoders.rdse import RDSE, RDSE_Parameters
 from htm.encoders.grid_cell_encoder import GridCellEncoder
-from htm.algorithms.anomaly import Anomaly
 from htm.advanced.algorithms.apical_tiebreak_temporal_memory import ApicalTiebreakPairMemory
 
 PLOT_GRAPHS = True
 PLOT_ENV = True
+LIVE_VIEW = False # show environment and anomaly in separate viewer process instead of PLOT_ENV & PLOT_GRAPHS
 PANDA_VIS_BAKE_DATA = True # if we want to bake data for pandaVis tool (repo at https://github.com/htm-community/HTMpandaVis )
 
+QUIET = False # do not print state of every iteration
+EXPECTATION_PROCESSES = 1 # worker processes computing expectation map, see ExpectationMap
+ENCODING_CACHE = True # precompute location and feature SDRs of every position/feature, each step is then a table lookup
+
+BAKE_EVERY_NTH = 1 # bake only every Nth iteration
+BAKE_LAYERS = None # names of layers to bake, None for all
+BAKE_STREAMS = None # names of data streams to bake, None for all
+BAKE_SYNAPSES = False # bake synapses of SP and TM, they are copied in every baked iteration (slow)
+
 if PANDA_VIS_BAKE_DATA:
     from pandaBaker.pandaBaker import PandaBaker
     from pandaBaker.pandaBaker import cLayer, cInput, cDataStream
+    from asyncBaker import AsyncBaker
 
     BAKE_DATABASE_FILE_PATH = os.path.join(os.getcwd(), 'bakedDatabase', 'htmcore_detector.db')
     pandaBaker = PandaBaker(BAKE_DATABASE_FILE_PATH)
+    bakeWriter = None # AsyncBaker, created in BuildPandaSystem
 
 _EXEC_DIR = os.path.dirname(os.path.abspath(__file__))
 # go one folder up and then into the objects folder
@@ -41,10 +55,21 @@ _OBJECTS_DIR = os.path.join(_EXEC_DIR, os.path.pardir, "objects")
 
 OBJECT_FILENAME = "a.yml"  # what object to load
 
+# position of sensed feature relative to the agent
+SENSOR_OFFSETS = {Direction.LEFT: (-1, 0), Direction.RIGHT: (1, 0), Direction.UP: (0, -1), Direction.DOWN: (0, 1)}
+
+_expectationState = None # (experiment, TM snapshot, columns with feature, columns without feature) for forked workers
+
+
+def _expectationChunk(positions):
+    experiment, tm, columnsWithFeature, columnsWithoutFeature = _expectationState
+    return experiment.ExpectationScores(tm, columnsWithFeature, columnsWithoutFeature, positions)
+
 fig_layers = None
 fig_graphs = None
 fig_environment = None
 fig_expect = None
+liveView = None
 
 class Experiment:
 
@@ -76,6 +101,13 @@ class Experiment:
             except yaml.YAMLError as exc:
                 print(exc)
 
+        if LIVE_VIEW:
+            global liveView
+            from liveView import LiveView
+            liveView = LiveView(self.env.width, self.env.height,
+                                ["rawAnomaly", "numberOfWinnerCells", "numberOfPredictiveCells"])
+            liveView.publishObject(self.env)
+
         # SENSOR LAYER --------------------------------------------------------------
         # setup sensor encoder
         sensorEncoderParams = RDSE_Parameters()
@@ -118,6 +150,13 @@ class Experiment:
 
         self.locationlayer_SDR_cells = SDR(self.gridCellEncoder.dimensions)
 
+        if ENCODING_CACHE:
+            # agent moves only on integer positions of the environment and senses feature 0 or 1
+            positions = [(x, y) for x in range(self.env.width) for y in range(self.env.height)]
+            self.locationCache = EncodingCache(self.EncodeLocation, positions, self.gridCellEncoder.size)
+            self.featureCache = EncodingCache(lambda f: self.sensorEncoder.encode(f).sparse, [0, 1],
+                                              self.sensorEncoder.size)
+            self.sensorSDR = SDR(self.sensorEncoder.size)
 
 
         initParams = {
@@ -157,23 +196,102 @@ class Experiment:
         # )
         self.tm_info = Metrics([self.sensoryLayer_tm.numberOfCells()], 999999999)
 
-    def CellsToColumns(self, cells, cellsPerColumn, columnsCount):
-        array  = []
-        for cell in cells.sparse:
-            col = int(cell/cellsPerColumn)
-            if col not in array:#each column max once
-                array += [col]
-
-        columns = SDR(columnsCount)
-        columns.sparse = array
-        return columns
+        # buffers reused in every iteration
+        self.cellsPerColumn = tmParams["cellsPerColumn"]
+        self.predictiveCellsSDR = SDR(spParams["columnCount"] * self.cellsPerColumn)
+        self.predictedColumnsMask = np.zeros(spParams["columnCount"], dtype=bool)
+
+    def EncodeLocation(self, position):
+        self.gridCellEncoder.encode(list(position), self.locationlayer_SDR_cells)
+        return self.locationlayer_SDR_cells.sparse.copy()
+
+    def RawAnomaly(self, activeColumns, predictiveCells):
+        """
+        Same as Anomaly.calculateRawAnomaly of active columns and columns of predictive cells,
+        fraction of active columns without any predictive cell, without creating new SDRs.
+        """
+        if len(activeColumns) == 0:
+            return 0.0
+        mask = self.predictedColumnsMask
+        mask[:] = False
+        mask[np.asarray(predictiveCells, dtype=np.int64) // self.cellsPerColumn] = True
+        return 1.0 - np.count_nonzero(mask[activeColumns]) / len(activeColumns)
+
+    def LocationSparse(self, position):
+        if ENCODING_CACHE:
+            return self.locationCache.lookup(tuple(position))
+        cells = SDR(self.gridCellEncoder.dimensions)
+        self.gridCellEncoder.encode(list(position), cells)
+        return cells.sparse
+
+    def ExpectationScores(self, tm, columnsWithFeature, columnsWithoutFeature, positions):
+        """
+        Anomaly scores of both features at given agent positions, see ExpectationMap.
+        """
+        scores = []
+        for position in positions:
+            # predictions depend only on location (basal input), active cells are not changed
+            tm.depolarizeCells(self.LocationSparse(position), (), False)
+            scores.append((self.RawAnomaly(columnsWithFeature, tm.predictedCells),
+                           self.RawAnomaly(columnsWithoutFeature, tm.predictedCells)))
+        return scores
+
+    def ExpectationMap(self, positions, sensorDirection=Direction.UP, processes=1):
+        """
+        Computes which feature the trained system expects for every agent position.
+
+        Temporal memory is snapshotted once and the network is not fed - for each position only
+        the cells predicted by its location are computed and compared with the columns of sensed
+        feature and of no feature. Positions do not influence each other and the state of the
+        system stays untouched. Positions can be split between forked worker processes.
+
+        :return: (A, B, expectedObject) - 2D lists [x][y] indexed by the sensed position,
+                 anomaly with feature, anomaly without feature and 1 where feature is expected
+        """
+        global _expectationState
+        tm = copy.deepcopy(self.sensoryLayer_tm)
+
+        columns = []
+        for feature in [1, 0]:
+            sdr = self.featureCache.lookup(feature) if ENCODING_CACHE else self.sensorEncoder.encode(feature).sparse
+            encoded = SDR(self.sensorEncoder.size)
+            encoded.sparse = sdr
+            active = SDR(self.sensorLayer_SDR_columns.dimensions)
+            self.sensorLayer_sp.compute(encoded, False, active)
+            columns.append(np.array(active.sparse))
+
+        positions = [tuple(p) for p in positions]
+        if processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            _expectationState = (self, tm, columns[0], columns[1])
+            chunks = [positions[i::processes] for i in range(processes)]
+            with multiprocessing.get_context("fork").Pool(processes) as pool:
+                chunkScores = pool.map(_expectationChunk, chunks)
+            _expectationState = None
+            scores = [None] * len(positions)
+            for i, chunk in enumerate(chunkScores):
+                scores[i::processes] = chunk
+        else:
+            scores = self.ExpectationScores(tm, columns[0], columns[1], positions)
+
+        A = [x[:] for x in [[0] * self.env.height] * self.env.width]
+        B = [x[:] for x in [[0] * self.env.height] * self.env.width]
+        expectedObject = [x[:] for x in [[0] * self.env.height] * self.env.width]
+        dx, dy = SENSOR_OFFSETS[sensorDirection]
+        for (x, y), (scoreWithFeature, scoreWithoutFeature) in zip(positions, scores):
+            A[x + dx][y + dy] = scoreWithFeature
+            B[x + dx][y + dy] = scoreWithoutFeature
+            expectedObject[x + dx][y + dy] = 1 if scoreWithFeature < scoreWithoutFeature else 0
+        return A, B, expectedObject
 
     def SystemCalculate(self, feature, learning):
         global fig_environment, fig_graphs
         # ENCODE DATA TO SDR--------------------------------------------------
         # Convert sensed feature to int
         self.sensedFeature = 1 if feature == "X" else 0
-        self.sensorSDR = self.sensorEncoder.encode(self.sensedFeature)
+        if ENCODING_CACHE:
+            self.sensorSDR.sparse = self.featureCache.lookup(self.sensedFeature)
+        else:
+            self.sensorSDR = self.sensorEncoder.encode(self.sensedFeature)
 
         # ACTIVATE COLUMNS IN SENSORY LAYER ----------------------------------
         # Execute Spatial Pooling algorithm on Sensory Layer with sensorSDR as proximal input
@@ -181,7 +299,10 @@ class Experiment:
 
         # SIMULATE LOCATION LAYER --------------------------------------------
         # Execute Location Layer - it is just GC encoder
-        self.gridCellEncoder.encode(self.agent.get_position(), self.locationlayer_SDR_cells)
+        if ENCODING_CACHE:
+            self.locationlayer_SDR_cells.sparse = self.locationCache.lookup(tuple(self.agent.get_position()))
+        else:
+            self.gridCellEncoder.encode(self.agent.get_position(), self.locationlayer_SDR_cells)
 
         #
         # Execute Temporal memory algorithm over the Sensory Layer, with mix of
@@ -202,56 +323,61 @@ class Experiment:
         #self.sensoryLayer_tm.activateDendrites(learn=learning, externalPredictiveInputsActive=externalDistalInput,
                                          #externalPredictiveInputsWinners=externalDistalInput)
         # predictive cells are calculated directly from active segments
-        self.predictiveCellsSDR = SDR(spParams["columnCount"]* tmParams["cellsPerColumn"])
-        self.predictiveCellsSDR.sparse = self.sensoryLayer_tm.predictedCells
+        predictedCells = self.sensoryLayer_tm.predictedCells
+        self.predictiveCellsSDR.sparse = predictedCells
 
         if self.iterationNo!=0:
         # and calculate anomaly - compare how much of active columns had some predictive cells
-            self.rawAnomaly = Anomaly.calculateRawAnomaly(self.sensorLayer_SDR_columns,
-                                                 self.CellsToColumns(self.predictiveCellsSDR,parameters["sensoryLayer_tm"]["cellsPerColumn"],parameters["sensoryLayer_sp"]["columnCount"]))
+            self.rawAnomaly = self.RawAnomaly(self.sensorLayer_SDR_columns.sparse, predictedCells)
         else:
             self.rawAnomaly = 0
 
 
         # PANDA VIS
-        if PANDA_VIS_BAKE_DATA:
+        if PANDA_VIS_BAKE_DATA and bakeWriter.isBaked(self.iterationNo):
             # ------------------HTMpandaVis----------------------
             # fill up values
-            pandaBaker.inputs["FeatureSensor"].stringValue = "Feature: {:.2f}".format(self.sensedFeature)
-            pandaBaker.inputs["FeatureSensor"].bits = self.sensorSDR.sparse
+            bakeWriter.inputs["FeatureSensor"].stringValue = "Feature: {:.2f}".format(self.sensedFeature)
+            bakeWriter.inputs["FeatureSensor"].bits = self.sensorSDR.sparse
 
-            pandaBaker.inputs["LocationLayer"].stringValue = str(self.agent.get_position())
-            pandaBaker.inputs["LocationLayer"].bits = self.locationlayer_SDR_cells.sparse
+            bakeWriter.inputs["LocationLayer"].stringValue = str(self.agent.get_position())
+            bakeWriter.inputs["LocationLayer"].bits = self.locationlayer_SDR_cells.sparse
 
-            pandaBaker.layers["SensoryLayer"].activeColumns = self.sensorLayer_SDR_columns.sparse
-            pandaBaker.layers["SensoryLayer"].winnerCells =  self.sensoryLayer_tm.getWinnerCells()
-            pandaBaker.layers["SensoryLayer"].predictiveCells = self.predictiveCellsSDR.sparse
-            pandaBaker.layers["SensoryLayer"].activeCells = self.sensoryLayer_tm.getActiveCells()
+            bakeWriter.layers["SensoryLayer"].activeColumns = self.sensorLayer_SDR_columns.sparse
+            bakeWriter.layers["SensoryLayer"].winnerCells =  self.sensoryLayer_tm.getWinnerCells()
+            bakeWriter.layers["SensoryLayer"].predictiveCells = self.predictiveCellsSDR.sparse
+            bakeWriter.layers["SensoryLayer"].activeCells = self.sensoryLayer_tm.getActiveCells()
 
             # customizable datastreams to be show on the DASH PLOTS
-            pandaBaker.dataStreams["rawAnomaly"].value = self.rawAnomaly
-            pandaBaker.dataStreams["numberOfWinnerCells"].value = len(self.sensoryLayer_tm.getWinnerCells())
-            pandaBaker.dataStreams["numberOfPredictiveCells"].value = len(self.predictiveCellsSDR.sparse)
-            pandaBaker.dataStreams["sensor_sparsity"].value = self.sensorSDR.getSparsity()*100
-            pandaBaker.dataStreams["location_sparsity"].value = self.locationlayer_SDR_cells.getSparsity()*100
+            bakeWriter.dataStreams["rawAnomaly"].value = self.rawAnomaly
+            bakeWriter.dataStreams["numberOfWinnerCells"].value = len(self.sensoryLayer_tm.getWinnerCells())
+            bakeWriter.dataStreams["numberOfPredictiveCells"].value = len(self.predictiveCellsSDR.sparse)
+            bakeWriter.dataStreams["sensor_sparsity"].value = self.sensorSDR.getSparsity()*100
+            bakeWriter.dataStreams["location_sparsity"].value = self.locationlayer_SDR_cells.getSparsity()*100
 
-            pandaBaker.dataStreams["SensoryLayer_SP_overlap_metric"].value = self.sp_info.overlap.overlap
-            pandaBaker.dataStreams["SensoryLayer_TM_overlap_metric"].value = self.sp_info.overlap.overlap
-            pandaBaker.dataStreams["SensoryLayer_SP_activation_frequency"].value = self.sp_info.activationFrequency.mean()
-            pandaBaker.dataStreams["SensoryLayer_TM_activation_frequency"].value = self.tm_info.activationFrequency.mean()
-            pandaBaker.dataStreams["SensoryLayer_SP_entropy"].value = self.sp_info.activationFrequency.mean()
-            pandaBaker.dataStreams["SensoryLayer_TM_entropy"].value = self.tm_info.activationFrequency.mean()
+            bakeWriter.dataStreams["SensoryLayer_SP_overlap_metric"].value = self.sp_info.overlap.overlap
+            bakeWriter.dataStreams["SensoryLayer_TM_overlap_metric"].value = self.sp_info.overlap.overlap
+            bakeWriter.dataStreams["SensoryLayer_SP_activation_frequency"].value = self.sp_info.activationFrequency.mean()
+            bakeWriter.dataStreams["SensoryLayer_TM_activation_frequency"].value = self.tm_info.activationFrequency.mean()
+            bakeWriter.dataStreams["SensoryLayer_SP_entropy"].value = self.sp_info.activationFrequency.mean()
+            bakeWriter.dataStreams["SensoryLayer_TM_entropy"].value = self.tm_info.activationFrequency.mean()
 
-            pandaBaker.StoreIteration(self.iterationNo)
+            bakeWriter.storeIteration(self.iterationNo) # stored in background thread
 
             # ------------------HTMpandaVis----------------------
 
 
-        print("Position:" + str(self.agent.get_position()))
-        print("Feature:" + str(self.sensedFeature))
-        print("Anomaly score:" + str(self.rawAnomaly))
+        if not QUIET:
+            print("Position:" + str(self.agent.get_position()))
+            print("Feature:" + str(self.sensedFeature))
+            print("Anomaly score:" + str(self.rawAnomaly))
         self.anomalyHistData += [self.rawAnomaly]
 
+        if LIVE_VIEW:
+            liveView.publish(self.iterationNo, self.agent.get_position(),
+                             [self.rawAnomaly, len(self.sensoryLayer_tm.getWinnerCells()),
+                              len(self.predictiveCellsSDR.sparse)])
+
 
         if PLOT_ENV:
             # Plotting and visualising environment-------------------------------------------
@@ -311,6 +437,10 @@ class Experiment:
         pandaBaker.dataStreams = dict((name, cDataStream()) for name in streams)  # create dicts for more comfortable code
         # could be also written like: pandaBaker.dataStreams["myStreamName"] = cDataStream()
 
+        global bakeWriter
+        bakeWriter = AsyncBaker(pandaBaker, everyNth=BAKE_EVERY_NTH, layers=BAKE_LAYERS, streams=BAKE_STREAMS,
+                                synapses=BAKE_SYNAPSES)
+
         pandaBaker.PrepareDatabase()
 
 
@@ -327,33 +457,14 @@ class Experiment:
         for i in range(3):
             for x in range(2, 18):
                 for y in range(2, 18):
-                    print("Iteration:" + str(self.iterationNo))
+                    if not QUIET:
+                        print("Iteration:" + str(self.iterationNo))
                     self.agent.move(x,y)
                     self.SystemCalculate(self.agent.get_feature(Direction.UP), learning=True)
 
-        expectedObject = [x[:] for x in [[0] * 20] * 20]
-
-        A = [x[:] for x in [[0] * 20] * 20]
-        B = [x[:] for x in [[0] * 20] * 20]
-
-        predSDR1 = SDR(self.predictiveCellsSDR)
-        predSDR2 = SDR(self.predictiveCellsSDR)
-
         # calculate what kind of object will system expect
-        for x in range(2, 18):
-            for y in range(2, 18):  # for sensor UP !
-                self.agent.move(x, y)
-
-                self.SystemCalculate("X", learning=False)
-                scoreWithFeature = self.rawAnomaly
-
-                self.SystemCalculate(" ", learning=False)
-                scoreWithoutFeature = self.rawAnomaly
-
-                # y -1 because we are using sensor UP
-                A[x][y-1] = scoreWithFeature
-                B[x][y-1] = scoreWithoutFeature
-                expectedObject[x][y-1] = 1 if scoreWithFeature < scoreWithoutFeature else 0
+        positions = [(x, y) for x in range(2, 18) for y in range(2, 18)]
+        A, B, expectedObject = self.ExpectationMap(positions, Direction.UP, processes=EXPECTATION_PROCESSES)
 
 
         print(A)
@@ -384,7 +495,8 @@ class Experiment:
         random.seed = 42
 
         for i in range(1000):
-            print("Iteration:" + str(self.iterationNo))
+            if not QUIET:
+                print("Iteration:" + str(self.iterationNo))
             self.SystemCalculate(self.agent.get_feature(Direction.UP), learning=True)
             # this tells agent where he will make movement next time & it will make previously requested movement
             self.agent.nextMove(random.randint(3,10), random.randint(3,10))
@@ -410,6 +522,9 @@ if __name__ == "__main__":
 
     experiment.RunExperiment1()
 
+    if LIVE_VIEW:
+        liveView.close()
+
 
     if PANDA_VIS_BAKE_DATA:
-        pandaBaker.CommitBatch()
\ No newline at end of file
+        bakeWriter.close() # stores the rest of the queue and commits
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Parallel evaluation of the whole object library with trained network.
+
+Inference of every object and trajectory sample runs in a pool of worker processes.
+The trained network is loaded from checkpoint (see L2_L4_L6_Network.save) once in the
+parent process and workers are forked from it, so they share its memory copy-on-write
+instead of loading or receiving their own copy. Where fork is not available, each worker
+loads the checkpoint once at start.
+
+Learning is disabled during inference, so the learned synapses are only read by workers.
+"""
+import multiprocessing
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from experimentFramework.anytimeEvaluation import NONE, predictedObject
+
+_network = None  # trained network of the worker process
+
+
+def _loadNetwork(checkpoint):
+    from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network, checkpointBackend
+
+    if checkpointBackend(checkpoint) != "numpy":  # surrogate network has no htm regions
+        from htm.advanced.support.register_regions import registerAllAdvancedRegions
+        registerAllAdvancedRegions()
+    return L2_L4_L6_Network.load(checkpoint)
+
+
+def _initWorker(checkpoint):
+    global _network
+    if _network is None:
+        _network = _loadNetwork(checkpoint)
+
+
+def summarizeRun(stats):
+    """
+    Reduces stats of one inference run to (first step with correct classification (1-based,
+    -1 if never), object classified after the last step).
+    """
+    correct = np.asarray(stats.get("Correct classification", [])) > 0
+    firstCorrect = int(correct.argmax()) + 1 if correct.any() else -1
+    classification = stats["Actual classification"]
+    predicted = predictedObject(classification[-1]) if classification else NONE
+    return firstCorrect, predicted
+
+
+def _inferTask(task):
+    objectName, sample, sensations = task
+    stats = defaultdict(list)
+    _network.infer(sensations=sensations, stats=stats, objname=objectName)
+    return (objectName, sample) + summarizeRun(stats)
+
+
+class LibraryResults:
+    """
+    Confusion matrix and recognition latency of evaluated objects.
+
+    :param objectNames: evaluated objects, rows of the confusion matrix
+    """
+
+    def __init__(self, objectNames):
+        self.objectNames = list(objectNames)
+        self.labels = self.objectNames + [NONE]  # columns of the confusion matrix
+        self.confusion = np.zeros((len(self.objectNames), len(self.labels)), dtype=np.int64)
+        self.latencies = defaultdict(list)  # objectName -> first correct step of each sample, -1 if none
+
+    def add(self, objectName, firstCorrect, predicted):
+        if predicted not in self.labels:
+            # learned object which is not evaluated, gets its own column
+            self.labels.insert(len(self.labels) - 1, predicted)
+            self.confusion = np.insert(self.confusion, self.confusion.shape[1] - 1, 0, axis=1)
+        self.confusion[self.objectNames.index(objectName), self.labels.index(predicted)] += 1
+        self.latencies[objectName].append(firstCorrect)
+
+    def accuracy(self):
+        """
+        Fraction of samples where the object was the only one classified after the last sensation.
+        """
+        diagonal = self.confusion[np.arange(len(self.objectNames)), np.arange(len(self.objectNames))]
+        return diagonal.sum() / max(self.confusion.sum(), 1)
+
+    def latency(self, objectName):
+        """
+        :return: dict with "recognized" fraction of samples and "mean steps" to recognition
+                 over recognized samples (NaN if none)
+        """
+        steps = np.asarray(self.latencies[objectName])
+        recognized = steps[steps > 0]
+        return {
+            "recognized": len(recognized) / max(len(steps), 1),
+            "mean steps": float(recognized.mean()) if len(recognized) else float("nan"),
+        }
+
+    def summary(self):
+        return {
+            "accuracy": float(self.accuracy()),
+            "labels": self.labels,
+            "confusion": self.confusion.tolist(),
+            "latency": {name: self.latency(name) for name in self.objectNames},
+        }
+
+
+class ParallelEvaluator:
+    """
+    :param checkpoint: directory of the trained network (see L2_L4_L6_Network.save)
+    :param processes: number of worker processes, all cores by default
+    :param network: already loaded network to share with forked workers, loaded from the
+                    checkpoint if None
+    """
+
+    def __init__(self, checkpoint, processes=None, network=None):
+        self.checkpoint = checkpoint
+        self.processes = processes or os.cpu_count()
+        self.network = network
+
+    def _pool(self):
+        global _network
+        if "fork" in multiprocessing.get_all_start_methods():
+            # workers inherit the network of the parent process, nothing is loaded or copied
+            if self.network is None:
+                self.network = _loadNetwork(self.checkpoint)
+            _network = self.network
+            return multiprocessing.get_context("fork").Pool(self.processes)
+
+        return multiprocessing.get_context("spawn").Pool(self.processes, initializer=_initWorker,
+                                                         initargs=(self.checkpoint,))
+
+    def evaluate(self, streams, chunksize=1):
+        """
+        Infers every sample of every object.
+
+        :param streams: dict objectName -> list of samples, each sample is list of sensation
+                        streams for every column (see Experiment.createInferStream)
+        :return: LibraryResults
+        """
+        tasks = [(name, i, sample) for name, samples in streams.items() for i, sample in enumerate(samples)]
+        results = LibraryResults(streams.keys())
+
+        with self._pool() as pool:
+            for objectName, _, firstCorrect, predicted in pool.imap_unordered(_inferTask, tasks, chunksize):
+                results.add(objectName, firstCorrect, predicted)
+        return results
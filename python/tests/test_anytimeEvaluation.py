@@ -0,0 +1,39 @@
+import unittest
+
+from experimentFramework.anytimeEvaluation import NONE, AnytimeEvaluator, predictedObject, splitRuns
+
+
+def _stats(name, correct, classified):
+    return {
+        "name": name,
+        "Correct classification": [float(c) for c in correct],
+        "Actual classification": [{n: (1.0 if n == c else 0.5) for n in ["cup", "boat"]} for c in classified],
+    }
+
+
+class AnytimeEvaluationTests(unittest.TestCase):
+    def test_predictedObject(self):
+        self.assertEqual(predictedObject({"cup": 1.0, "boat": 0.5}), "cup")
+        self.assertEqual(predictedObject({"cup": 1.0, "boat": 1.0}), NONE)
+        self.assertEqual(predictedObject({}), NONE)
+
+    def test_budgets(self):
+        evaluator = AnytimeEvaluator([2, 4, 6], ["cup", "boat"])
+        evaluator.add(_stats("cup", [0, 0, 1, 1, 1, 1], [None, None, "cup", "cup", "cup", "cup"]))
+        evaluator.add(_stats("cup", [0, 1, 0, 0, 0, 0], [None, "cup", "boat", "boat", "boat", "boat"]))
+        evaluator.add(_stats("boat", [0, 0, 0, 0], [None, None, None, "boat"]))  # too short for 6
+
+        self.assertEqual(evaluator.runs.tolist(), [3, 3, 2])
+        self.assertEqual(evaluator.accuracy().tolist(), [1 / 3, 2 / 3, 1.0])
+        self.assertEqual(evaluator.stepsToRecognition, [3, 2, -1])
+        # after 4 sensations: cup -> cup, cup -> boat, boat -> boat
+        self.assertEqual(evaluator.confusion[1].tolist(), [[1, 1, 0], [0, 1, 0]])
+        self.assertEqual(evaluator.finalAccuracy().tolist(), [1 / 3, 2 / 3, 0.5])
+        self.assertEqual(evaluator.summary()[6]["runs"], 2)
+
+    def test_splitRuns(self):
+        stats = _stats("cup", [0, 1, 1, 0, 0, 1], ["cup"] * 6)
+        runs = splitRuns(stats, 3)
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(runs[1]["Correct classification"], [0.0, 0.0, 1.0])
+        self.assertEqual(runs[1]["name"], "cup")
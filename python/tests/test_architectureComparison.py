@@ -0,0 +1,67 @@
+import os
+import unittest
+
+import experiment1
+from architectureComparison import CellEvidence, createArchitecture, createStreams, compare, formatTable
+from experimentFramework.anytimeEvaluation import NONE
+
+
+class CellEvidenceTests(unittest.TestCase):
+    def test_narrowing(self):
+        evidence = CellEvidence(cellsPerColumn=4)
+        evidence.learn("a", [0, 5, 9])  # columns 0, 1, 2
+        evidence.learn("b", [1, 5, 13])  # columns 0, 1, 3
+
+        evidence.reset()
+        self.assertEqual(evidence.infer([5]), NONE)  # both objects have the cell
+        self.assertEqual(evidence.infer([0, 9]), "a")
+        self.assertEqual(evidence.infer([]), "a")  # nothing sensed, candidates are kept
+        self.assertEqual(evidence.infer([13]), NONE)  # not consistent with "a"
+
+        evidence.reset()
+        self.assertEqual(evidence.infer([4, 5, 6, 7]), NONE)  # bursting column
+        self.assertEqual(evidence.infer([1, 13]), "b")
+
+
+class ArchitectureComparisonTests(unittest.TestCase):
+    def setUp(self):
+        self.flags = (experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR)
+        experiment1.NETWORK_BACKEND = "numpy"
+        experiment1.STREAM_CACHE_DIR = None
+        with open(os.path.join(os.path.dirname(experiment1.__file__), "parameters.cfg"), "r") as f:
+            self.params = eval(f.read())
+
+    def tearDown(self):
+        experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR = self.flags
+
+    def test_compare(self):
+        params, streams = createStreams(self.params, objects=["cup", "boat"])
+        self.assertEqual(sorted(streams), ["boat", "cup"])
+        self.assertEqual([len(stream) for stream in streams["cup"]], [self.params["num_sensations"]] * 4)
+        self.assertIn("orientation", params["l6a_params"])
+        self.assertNotIn("orientation", self.params["l6a_params"])
+
+        architectures = [createArchitecture("l246a", backend="numpy"), createArchitecture("l246a-1", backend="numpy")]
+        results = compare(architectures, params, streams, isolate=False)
+        self.assertEqual([r["architecture"] for r in results], ["l246a", "l246a-1"])
+        self.assertEqual([r["columns"] for r in results], [4, 1])
+        for result in results:
+            self.assertEqual(result["accuracy"], 1.0)
+            self.assertEqual(len(result["labels"]["cup"]), self.params["num_sensations"])
+            self.assertGreater(result["infer sensations/s"], 0)
+
+        table = formatTable(results + [{"architecture": "sp-tm", "error": "Traceback\nImportError: htm\n"}])
+        lines = table.splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("l246a "))
+        self.assertIn("failed: ImportError: htm", lines[3])
+
+    def test_isolated(self):
+        params, streams = createStreams(self.params, objects=["cup"])
+        result = compare([createArchitecture("l246a", backend="numpy")], params, streams)[0]
+        self.assertNotIn("error", result)
+        self.assertEqual(result["labels"]["cup"][-1], "cup")
+
+    def test_unknown(self):
+        with self.assertRaises(RuntimeError):
+            createArchitecture("l5")
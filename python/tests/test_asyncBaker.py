@@ -0,0 +1,107 @@
+import unittest
+
+from asyncBaker import AsyncBaker
+
+
+class _Item:
+    pass
+
+
+class _Pooler:  # stands for SP/TM instance, its synapses change by learning
+    def __init__(self):
+        self.synapses = []
+
+
+class _FakeBaker:  # records what PandaBaker would store
+    def __init__(self):
+        self.inputs = {"FeatureSensor": _Item()}
+        self.layers = {"SensoryLayer": _Item(), "OtherLayer": _Item()}
+        self.layers["SensoryLayer"].sp = _Pooler()
+        self.layers["SensoryLayer"].tm = None
+        self.dataStreams = {"rawAnomaly": _Item(), "other": _Item()}
+        self.stored = []
+        self.synapses = []
+        self.commits = 0
+
+    def StoreIteration(self, iteration):
+        self.stored.append(
+            (
+                iteration,
+                list(self.inputs["FeatureSensor"].bits),
+                list(self.layers["SensoryLayer"].activeCells),
+                self.dataStreams["rawAnomaly"].value,
+            )
+        )
+        sp = self.layers["SensoryLayer"].sp
+        self.synapses.append(None if sp is None else list(sp.synapses))
+
+    def CommitBatch(self):
+        self.commits += 1
+
+
+class AsyncBakerTests(unittest.TestCase):
+    def test_storeAllIterations(self):
+        baker = _FakeBaker()
+        writer = AsyncBaker(baker, batchSize=10)
+        bits = [0, 0]
+        for i in range(25):
+            bits[0] = i  # values are copied, later change of the list must not matter
+            bits[1] = i + 1
+            writer.inputs["FeatureSensor"].bits = bits
+            writer.layers["SensoryLayer"].activeCells = [i]
+            writer.dataStreams["rawAnomaly"].value = i / 100.0
+            writer.storeIteration(i)
+        writer.close()
+
+        self.assertEqual(len(baker.stored), 25)
+        self.assertEqual(baker.stored[7], (7, [7, 8], [7], 0.07))
+        self.assertEqual(baker.commits, 3)
+
+    def test_everyNthAndSelection(self):
+        baker = _FakeBaker()
+        writer = AsyncBaker(baker, everyNth=5, layers=["SensoryLayer"], streams=["rawAnomaly"])
+        self.assertEqual(list(baker.layers), ["SensoryLayer"])
+        self.assertEqual(list(baker.dataStreams), ["rawAnomaly"])
+
+        for i in range(20):
+            writer.inputs["FeatureSensor"].bits = [i]
+            writer.layers["SensoryLayer"].activeCells = [i]
+            writer.layers["OtherLayer"].activeCells = [i]
+            writer.dataStreams["rawAnomaly"].value = i
+            writer.storeIteration(i)
+        writer.flush()
+
+        self.assertEqual([s[0] for s in baker.stored], [0, 5, 10, 15])
+        self.assertEqual(baker.commits, 1)
+        self.assertFalse(hasattr(baker.dataStreams["rawAnomaly"], "other"))
+        writer.close()
+
+    def test_synapses(self):
+        # synapses are baked as they were in the iteration, although the compute thread keeps learning
+        baker = _FakeBaker()
+        sp = baker.layers["SensoryLayer"].sp
+        writer = AsyncBaker(baker, synapses=True)
+        for i in range(5):
+            sp.synapses.append(i)
+            writer.inputs["FeatureSensor"].bits = [i]
+            writer.layers["SensoryLayer"].activeCells = [i]
+            writer.dataStreams["rawAnomaly"].value = i
+            writer.storeIteration(i)
+        writer.close()
+
+        self.assertEqual(baker.synapses, [[0], [0, 1], [0, 1, 2], [0, 1, 2, 3], [0, 1, 2, 3, 4]])
+        self.assertIsNot(baker.layers["SensoryLayer"].sp, sp)
+
+    def test_withoutSynapses(self):
+        # writer doesn't get the live instance at all
+        baker = _FakeBaker()
+        writer = AsyncBaker(baker)
+        for i in range(3):
+            writer.inputs["FeatureSensor"].bits = [i]
+            writer.layers["SensoryLayer"].activeCells = [i]
+            writer.dataStreams["rawAnomaly"].value = i
+            writer.storeIteration(i)
+        writer.close()
+
+        self.assertEqual(baker.synapses, [None, None, None])
+        self.assertEqual(baker.layers["SensoryLayer"].tm, None)
@@ -0,0 +1,114 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from l2l4l6Framework.columnParallelNetwork import LateralExchange, partitionColumns
+
+try:
+    import htm.advanced  # noqa: F401
+    HTM = True
+except ImportError:
+    HTM = False
+
+L2_PARAMS = {"cellCount": 1024, "sdrSize": 40, "activationThresholdDistal": 20, "sampleSizeDistal": 20,
+             "sampleSizeProximal": 10, "minThresholdProximal": 5, "seed": 42}
+L4_PARAMS = {"columnCount": 150, "cellsPerColumn": 16, "activationThreshold": 8, "minThreshold": 8,
+             "initialPermanence": 1.0, "connectedPermanence": 0.6, "permanenceIncrement": 0.1,
+             "permanenceDecrement": 0.02, "reducedBasalThreshold": 8, "sampleSize": 20,
+             "implementation": "ApicalTiebreak", "maxSynapsesPerSegment": -1, "maxSegmentsPerCell": 255,
+             "seed": 42}
+L6A_PARAMS = {"moduleCount": 5, "dimensions": 2, "cellsPerAxis": 10, "scale": [2] * 5,
+              "orientation": np.radians([6, 18, 30, 42, 54]).tolist(), "activationThreshold": 8,
+              "initialPermanence": 0.45, "connectedPermanence": 0.5, "learningThreshold": 8, "sampleSize": 10,
+              "permanenceIncrement": 0.1, "permanenceDecrement": 0.0, "bumpOverlapMethod": "probabilistic",
+              "seed": 42}
+NUM_COLUMNS = 3
+
+
+def _objects(steps=20):
+    # the same path for all columns, each column senses a different feature
+    rng = np.random.RandomState(0)
+    objects = {}
+    for name in ("a", "b"):
+        locations = [rng.randint(0, 20, 2).tolist() for _ in range(steps)]
+        objects[name] = [[(location, sorted(rng.choice(150, 15, replace=False).tolist())) for location in locations]
+                         for _ in range(NUM_COLUMNS)]
+    return objects
+
+
+def _outputs(network):
+    return (network.getL2Representations(), network.getL4Representations(), network.getL4PredictedCells(),
+            network.getL6aRepresentations())
+
+
+def _run(network, objects):
+    """
+    Learns the objects and infers object "a" step by step.
+
+    :return: learned objects and outputs of all layers after every inference step
+    """
+    network.learn(objects)
+    outputs = []
+    network.startInference()
+    previous = None
+    for step in zip(*objects["a"]):
+        locations = [np.array(location) for location, _ in step]
+        displacements = [location - previous[col] if previous is not None else [0, 0]
+                         for col, location in enumerate(locations)]
+        previous = locations
+        network.inferStep([(displacement, feature) for displacement, (_, feature) in zip(displacements, step)])
+        outputs.append(_outputs(network))
+    return network.learnedObjects, outputs
+
+
+class ColumnParallelNetworkTests(unittest.TestCase):
+    def test_partitionColumns(self):
+        self.assertEqual(partitionColumns(4, 2), [[0, 1], [2, 3]])
+        self.assertEqual(partitionColumns(5, 2), [[0, 1, 2], [3, 4]])
+        self.assertEqual(partitionColumns(2, 8), [[0], [1]])
+        self.assertEqual(partitionColumns(3, 1), [[0, 1, 2]])
+
+    def test_lateralExchange(self):
+        context = multiprocessing.get_context("spawn")
+        buffer = LateralExchange.allocate(context, 2, 6)
+        exchange = LateralExchange(buffer, 2, 6)
+        self.assertEqual(exchange.read(-1, 0), [])  # nothing before the first iteration
+
+        exchange.write(0, 0, [0, 1, 0, 0, 1, 0])
+        exchange.write(0, 1, [1, 0, 0, 0, 0, 0])
+        exchange.write(1, 0, [0, 0, 1, 0, 0, 0])
+        self.assertEqual(exchange.read(0, 0), [1, 4])  # previous iteration is kept while the next is written
+        self.assertEqual(exchange.read(0, 1), [0])
+        self.assertEqual(exchange.read(1, 0), [2])
+
+        exchange.write(2, 0, [0, 0, 0, 0, 0, 1])  # overwrites iteration 0
+        self.assertEqual(exchange.read(2, 0), [5])
+        self.assertEqual(exchange.read(1, 0), [2])
+
+        # other processes see the same memory
+        self.assertEqual(LateralExchange(buffer, 2, 6).read(2, 0), [5])
+
+    @unittest.skipUnless(HTM, "htm.core is not installed")
+    def test_parity(self):
+        # columns split between worker processes compute the same as the serial network
+        from htm.advanced.support.register_regions import registerAllAdvancedRegions
+        from l2l4l6Framework.columnParallelNetwork import ColumnParallelNetwork
+        from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
+
+        registerAllAdvancedRegions()
+        objects = _objects()
+        expected = _run(L2_L4_L6_Network(NUM_COLUMNS, L2_PARAMS, L4_PARAMS, L6A_PARAMS, repeat=2), objects)
+
+        network = ColumnParallelNetwork(NUM_COLUMNS, L2_PARAMS, L4_PARAMS, L6A_PARAMS, repeat=2, processes=2)
+        try:
+            self.assertEqual(network.columns, [[0, 1], [2]])
+            learnedObjects, outputs = _run(network, objects)
+        finally:
+            network.close()
+
+        self.assertEqual(learnedObjects, expected[0])
+        self.assertEqual(len(outputs), len(expected[1]))
+        for step, (output, expectedOutput) in enumerate(zip(outputs, expected[1])):
+            with self.subTest(step=step):
+                self.assertEqual(output, expectedOutput)
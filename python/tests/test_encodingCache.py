@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+
+from encodingCache import EncodingCache
+
+
+class EncodingCacheTests(unittest.TestCase):
+    def test_lookup(self):
+        calls = []
+
+        def encode(position):
+            calls.append(position)
+            x, y = position
+            return sorted({x * 7 % 100, y * 13 % 100, (x + y) % 100})
+
+        positions = [(x, y) for x in range(20) for y in range(20)]
+        cache = EncodingCache(encode, positions, 100)
+        self.assertEqual(len(calls), 400)
+        self.assertEqual(cache._indices.dtype, np.uint16)
+
+        for position in [(0, 0), (3, 17), (19, 19)]:
+            self.assertEqual(cache.lookup(position).tolist(), encode(position))
+        self.assertEqual(len(calls), 403)  # lookups did not encode again
+
+        # value outside of the table is encoded once
+        self.assertNotIn((25, 1), cache)
+        self.assertEqual(cache.lookup((25, 1)).tolist(), encode((25, 1)))
+        cache.lookup((25, 1))
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(len(cache), 401)
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from experimentFramework.objectSpace import TwoDimensionalObjectSpace
+from frameRenderer import FrameRenderer
+from utilities import environmentFrames, sensationsArray
+
+
+class FrameRendererTests(unittest.TestCase):
+    def setUp(self):
+        self.space = TwoDimensionalObjectSpace(5, 5)
+        self.space.set_feature(1, 1, "X")
+        self.space.set_feature(3, 3, "X")
+
+    def test_environmentFrames(self):
+        frames = environmentFrames(self.space, [[0, 1], [3, 2]])
+        self.assertEqual(frames.shape, (2, 5, 5))
+
+        self.assertEqual(frames[0, 0, 1], 2)  # agent
+        self.assertEqual(frames[0, 1, 1], 4)  # sensor on feature
+        self.assertEqual(frames[0, 0, 0], 3)  # sensor
+        self.assertEqual(frames[0, 3, 3], 1)  # feature
+
+        self.assertEqual(frames[1, 3, 2], 2)
+        self.assertEqual(frames[1, 3, 3], 4)
+        self.assertEqual(frames[1, 1, 1], 1)
+
+    def test_sensationsArray(self):
+        arr = sensationsArray(self.space, [[1, 1]], [[1, 1], [0, 0]])
+        self.assertEqual(arr[1, 1], 4)
+        self.assertEqual(arr[0, 0], 2)
+        self.assertEqual(arr[3, 3], 1)
+        self.assertEqual(arr[4, 4], 0)
+
+    def test_writeFrames(self):
+        renderer = FrameRenderer(5, 5)
+        renderer.addEnvironmentFrames(self.space, [[0, 0], [1, 0], [2, 0]])
+        with tempfile.TemporaryDirectory() as d:
+            renderer.writePNGs(d, prefix="obj")
+            self.assertEqual(len(os.listdir(d)), 3)
+
+            renderer.addEnvironmentFrames(self.space, [[0, 0], [1, 0]])
+            renderer.writeAnimation(os.path.join(d, "obj.gif"))
+            self.assertTrue(os.path.exists(os.path.join(d, "obj.gif")))
+        self.assertEqual(renderer.frames, [])
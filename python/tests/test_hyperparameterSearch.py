@@ -0,0 +1,46 @@
+import unittest
+
+from hyperparameterSearch import HyperparameterSearch, applyConfig, sampleConfigs
+
+BUDGETS = [{"objects": 1, "sensations": 5}, {"objects": 2, "sensations": 10}, {"objects": 4, "sensations": 20}]
+
+
+def _fakeEvaluate(params, config, budget, objects, repetition):
+    # configs closer to scale 3 are better, larger budgets are more accurate
+    quality = 1.0 - abs(config["scale"] - 3) / 10
+    return {"accuracy": quality * budget["sensations"] / 20, "meanSteps": 10 - config["l2_params.sdrSize"] / 10}
+
+
+class HyperparameterSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.params = {"scale": 2, "l2_params": {"sdrSize": 40}}
+        self.space = {"scale": list(range(10)), "l2_params.sdrSize": [30, 40, 50]}
+
+    def test_configs(self):
+        configs = sampleConfigs(self.space, 5, seed=1)
+        self.assertEqual(configs, sampleConfigs(self.space, 5, seed=1))
+        params = applyConfig(self.params, {"scale": 7, "l2_params.sdrSize": 30})
+        self.assertEqual(params, {"scale": 7, "l2_params": {"sdrSize": 30}})
+        self.assertEqual(self.params["l2_params"]["sdrSize"], 40)
+        with self.assertRaises(RuntimeError):
+            applyConfig(self.params, {"l2_params.unknown": 1})
+
+    def test_successiveHalving(self):
+        search = HyperparameterSearch(self.params, ["a", "b", "c", "d"], BUDGETS, eta=3, processes=1,
+                                      evaluate=_fakeEvaluate)
+        configs = [{"scale": s, "l2_params.sdrSize": 40} for s in range(9)]
+        config, result = search.successiveHalving(configs)
+
+        self.assertEqual(config["scale"], 3)
+        self.assertEqual(result["accuracy"], 1.0)
+        # 9 configs on the smallest budget, 3 on the middle and 1 on the full one
+        self.assertEqual([len([t for t in search.trials if t["rung"] == r]) for r in range(3)], [9, 3, 1])
+
+    def test_hyperband(self):
+        search = HyperparameterSearch(self.params, ["a", "b", "c", "d"], BUDGETS, eta=3, processes=1,
+                                      evaluate=_fakeEvaluate)
+        config, result = search.hyperband(self.space)
+        self.assertEqual(result, _fakeEvaluate(None, config, BUDGETS[-1], None, 0))
+        self.assertEqual(max(t["rung"] for t in search.trials), 2)
+        fullBudget = [t for t in search.trials if t["rung"] == 2]
+        self.assertTrue(all(result["accuracy"] >= t["result"]["accuracy"] for t in fullBudget))
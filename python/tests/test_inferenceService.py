@@ -0,0 +1,141 @@
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from inferenceService import InferenceClient, InferenceService, loadReplicas
+from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
+
+
+class _CountingNetwork:
+    """
+    Stands in for L2_L4_L6_Network, "classifies" by number of features seen since reset.
+    """
+
+    numColumns = 2
+
+    def __init__(self):
+        self.seen = 0
+
+    def startInference(self):
+        self.seen = 0
+
+    def inferStep(self, sensation):
+        self.seen += sum(len(feature) for _, feature in sensation)
+
+    def getCurrentClassification(self):
+        return {"seen": self.seen}
+
+
+class _SlowNetwork(_CountingNetwork):
+    DELAY = 0.05
+
+    def inferStep(self, sensation):
+        time.sleep(self.DELAY)  # releases the GIL, as native computation can
+        super().inferStep(sensation)
+
+
+def _object(seed, numColumns=2, numSensations=6):
+    rng = np.random.RandomState(seed)
+    locations = rng.choice(100, (numSensations, 2))
+    return [[(list(location), sorted(rng.choice(50, 5, replace=False).tolist())) for location in locations]
+            for _ in range(numColumns)]
+
+
+def _steps(sensations):
+    # (displacement, feature) of every column, for each step
+    steps = []
+    for i in range(len(sensations[0])):
+        steps.append([(np.subtract(column[i][0], column[i - 1][0] if i > 0 else column[i][0]).tolist(), column[i][1])
+                      for column in sensations])
+    return steps
+
+
+class InferenceServiceTests(unittest.TestCase):
+    def test_sessions(self):
+        async def session(port, features):
+            client = await InferenceClient.connect(port=port)
+            results = []
+            for _ in range(3):
+                classification = await client.step([([0, 1], [1] * features), ([1, 0], [2] * features)])
+                results.append(classification["seen"])
+            await client.reset()
+            results.append((await client.step([([0, 0], [1]), ([0, 0], [])]))["seen"])
+            with self.assertRaises(RuntimeError):
+                await client.step([([0, 0], [1])])  # one column only
+            await client.close()
+            return results
+
+        async def run():
+            service = InferenceService([_CountingNetwork(), _CountingNetwork()])
+            server = await service.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            # three sessions on two replicas, the third one waits for a free replica
+            results = await asyncio.gather(session(port, 1), session(port, 2), session(port, 3))
+            await service.close()
+            return results
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [[2, 4, 6, 1], [4, 8, 12, 1], [6, 12, 18, 1]])
+
+    def test_concurrentSessions(self):
+        # steps of sessions on different replicas are computed at the same time, without waiting
+        async def session(port):
+            client = await InferenceClient.connect(port=port)
+            for _ in range(4):
+                await client.step([([0, 0], [1]), ([0, 0], [1])])
+            await client.close()
+
+        async def run():
+            service = InferenceService([_SlowNetwork() for _ in range(4)])
+            server = await service.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            started = time.perf_counter()
+            await asyncio.gather(*[session(port) for _ in range(4)])
+            elapsed = time.perf_counter() - started
+            await service.close()
+            return elapsed
+
+        # 16 steps of 4 sessions take as long as the 4 steps of one session, not 16 steps
+        self.assertLess(asyncio.run(run()), 10 * _SlowNetwork.DELAY)
+
+    def test_checkpoint(self):
+        # replicas of trained network loaded from numpy checkpoint classify as the network itself
+        network = L2_L4_L6_Network(2, {"cellCount": 1024, "sdrSize": 40, "seed": 1},
+                                   {"columnCount": 50, "cellsPerColumn": 8},
+                                   {"moduleCount": 4, "cellsPerAxis": 5, "dimensions": 2}, repeat=2, backend="numpy")
+        objects = {"a": _object(1), "b": _object(2)}
+        network.learn(objects)
+        path = tempfile.mkdtemp()
+        try:
+            network.save(path)
+            replicas = loadReplicas(path, 2)
+        finally:
+            shutil.rmtree(path)
+
+        async def session(port, name):
+            client = await InferenceClient.connect(port=port)
+            classifications = [await client.step(step) for step in _steps(objects[name])]
+            await client.close()
+            return classifications
+
+        async def run():
+            service = InferenceService(replicas)
+            server = await service.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            results = await asyncio.gather(session(port, "a"), session(port, "b"))
+            await service.close()
+            return results
+
+        results = asyncio.run(run())
+        for name, classifications in zip(["a", "b"], results):
+            network.startInference()
+            expected = []
+            for step in _steps(objects[name]):
+                network.inferStep(step)
+                expected.append(network.getCurrentClassification())
+            self.assertEqual(classifications, expected)
+            self.assertEqual(classifications[-1][name], 1.0)
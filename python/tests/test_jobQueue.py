@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import cli
+import experiment1
+from experimentFramework.jobQueue import JobQueue, Worker, resolveFunction
+
+
+class JobQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.queue = JobQueue(self.directory, lease=60.0, maxAttempts=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_submitAndRun(self):
+        first = self.queue.submit("math:hypot", args=[3, 4])
+        second = self.queue.submit("math:hypot", args=[6, 8], jobId="second")
+        self.assertEqual(self.queue.submit("math:hypot", args=[1, 1], jobId="second"), "second")
+        self.assertEqual(self.queue.status()["pending"], 2)
+
+        self.assertEqual(Worker(self.queue, pollInterval=0.01).run(), 2)
+        self.assertEqual(self.queue.result(first), 5.0)
+        self.assertEqual(self.queue.result(second), 10.0)
+        self.assertEqual(self.queue.status(), {"pending": 0, "running": 0, "done": 2, "failed": 0})
+        self.assertEqual(self.queue.job(first)["attempts"], 1)
+
+    def test_claimOnce(self):
+        jobId = self.queue.submit("math:hypot", args=[3, 4])
+        other = JobQueue(self.directory)
+        job = self.queue.claim("a")
+        self.assertEqual(job["id"], jobId)
+        self.assertIsNone(other.claim("b"))
+        self.assertEqual(self.queue.job(jobId)["worker"], "a")
+
+    def test_expiredLease(self):
+        jobId = self.queue.submit("math:hypot", args=[3, 4])
+        job = self.queue.claim("crashed")
+        self.assertEqual(self.queue.requeueExpired(), [])
+        self.assertTrue(self.queue.heartbeat(job))
+
+        self.assertEqual(self.queue.requeueExpired(now=time.time() + 61), [jobId])
+        self.assertEqual(self.queue.state(jobId), "pending")
+        self.assertFalse(self.queue.heartbeat(job))
+
+        Worker(self.queue, pollInterval=0.01).run()
+        job = self.queue.job(jobId)
+        self.assertEqual(job["attempts"], 2)
+        self.assertEqual(len(job["errors"]), 1)
+        self.assertEqual(self.queue.result(jobId), 5.0)
+
+    def test_lateResult(self):
+        # worker whose lease expired finishes the job after it was requeued
+        jobId = self.queue.submit("math:hypot", args=[3, 4])
+        job = self.queue.claim("slow")
+        self.queue.requeueExpired(now=time.time() + 61)
+        self.queue.complete(job, 5.0)
+        self.assertIsNone(self.queue.claim("other"))
+        self.assertEqual(self.queue.state(jobId), "done")
+
+    def test_failures(self):
+        jobId = self.queue.submit("math:sqrt", args=[-1])
+        Worker(self.queue, pollInterval=0.01).run()
+        job = self.queue.job(jobId)
+        self.assertEqual(self.queue.state(jobId), "failed")
+        self.assertEqual(job["attempts"], 2)
+        self.assertIn("ValueError", job["errors"][-1])
+        self.assertIsNone(self.queue.result(jobId))
+        self.assertEqual([f for f in os.listdir(os.path.join(self.directory, "running"))], [])
+
+    def test_resolveFunction(self):
+        self.assertIs(resolveFunction("os.path:join"), os.path.join)
+        with self.assertRaises(RuntimeError):
+            resolveFunction("os.path.join")
+
+    def test_repetitions(self):
+        # repetitions of the experiment return merged stats, collect merges them across jobs
+        flags = (experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR)
+        experiment1.NETWORK_BACKEND = "numpy"
+        experiment1.STREAM_CACHE_DIR = None
+        try:
+            with open(os.path.join(os.path.dirname(experiment1.__file__), "parameters.cfg"), "r") as f:
+                params = eval(f.read())
+            for repetition in range(2):
+                self.queue.submit("experiment1:runRepetition",
+                                  kwargs={"params": params, "repetition": repetition, "objects": ["cup", "boat"]})
+            self.assertEqual(Worker(self.queue, pollInterval=0.01).run(), 2)
+        finally:
+            experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR = flags
+
+        results = [result for _, result in self.queue.results()]
+        self.assertEqual([result["runs"] for result in results], [2, 2])
+
+        output = os.path.join(self.directory, "repetitions.json")
+        cli.main(["collect", "--queue", self.directory, "--output", output])
+        with open(output, "r") as f:
+            summary = json.load(f)
+        self.assertEqual(summary["runs"], 4)
+        self.assertEqual(sorted(summary["objects"]), ["boat", "cup"])
+        correct = summary["objects"]["cup"]["Correct classification"]
+        self.assertEqual(correct["count"], [2] * params["num_sensations"])
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from experimentFramework.objectGenerator import ObjectBundle, ObjectGenerator, KINDS
+from experimentFramework.objectSpace import TwoDimensionalObjectSpace
+
+
+class ObjectGeneratorTests(unittest.TestCase):
+    def test_generateAllKinds(self):
+        gen = ObjectGenerator(20, 20, vocabulary=("X", "Y"), margin=2, seed=1)
+        for kind in KINDS:
+            bundle = gen.generate(50, kind=kind, density=0.1)
+            self.assertEqual(bundle.grids.shape, (50, 20, 20))
+            self.assertTrue(bundle.grids.reshape(50, -1).any(axis=1).all())
+            self.assertLessEqual(bundle.grids.max(), 2)
+            # margin is kept empty
+            self.assertFalse(bundle.grids[:, :2, :].any())
+            self.assertFalse(bundle.grids[:, :, -2:].any())
+
+    def test_exactDensity(self):
+        gen = ObjectGenerator(20, 20, seed=1)
+        bundle = gen.generate(10, kind="random", density=0.1)
+        self.assertTrue((np.count_nonzero(bundle.grids.reshape(10, -1), axis=1) == 40).all())
+
+    def test_minDissimilarity(self):
+        gen = ObjectGenerator(10, 10, margin=1, seed=1)
+        bundle = gen.generate(30, kind="random", density=0.2, minDissimilarity=0.7)
+
+        occupied = bundle.grids.reshape(len(bundle), -1) > 0
+        for i in range(len(bundle)):
+            for j in range(i + 1, len(bundle)):
+                inter = np.count_nonzero(occupied[i] & occupied[j])
+                union = np.count_nonzero(occupied[i] | occupied[j])
+                self.assertGreaterEqual(1.0 - inter / union, 0.7)
+
+    def test_loadIntoObjectSpace(self):
+        gen = ObjectGenerator(20, 20, vocabulary=("X", "Y"), seed=1)
+        bundle = gen.generate(5, kind="shapes", density=0.1)
+
+        space1 = TwoDimensionalObjectSpace(20, 20)
+        space2 = TwoDimensionalObjectSpace(20, 20)
+        bundle.load_into(space1, 3)
+        space2.load_object(bundle.to_yaml(3))
+        self.assertEqual(space1._features, space2._features)
+
+    def test_saveLoadBundle(self):
+        for vocabulary in [("X",), ("X", "Y", "Z")]:
+            gen = ObjectGenerator(20, 20, vocabulary=vocabulary, seed=1)
+            bundle = gen.generate(20, kind="blobs", density=0.2)
+            with tempfile.TemporaryDirectory() as d:
+                path = os.path.join(d, "bundle.npz")
+                bundle.save(path)
+                loaded = ObjectBundle.load(path)
+            np.testing.assert_array_equal(bundle.grids, loaded.grids)
+            self.assertEqual(bundle.vocabulary, loaded.vocabulary)
+            self.assertEqual(bundle.names, loaded.names)
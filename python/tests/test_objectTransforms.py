@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from experimentFramework.objectGenerator import ObjectBundle
+from experimentFramework.objectSpace import TwoDimensionalObjectSpace
+import experimentFramework.objectTransforms as transforms
+
+OBJECT_L = (
+    "---\n"
+    "name: Object L\n"
+    "width: 6\n"
+    "height: 6\n"
+    "features:\n"
+    "  - { x: 1, y: 1, data: X }\n"
+    "  - { x: 1, y: 2, data: X }\n"
+    "  - { x: 2, y: 2, data: Y }\n"
+)
+
+
+class ObjectTransformsTests(unittest.TestCase):
+    def setUp(self):
+        self.bundle = ObjectBundle.from_yaml([OBJECT_L], ("X", "Y"), names=["l"])
+
+    def test_fromYaml(self):
+        space1 = TwoDimensionalObjectSpace(6, 6)
+        space2 = TwoDimensionalObjectSpace(6, 6)
+        space1.load_object(OBJECT_L)
+        self.bundle.load_into(space2, 0)
+        self.assertEqual(space1._features, space2._features)
+
+    def test_translate(self):
+        out = transforms.translate(self.bundle.grids, [[1, 0], [0, -1], [-2, 0]])
+        self.assertEqual(out.shape, (1, 3, 6, 6))
+        self.assertEqual(out[0, 0, 2, 1], 1)
+        self.assertEqual(out[0, 0, 3, 2], 2)
+        self.assertEqual(out[0, 1, 1, 0], 1)
+        self.assertEqual(np.count_nonzero(out[0, 2]), 1)  # two features pushed out
+
+    def test_rotateMirror(self):
+        np.testing.assert_array_equal(
+            transforms.rotate90(transforms.rotate90(self.bundle.grids, 1), 3), self.bundle.grids
+        )
+        mirrored = transforms.mirror(self.bundle.grids, "x")
+        self.assertEqual(mirrored[0, 4, 1], 1)
+        self.assertEqual(mirrored[0, 3, 2], 2)
+
+    def test_crop(self):
+        out = transforms.crop(self.bundle.grids, [[0, 0, 6, 2], [2, 2, 2, 2]])
+        self.assertEqual(np.count_nonzero(out[0, 0]), 1)
+        self.assertEqual(out[0, 1, 2, 2], 2)
+        self.assertEqual(np.count_nonzero(out[0, 1]), 1)
+
+    def test_variants(self):
+        bundle = transforms.variants(
+            self.bundle, rotations=(0, 1, 2, 3), mirrors=(False, True), shifts=[[0, 0], [1, 1], [-2, 0]]
+        )
+        # shift [-2, 0] pushes feature out of the grid for orientations with feature at x = 1
+        self.assertGreater(len(bundle), 8)
+        self.assertLess(len(bundle), 24)
+        self.assertTrue(all(s == "l" for s in bundle.sources))
+        self.assertTrue((np.count_nonzero(bundle.grids.reshape(len(bundle), -1), axis=1) == 3).all())
+        self.assertEqual(len(set(bundle.names)), len(bundle))
+
+        space = TwoDimensionalObjectSpace(6, 6)
+        bundle.load_into(space, bundle.index("l_r0_t1,1"))
+        self.assertEqual(space.get_feature(3, 3), "Y")
+
+    def test_randomShifts(self):
+        shifts = transforms.random_shifts(24, 2, np.random.default_rng(1))
+        self.assertEqual(len({tuple(s) for s in shifts}), 24)
+        self.assertFalse(((shifts == 0).all(axis=1)).any())
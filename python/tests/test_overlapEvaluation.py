@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from experimentFramework.overlapEvaluation import OverlapEvaluator
+
+
+def _isObjectClassified(overlaps, sizes, obj, minOverlap, maxL2Size):
+    # same as L2_L4_L6_Network.isObjectClassified for one step
+    ok = 0
+    for col in range(len(sizes)):
+        if sizes[col] == 0:
+            continue
+        if overlaps[col, obj] >= minOverlap and sizes[col] <= maxL2Size:
+            ok += 1
+    return ok == len(sizes)
+
+
+class OverlapEvaluationTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.runs, self.steps, self.columns, self.objects = 12, 8, 4, 5
+        self.overlaps = rng.integers(0, 41, (self.runs, self.steps, self.columns, self.objects))
+        self.sizes = rng.integers(0, 80, (self.runs, self.steps, self.columns))
+        self.sizes[self.sizes < 10] = 0
+        self.trueObjects = rng.integers(0, self.objects, self.runs)
+
+    def test_matchesNetworkRule(self):
+        evaluator = OverlapEvaluator(self.overlaps, self.sizes, self.trueObjects)
+        minOverlaps = [5, 20, 30]
+        maxL2Sizes = [40, 60, 80]
+        result = evaluator.evaluate(minOverlaps, maxL2Sizes)
+
+        for a, minOverlap in enumerate(minOverlaps):
+            for b, maxL2Size in enumerate(maxL2Sizes):
+                recognized = 0
+                falsePositives = 0
+                for r in range(self.runs):
+                    correct = [
+                        _isObjectClassified(self.overlaps[r, t], self.sizes[r, t], self.trueObjects[r], minOverlap,
+                                            maxL2Size)
+                        for t in range(self.steps)
+                    ]
+                    recognized += any(correct)
+                    expectedStep = correct.index(True) + 1 if any(correct) else -1
+                    self.assertEqual(result["stepsToRecognition"][a, b, r], expectedStep)
+                    for o in range(self.objects):
+                        if o != self.trueObjects[r]:
+                            falsePositives += _isObjectClassified(
+                                self.overlaps[r, -1], self.sizes[r, -1], o, minOverlap, maxL2Size
+                            )
+                self.assertAlmostEqual(result["accuracy"][a, b], recognized / self.runs)
+                self.assertAlmostEqual(
+                    result["falsePositiveRate"][a, b], falsePositives / (self.runs * (self.objects - 1))
+                )
+
+    def test_fromStats(self):
+        names = ["o" + str(i) for i in range(self.objects)]
+        statsList = []
+        for r in range(self.runs):
+            steps = self.steps - r % 3  # runs of different length
+            stats = {"name": names[self.trueObjects[r]], "L2 overlaps": list(self.overlaps[r, :steps])}
+            for col in range(self.columns):
+                stats["L2 Representation C" + str(col)] = self.sizes[r, :steps, col].tolist()
+            statsList.append(stats)
+
+        evaluator = OverlapEvaluator.fromStats(statsList, names)
+        self.assertEqual(evaluator.overlaps.shape, self.overlaps.shape)
+        self.assertEqual(evaluator.lengths.tolist(), [self.steps - r % 3 for r in range(self.runs)])
+        fpr, tpr = evaluator.roc(np.arange(0, 41, 5), 80)
+        self.assertTrue((np.diff(tpr) <= 0).all())
+        self.assertTrue((np.diff(fpr) <= 0).all())
@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+import experiment1
+from experimentFramework.anytimeEvaluation import NONE
+from parallelEvaluation import LibraryResults, ParallelEvaluator, summarizeRun
+
+
+class ParallelEvaluationTests(unittest.TestCase):
+    def test_summarizeRun(self):
+        stats = {
+            "Correct classification": [0.0, 0.0, 1.0, 1.0],
+            "Actual classification": [{"cup": 0.5}, {"cup": 0.5}, {"cup": 1.0}, {"cup": 1.0, "boat": 0.25}],
+        }
+        self.assertEqual(summarizeRun(stats), (3, "cup"))
+        stats["Correct classification"] = [0.0] * 4
+        stats["Actual classification"][-1] = {"cup": 1.0, "boat": 1.0}
+        self.assertEqual(summarizeRun(stats), (-1, NONE))
+
+    def test_results(self):
+        results = LibraryResults(["cup", "boat"])
+        results.add("cup", 3, "cup")
+        results.add("cup", 5, "cup")
+        results.add("boat", -1, NONE)
+        results.add("boat", 2, "a")  # learned object outside of evaluated ones
+
+        self.assertEqual(results.labels, ["cup", "boat", "a", NONE])
+        self.assertEqual(results.confusion.tolist(), [[2, 0, 0, 0], [0, 0, 1, 1]])
+        self.assertEqual(results.accuracy(), 0.5)
+        self.assertEqual(results.latency("cup"), {"recognized": 1.0, "mean steps": 4.0})
+        self.assertEqual(results.latency("boat")["recognized"], 0.5)
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork is not available")
+class ParallelEvaluatorTests(unittest.TestCase):
+    def setUp(self):
+        self.flags = (experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR)
+        experiment1.NETWORK_BACKEND = "numpy"
+        experiment1.STREAM_CACHE_DIR = None
+        self.checkpoint = tempfile.mkdtemp()
+
+    def tearDown(self):
+        experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR = self.flags
+        shutil.rmtree(self.checkpoint)
+
+    def test_evaluate(self):
+        # numpy checkpoint is evaluated in forked workers without htm.core
+        with open(os.path.join(os.path.dirname(experiment1.__file__), "parameters.cfg"), "r") as f:
+            params = eval(f.read())
+        experiment = experiment1.Experiment(objectSpaceSize=20)
+        experiment.learn(params, 0, objects=["cup", "boat"])
+        experiment.network.save(self.checkpoint)
+        # learned streams, surrogate network recognizes only learned sensations
+        streams = {obj: [experiment.sensations[obj]] * 3 for obj in experiment.learnedObjectNames}
+
+        loaded = ParallelEvaluator(self.checkpoint, processes=2).evaluate(streams)
+        shared = ParallelEvaluator(self.checkpoint, processes=2, network=experiment.network).evaluate(streams)
+        for results in (loaded, shared):
+            self.assertEqual(results.confusion.tolist(), [[3, 0, 0], [0, 3, 0]])
+            self.assertEqual(results.accuracy(), 1.0)
+        self.assertEqual(loaded.summary(), shared.summary())
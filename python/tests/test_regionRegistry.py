@@ -0,0 +1,127 @@
+import unittest
+
+import numpy as np
+
+from l2l4l6Framework.regionRegistry import (REGION_IMPLEMENTATIONS, ROLES, RegionImplementation, linkRegions,
+                                            selectRegions)
+
+try:
+    import htm.advanced  # noqa: F401
+    HTM = True
+except ImportError:
+    HTM = False
+
+L2_PARAMS = {"cellCount": 1024, "sdrSize": 40, "activationThresholdDistal": 20, "sampleSizeDistal": 20,
+             "sampleSizeProximal": 10, "minThresholdProximal": 5, "seed": 42}
+L4_PARAMS = {"columnCount": 150, "cellsPerColumn": 16, "activationThreshold": 8, "minThreshold": 8,
+             "initialPermanence": 1.0, "connectedPermanence": 0.6, "permanenceIncrement": 0.1,
+             "permanenceDecrement": 0.02, "reducedBasalThreshold": 8, "sampleSize": 20,
+             "implementation": "ApicalTiebreak", "maxSynapsesPerSegment": -1, "maxSegmentsPerCell": 255,
+             "seed": 42}
+L6A_PARAMS = {"moduleCount": 5, "dimensions": 2, "cellsPerAxis": 10, "scale": [2] * 5,
+              "orientation": np.radians([6, 18, 30, 42, 54]).tolist(), "activationThreshold": 8,
+              "initialPermanence": 0.45, "connectedPermanence": 0.5, "learningThreshold": 8, "sampleSize": 10,
+              "permanenceIncrement": 0.1, "permanenceDecrement": 0.0, "bumpOverlapMethod": "probabilistic",
+              "seed": 42}
+
+
+class _LinkRecorder:
+    def __init__(self):
+        self.links = []
+
+    def link(self, src, dest, linkType, linkParams, srcOutput, destInput, **kwargs):
+        self.links.append((src, srcOutput, dest, destInput, kwargs))
+
+
+def _runNetwork(regionImplementations, steps=30):
+    """
+    Learns two objects and infers object "a" step by step.
+
+    :return: outputs of all layers and classification after every inference step
+    """
+    from htm.advanced.support.register_regions import registerAllAdvancedRegions
+    from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
+
+    registerAllAdvancedRegions()
+    network = L2_L4_L6_Network(2, L2_PARAMS, L4_PARAMS, L6A_PARAMS, repeat=1,
+                               regionImplementations=regionImplementations)
+    rng = np.random.RandomState(0)
+    objects = {name: [[(rng.randint(0, 20, 2).tolist(), sorted(rng.choice(150, 15, replace=False).tolist()))
+                       for _ in range(steps)]] * 2 for name in ("a", "b")}
+    network.learn(objects)
+    outputs = []
+    network.startInference()
+    previous = None
+    for location, feature in objects["a"][0]:
+        displacement = np.subtract(location, previous).tolist() if previous is not None else [0, 0]
+        previous = location
+        network.inferStep([(displacement, feature)] * 2)
+        outputs.append((network.getL2Representations(), network.getL4Representations(),
+                        network.getL4PredictedCells(), network.getL6aRepresentations(),
+                        network.getCurrentClassification()))
+    return outputs
+
+
+class RegionRegistryTests(unittest.TestCase):
+    def test_defaultSelection(self):
+        regions = selectRegions()
+        self.assertEqual(sorted(regions), sorted(ROLES))
+        self.assertEqual(regions["L4"].regionType, "py.ApicalTMPairRegion")
+        self.assertEqual(regions["sensor"].regionType, "py.RawSensor")
+        self.assertTrue(all(implementation.exact for implementation in regions.values()))
+
+    def test_overrides(self):
+        regions = selectRegions({"L4": "TMRegion"})
+        L4 = regions["L4"]
+        self.assertTrue(L4.native)
+        self.assertEqual(L4.output("predictedCells"), "predictiveCells")
+        self.assertEqual(L4.output("activeCells"), "activeCells")
+        self.assertEqual(L4.parameter("learn"), "learningMode")
+        self.assertEqual(L4.params(dict(L4_PARAMS, basalInputWidth=500))["numberOfCols"], 150)
+        with self.assertRaises(RuntimeError):
+            selectRegions({"L4": "UnknownRegion"})
+        with self.assertRaises(RuntimeError):
+            RegionImplementation("L5", "py.Region")
+
+    def test_links(self):
+        regions = selectRegions({"L4": "TMRegion"})
+        network = _LinkRecorder()
+        linkRegions(network, "sensorInput", regions["sensor"], "dataOut", "L4", regions["L4"], "activeColumns")
+        linkRegions(network, "L6a", regions["L6a"], "learnableCells", "L4", regions["L4"], "basalGrowthCandidates")
+        linkRegions(network, "L2", regions["L2"], "feedForwardOutput", "L4", regions["L4"], "apicalInput",
+                    propagationDelay=1)
+        self.assertEqual(network.links, [
+            ("sensorInput", "dataOut", "L4", "bottomUpIn", {}),
+            ("L2", "feedForwardOutput", "L4", "externalApicalInput", {"propagationDelay": 1}),
+        ])
+
+    @unittest.skipUnless(HTM, "htm.core is not installed")
+    def test_parity(self):
+        # every exact native implementation must compute the same as the Python region
+        reference = {role: next(i.regionType for i in REGION_IMPLEMENTATIONS[role] if not i.native)
+                     for role in ROLES}
+        exact = [(role, implementation.regionType) for role in ROLES for implementation in REGION_IMPLEMENTATIONS[role]
+                 if implementation.exact and implementation.native and implementation.available()]
+        if not exact:
+            self.skipTest("no exact native implementation is registered")
+
+        expected = _runNetwork(reference)
+        for role, regionType in exact:
+            with self.subTest(role=role, regionType=regionType):
+                self.assertEqual(_runNetwork(dict(reference, **{role: regionType})), expected)
+        self.assertEqual(_runNetwork(None), expected)
+
+    @unittest.skipUnless(HTM, "htm.core is not installed")
+    def test_TMRegionL4(self):
+        # TMRegion is not exact (no apical input from L2), but the network must still recognize the object
+        expected = _runNetwork(None)
+        outputs = _runNetwork({"L4": "TMRegion"})
+        self.assertEqual(len(outputs), len(expected))
+        for L2, L4, _, L6a, _ in outputs:
+            self.assertEqual((len(L2), len(L4), len(L6a)), (2, 2, 2))
+            for cells in L4:
+                self.assertTrue(all(0 <= cell < L4_PARAMS["columnCount"] * L4_PARAMS["cellsPerColumn"]
+                                    for cell in cells))
+
+        self.assertEqual(expected[-1][-1], {"a": 1.0, "b": 0.0})
+        self.assertEqual(outputs[-1][-1], {"a": 1.0, "b": 0.0})
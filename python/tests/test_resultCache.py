@@ -0,0 +1,55 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from experimentFramework.resultCache import ResultCache, canonicalKey, filesDigest
+
+
+class ResultCacheTests(unittest.TestCase):
+    def test_canonicalKey(self):
+        a = canonicalKey(params={"seed": 42, "l2": {"sdrSize": 40, "rate": 1.0}}, objects=("cup", "boat"))
+        b = canonicalKey(objects=["cup", "boat"], params={"l2": {"rate": 1, "sdrSize": np.int64(40)}, "seed": 42})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, canonicalKey(params={"seed": 43, "l2": {"sdrSize": 40, "rate": 1.0}},
+                                            objects=("cup", "boat")))
+
+    def test_filesDigest(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "cup.yml")
+            with open(path, "w") as f:
+                f.write("XX\n")
+            before = filesDigest([path])
+            with open(path, "w") as f:
+                f.write("XY\n")
+            self.assertNotEqual(before, filesDigest([path]))
+
+    def test_putGetEvict(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = ResultCache(d, maxBytes=2000)
+            self.assertIsNone(cache.get("a"))
+
+            def saveCheckpoint(path):
+                os.makedirs(path)
+                with open(os.path.join(path, "network.htm"), "wb") as f:
+                    f.write(b"0" * 100)
+
+            stats = [{"name": "cup", "Correct classification": [0.0, 1.0]}]
+            cache.put("a", stats, saveCheckpoint)
+            self.assertEqual(cache.get("a"), stats)
+            self.assertTrue(os.path.isdir(cache.checkpointPath("a")))
+
+            payload = [{"data": "x" * 1000}]
+            cache.put("b", payload)
+            past = time.time() - 100
+            os.utime(os.path.join(d, "a"), (past, past))
+            os.utime(os.path.join(d, "b"), (past + 10, past + 10))
+            cache.get("a")  # "a" is now used more recently than "b"
+
+            cache.put("c", payload)  # does not fit, least recently used "b" is removed
+            self.assertIn("a", cache)
+            self.assertNotIn("b", cache)
+            self.assertIn("c", cache)
+            self.assertLessEqual(cache.size(), 2000)
@@ -0,0 +1,61 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from experimentFramework.statsAggregator import RunningStats, StatsAggregator
+
+
+class StatsAggregatorTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        # runs of different length, as inference may have different number of steps
+        self.runs = [rng.normal(10, 3, rng.integers(5, 10)) for _ in range(40)]
+
+    def test_runningStats(self):
+        stats = RunningStats()
+        for values in self.runs:
+            stats.add(values)
+
+        for step in [0, 4, 7]:
+            column = np.array([r[step] for r in self.runs if len(r) > step])
+            self.assertEqual(stats.count[step], len(column))
+            self.assertAlmostEqual(stats.mean[step], column.mean())
+            self.assertAlmostEqual(stats.variance[step], column.var(ddof=1))
+            self.assertEqual(stats.max[step], column.max())
+
+    def test_merge(self):
+        full = RunningStats()
+        parts = [RunningStats(), RunningStats(), RunningStats()]
+        for i, values in enumerate(self.runs):
+            full.add(values)
+            parts[i % 3].add(values)
+
+        merged = RunningStats()
+        for part in parts:
+            merged.merge(RunningStats.fromState(pickle.loads(pickle.dumps(part.state()))))
+
+        np.testing.assert_array_equal(merged.count, full.count)
+        np.testing.assert_allclose(merged.mean, full.mean)
+        np.testing.assert_allclose(merged.variance, full.variance)
+
+    def test_aggregator(self):
+        aggregators = [StatsAggregator(), StatsAggregator()]
+        for i in range(10):
+            stats = {
+                "name": "cup" if i % 2 else "boat",
+                "L2 Representation C0": [40, 45, 50 + i],
+                "Correct classification": [0.0, 1.0, 1.0],
+                "Full L2 SDR C0": [[1, 2], [3], [4]],
+            }
+            aggregators[i // 5].add(stats)
+
+        total = StatsAggregator.fromState(aggregators[0].state())
+        total.merge(aggregators[1])
+        self.assertEqual(total.runs, 10)
+        self.assertEqual(total.objects(), ["boat", "cup"])
+        self.assertNotIn(("cup", "Full L2 SDR C0"), total.results)
+
+        cup = total.summary("cup", "L2 Representation C0")
+        self.assertEqual(cup["mean"][2], 50 + np.mean([1, 3, 5, 7, 9]))
+        self.assertEqual(total.combined("Correct classification")["mean"].tolist(), [0.0, 1.0, 1.0])
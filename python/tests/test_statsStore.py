@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from collections import defaultdict
+
+import numpy as np
+
+from experimentFramework.statsStore import StatsReader, StatsWriter, decodeSDRs, encodeSDRs
+
+
+def _fakeStats(name, steps, seed):
+    rng = np.random.default_rng(seed)
+    stats = defaultdict(list)
+    for _ in range(steps):
+        for c in range(2):
+            sdr = sorted(int(v) for v in rng.choice(4096, rng.integers(0, 50), replace=False))
+            stats["L2 Representation C" + str(c)].append(len(sdr))
+            stats["Full L2 SDR C" + str(c)].append(sdr)
+        stats["Correct classification"].append(float(rng.integers(0, 2)))
+        stats["Actual classification"].append({"cup": 0.5, name: 1.0})
+        stats["L2 overlaps"].append(rng.integers(0, 40, (2, 5), dtype=np.int32))
+    stats.update({"name": name})
+    return stats
+
+
+class StatsStoreTests(unittest.TestCase):
+    def test_sdrEncoding(self):
+        sdrs = [[3, 10, 11], [], [0], [70000, 70001], []]
+        lengths, deltas = encodeSDRs(sdrs)
+        self.assertEqual(deltas.dtype, np.uint32)
+        self.assertEqual([d.tolist() for d in decodeSDRs(lengths, deltas)], sdrs)
+
+        lengths, deltas = encodeSDRs([[], []])
+        self.assertEqual([d.tolist() for d in decodeSDRs(lengths, deltas)], [[], []])
+
+    def test_writeRead(self):
+        runs = [_fakeStats("obj" + str(i), 10 + i, i) for i in range(7)]
+        with tempfile.TemporaryDirectory() as d:
+            with StatsWriter(d, runsPerChunk=3) as writer:
+                for stats in runs:
+                    writer.writeRun(stats)
+
+            reader = StatsReader(d)
+            self.assertEqual(len(reader), 7)
+            self.assertEqual(reader.runNames(), ["obj" + str(i) for i in range(7)])
+
+            for i in [0, 4, 6]:
+                run = reader.run(i)
+                np.testing.assert_array_equal(run.pop("L2 overlaps"), runs[i]["L2 overlaps"])
+                expected = {k: v for k, v in runs[i].items() if k != "L2 overlaps"}
+                self.assertEqual(run, expected)
+
+            column = reader.column("L2 Representation C1")
+            self.assertEqual(column.tolist(), [v for r in runs for v in r["L2 Representation C1"]])
+            self.assertEqual(reader.column("L2 overlaps").shape, (sum(10 + i for i in range(7)), 2, 5))
+            keys, matrix = reader.column("Actual classification")
+            self.assertIn("obj3", keys)
+            self.assertEqual(matrix.shape, (sum(10 + i for i in range(7)), 8))
+            reader.close()
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from experimentFramework.streamCache import SensationStream, StreamCache
+
+
+def _streams(rng):
+    streams = {}
+    for obj in ["cup", "boat"]:
+        positions = rng.integers(0, 20, (10, 2))
+        streams[obj] = {
+            col: [([int(x), int(y)], sorted(rng.choice(150, 5, replace=False).tolist())) for x, y in positions]
+            for col in range(4)
+        }
+    return streams
+
+
+class StreamCacheTests(unittest.TestCase):
+    def test_storeLoad(self):
+        np.random.seed(3)
+        streams = _streams(np.random.default_rng(1))
+        state = np.random.get_state()
+        expected = np.random.random(3)
+
+        with tempfile.TemporaryDirectory() as d:
+            cache = StreamCache(d)
+            self.assertIsNone(cache.load("k"))
+            cache.store("k", streams, state)
+
+            loaded, rngState = cache.load("k")
+            self.assertEqual(list(loaded), ["cup", "boat"])
+            for obj in streams:
+                for col in range(4):
+                    stream = loaded[obj][col]
+                    self.assertIsInstance(stream, SensationStream)
+                    self.assertEqual(len(stream), 10)
+                    self.assertEqual([(loc.tolist(), f.tolist()) for loc, f in stream],
+                                     [tuple(s) for s in streams[obj][col]])
+            self.assertIsInstance(loaded["cup"][0].features, np.memmap)
+
+            np.random.seed(99)
+            np.random.set_state(rngState)
+            np.testing.assert_array_equal(np.random.random(3), expected)
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import defaultdict
+
+import numpy as np
+
+import experiment1
+from l2l4l6Framework.l2_l4_l6_Network import L2_L4_L6_Network
+from l2l4l6Framework.surrogateNetwork import encodeScalar, hashCells, hashValues
+
+L2_PARAMS = {"cellCount": 1024, "sdrSize": 40, "seed": 1}
+L4_PARAMS = {"columnCount": 50, "cellsPerColumn": 8}
+L6A_PARAMS = {"moduleCount": 4, "cellsPerAxis": 5, "dimensions": 2}
+
+
+def _object(seed, numColumns=2, numSensations=6):
+    # the same path for all columns, each column senses a different feature
+    rng = np.random.RandomState(seed)
+    locations = rng.choice(100, (numSensations, 2))
+    return [[(list(location), sorted(rng.choice(50, 5, replace=False).tolist())) for location in locations]
+            for _ in range(numColumns)]
+
+
+class SurrogateNetworkTests(unittest.TestCase):
+    def createNetwork(self):
+        return L2_L4_L6_Network(2, L2_PARAMS, L4_PARAMS, L6A_PARAMS, repeat=2, backend="numpy")
+
+    def test_hashing(self):
+        self.assertEqual(hashValues([1, 2, 3]), hashValues(np.array([1, 2, 3])))
+        self.assertNotEqual(hashValues([1, 2, 3]), hashValues([1, 2, 3], salt=1))
+        cells = hashCells(hashValues([4, 5]), [0, 3, 7], 10)
+        self.assertEqual(cells.tolist(), sorted(cells.tolist()))
+        self.assertEqual((cells // 10).tolist(), [0, 3, 7])
+        self.assertEqual(encodeScalar(2, 10, 3, 0, 1), [7, 8, 9])
+
+    def test_learnAndInfer(self):
+        network = self.createNetwork()
+        objects = {"a": _object(1), "b": _object(2), "c": _object(3)}
+        network.learn(objects)
+
+        self.assertEqual(sorted(network.learnedObjects), ["a", "b", "c"])
+        self.assertEqual([len(cells) for cells in network.learnedObjects["a"]], [40, 40])
+
+        for name, sensations in objects.items():
+            stats = defaultdict(list)
+            network.infer(sensations, stats=stats, objname=name)
+            self.assertEqual(stats["Correct classification"][-1], 1.0)
+            self.assertEqual(stats["Actual classification"][-1][name], 1.0)
+            self.assertEqual(len(stats["L4 Predicted C0"]), 6)
+
+        # started elsewhere on the object, it is still recognized after some movements
+        shifted = [column[2:] for column in objects["b"]]
+        stats = defaultdict(list)
+        network.infer(shifted, stats=stats, objname="b")
+        self.assertEqual(stats["Correct classification"][-1], 1.0)
+
+    def test_deterministic(self):
+        results = []
+        for _ in range(2):
+            network = self.createNetwork()
+            network.learn({"a": _object(1), "b": _object(2)})
+            network.infer(_object(2), objname="b")
+            results.append((network.learnedObjects, network.getL2Representations(),
+                            network.getL4Representations(), network.getL6aRepresentations()))
+        self.assertEqual(results[0], results[1])
+
+    def test_checkpoint(self):
+        network = self.createNetwork()
+        network.learn({"a": _object(1), "b": _object(2)})
+        path = tempfile.mkdtemp()
+        try:
+            network.save(path)
+            loaded = L2_L4_L6_Network.load(path)
+        finally:
+            shutil.rmtree(path)
+        self.assertEqual(loaded.backend, "numpy")
+        self.assertEqual(loaded.learnedObjects, network.learnedObjects)
+        stats = defaultdict(list)
+        loaded.infer(_object(1), stats=stats, objname="a")
+        self.assertEqual(stats["Correct classification"][-1], 1.0)
+
+
+class SurrogateExperimentTests(unittest.TestCase):
+    def setUp(self):
+        self.flags = (experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR)
+        experiment1.NETWORK_BACKEND = "numpy"
+        experiment1.STREAM_CACHE_DIR = None
+        with open(os.path.join(os.path.dirname(experiment1.__file__), "parameters.cfg"), "r") as f:
+            self.params = eval(f.read())
+        self.params["debug"] = False
+
+    def tearDown(self):
+        experiment1.NETWORK_BACKEND, experiment1.STREAM_CACHE_DIR = self.flags
+
+    def test_pipeline(self):
+        experiment = experiment1.Experiment(objectSpaceSize=20)
+        experiment.learn(self.params, 0, objects=["cup", "boat"])
+        for obj in ["cup", "boat"]:
+            stats = experiment.infer(objectName=obj)
+            self.assertEqual(len(stats["Correct classification"]), self.params["num_sensations"])
+            self.assertIn(obj, stats["Actual classification"][-1])
@@ -13,14 +13,10 @@ def plotSDRBinaryMap(axes, name, data, colors=["black", "lime", "gray"]):
 
     plotW = math.ceil(math.sqrt(len(data)))
 
-    rf = np.zeros([plotW, plotW], dtype=np.uint8)
-    for i in range(plotW):
-        arr = data[i * plotW : i * plotW + plotW] * 5
-        if len(arr) < plotW:
-            arr = np.concatenate(
-                [arr, np.ones(plotW - len(arr)) * 10]
-            )  # fill end where is nothing
-        rf[:, i] = arr
+    # fill end where is nothing, each row of plotW values is then one column of the image
+    rf = np.full(plotW * plotW, 10, dtype=np.uint8)
+    rf[: len(data)] = np.asarray(data, dtype=np.uint8) * 5
+    rf = rf.reshape(plotW, plotW).T
 
     cm = Colors.LinearSegmentedColormap.from_list("myCMap", colors, N=3)
 
@@ -31,14 +27,7 @@ def plotBinaryMap(
 ):
 
     # Translate list (with custom datatypes) to the numpy numeric array
-    width = len(data)
-    height = len(data[0])
-
-    arr = np.zeros((width, height), dtype=np.uint8)
-    for x in range(width):
-        for y in range(height):
-            if data[x][y] != 0:
-                arr[x][y] = 1
+    arr = (np.asarray(data) != 0).astype(np.uint8)
 
     axes.set_title(name)
     axes.set_xlabel("x")
@@ -62,39 +51,12 @@ def plotEnvironment(
     axes, name, env, agentPos, colors=["white", "blue", "red", "lightGray", "cyan"]
 ):
 
-    environmentData = env._features
-
-    # Translate list (with custom datatypes) to the numpy numeric array
-    width = env.width
-    height = env.height
-    arr = np.zeros((width, height), dtype=np.uint8)
-    for x in range(width):
-        for y in range(height):
-            if environmentData[x][y] != None:
-                arr[x][y] = 1
+    arr = environmentFrames(env, [agentPos])[0]
 
     axes.set_title(name)
     axes.set_xlabel("x")
     axes.set_ylabel("y")
 
-    # features will be value 5
-    arr = arr
-
-    agX = agentPos[0]
-    agY = agentPos[1]
-
-    arr[agX, agY] = 2  # agent pos
-
-    # highlight sensors around him
-    if agX > 0:
-        arr[agX - 1, agY] = 4 if arr[agX - 1, agY] == 1 else 3
-    if agY > 0:
-        arr[agX, agY - 1] = 4 if arr[agX, agY - 1] == 1 else 3
-    if agX < width-1:
-        arr[agX + 1, agY] = 4 if arr[agX + 1, agY] == 1 else 3
-    if agY < height-1:
-        arr[agX, agY + 1] = 4 if arr[agX, agY + 1] == 1 else 3
-
     cm = Colors.LinearSegmentedColormap.from_list("myCMap", colors, N=5)
 
     axes.set_xticks(np.arange(-0.5, 20, 1))
@@ -109,20 +71,7 @@ def plotSensations(
     axes, name, env, sensations1, sensations2, colors=["white", "blue", "red", "lightGray", "cyan"]
 ):
 
-    environmentData = env._features
-
-    # Translate list (with custom datatypes) to the numpy numeric array
-    width = env.width
-    height = env.height
-    arr = np.zeros((width, height), dtype=np.uint8)
-    for x in range(width):
-        for y in range(height):
-            if [x, y] in sensations1:
-                arr[x][y] = 4
-            elif [x, y] in sensations2:
-                arr[x][y] = 2
-            elif environmentData[x][y] != None:
-                arr[x][y] = 1
+    arr = sensationsArray(env, sensations1, sensations2)
 
     axes.set_title(name)
     axes.set_xlabel("x")
@@ -139,6 +88,57 @@ def plotSensations(
     axes.grid(color="w", linestyle="-", linewidth=2)
     axes.imshow(arr.T, interpolation="nearest", norm=Colors.Normalize(0, 5), cmap=cm)
 
+
+def environmentArray(env):
+    """
+    Returns numpy array (width, height) with 1 where the object space contains feature.
+    """
+    return np.not_equal(np.array(env._features, dtype=object), None).astype(np.uint8)
+
+
+def environmentFrames(env, agentPositions):
+    """
+    Builds array for plotEnvironment for each agent position at once.
+    Values: 0 - empty, 1 - feature, 2 - agent, 3 - sensor, 4 - sensor on feature
+
+    :return: numpy array (positions, width, height)
+    """
+    return environmentFramesFromArray(environmentArray(env), agentPositions)
+
+
+def environmentFramesFromArray(base, agentPositions):
+    """
+    Same as environmentFrames, but for object space already converted by environmentArray.
+    """
+    width, height = base.shape
+    pos = np.asarray(agentPositions, dtype=int).reshape(-1, 2)
+    t = np.arange(len(pos))
+
+    frames = np.repeat(base[None], len(pos), axis=0)
+    frames[t, pos[:, 0], pos[:, 1]] = 2  # agent pos
+
+    # highlight sensors around him
+    for dx, dy in ((-1, 0), (0, -1), (1, 0), (0, 1)):
+        x = pos[:, 0] + dx
+        y = pos[:, 1] + dy
+        valid = (x >= 0) & (y >= 0) & (x < width) & (y < height)
+        frames[t[valid], x[valid], y[valid]] = np.where(base[x[valid], y[valid]] == 1, 4, 3)
+
+    return frames
+
+
+def sensationsArray(env, sensations1, sensations2):
+    """
+    Builds array for plotSensations. Positions of sensations1 have value 4,
+    positions of sensations2 value 2 and other features value 1.
+    """
+    arr = environmentArray(env)
+    for positions, value in ((sensations2, 2), (sensations1, 4)):
+        pos = np.asarray(positions, dtype=int).reshape(-1, 2)
+        arr[pos[:, 0], pos[:, 1]] = value
+    return arr
+
+
 def isNotebook():
     try:
         shell = get_ipython().__class__.__name__